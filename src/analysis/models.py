@@ -1,3 +1,4 @@
+import hashlib
 import pandas as pd
 import numpy as np
 import os
@@ -9,20 +10,30 @@ import sys
 from pathlib import Path
 from linearmodels.iv import AbsorbingLS
 from scipy import stats
-from typing import Optional, Tuple, Dict, List, Union
+from typing import Optional, Tuple, Dict, List, Union, Iterator
 from dataclasses import dataclass
-from statsmodels.stats._delta_method import approx_fprime_cs
+from concurrent.futures import ProcessPoolExecutor
 from scipy.stats import chi2, f as f_dist
+from scipy.sparse import coo_matrix, csr_matrix, diags
+from scipy.sparse.linalg import cg
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from src.identification.detect_events import load_event_grid
 from src.utils.config import load_config
-from src.utils.time_parse import normalize_time
+from src.utils.result_cache import ResultCache
+from src.utils.time_parse import abs_month_to_timestamp, to_abs_month
 
-# Suppress warnings for cleaner output
+
+class FixedEffectConvergenceWarning(RuntimeWarning):
+    """Alternating projections stopped at ``max_iter`` before reaching ``tol``."""
+
+
+# Suppress warnings for cleaner output, except unconverged fixed effects
 warnings.filterwarnings("ignore")
+warnings.filterwarnings("always", category=FixedEffectConvergenceWarning)
 
 PROCESSED_DIR = "data/processed"
 OUTPUT_DIR = "output"
@@ -30,9 +41,118 @@ FIGURES_DIR = os.path.join(OUTPUT_DIR, "figures")
 TABLES_DIR = os.path.join(OUTPUT_DIR, "tables")
 CONFIG = load_config()
 
+# Cache of fitted regressions, opened by load_and_prep_data once the
+# processed inputs are known (None: every fit runs)
+RESULT_CACHE = None
+
 os.environ.setdefault("MPLCONFIGDIR", os.path.join(OUTPUT_DIR, "mpl_cache"))
 
 
+# ============================================================================
+# Fixed-Effect Demeaning (Method of Alternating Projections)
+# ============================================================================
+# Guimarães & Portugal (2010); Gaure (2013). Shared by the wild bootstrap
+# and run_absorbing_regression.
+# ============================================================================
+
+class FixedEffectDemeaner:
+    """
+    Multi-way within transformation by alternating projections (MAP).
+
+    Each sweep subtracts (weighted) group means for every fixed-effect
+    dimension in turn, using ``np.bincount`` on integer codes; sweeps are
+    repeated until the largest correction is below ``tol``. With a single
+    dimension one sweep is exact. If ``max_iter`` sweeps do not get there,
+    ``demean`` warns (``FixedEffectConvergenceWarning``) and ``converged_``
+    is False: the result is only partially demeaned.
+
+    Parameters
+    ----------
+    absorb : np.ndarray
+        Fixed-effect identifiers (n_obs,) or (n_obs, n_fe)
+    weights : Optional[np.ndarray]
+        Observation weights (n_obs,)
+    tol : float
+        Convergence tolerance on the largest per-sweep correction,
+        relative to the scale of the input
+    max_iter : int
+        Maximum number of sweeps
+    """
+
+    def __init__(self, absorb: np.ndarray,
+                 weights: Optional[np.ndarray] = None,
+                 tol: float = 1e-8,
+                 max_iter: int = 1000):
+        absorb = np.asarray(absorb)
+        if absorb.ndim == 1:
+            absorb = absorb[:, None]
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.tol = tol
+        self.max_iter = max_iter
+        self.n_iter_ = 0
+        self.converged_ = True
+
+        self.codes_ = []
+        self.group_weights_ = []
+        for col in range(absorb.shape[1]):
+            _, codes = np.unique(absorb[:, col], return_inverse=True)
+            codes = codes.ravel()
+            group_weights = np.bincount(codes, weights=self.weights)
+            self.codes_.append(codes)
+            self.group_weights_.append(group_weights)
+
+    def _sweep(self, col: np.ndarray) -> float:
+        """Project out every dimension once, in place; return the largest correction."""
+        max_change = 0.0
+        for codes, group_weights in zip(self.codes_, self.group_weights_):
+            values = col if self.weights is None else col * self.weights
+            sums = np.bincount(codes, weights=values, minlength=len(group_weights))
+            means = np.divide(sums, group_weights, out=np.zeros_like(sums),
+                              where=group_weights > 0)
+            col -= means[codes]
+            max_change = max(max_change, np.abs(means).max(initial=0.0))
+        return max_change
+
+    def demean(self, arr: np.ndarray) -> np.ndarray:
+        """
+        Return the within-transformed copy of ``arr``.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+            Array of shape (n_obs,) or (n_obs, n_cols)
+
+        Returns
+        -------
+        np.ndarray
+            Float64 array of the same shape with all fixed effects removed
+        """
+        arr = np.asarray(arr, dtype=np.float64)
+        out = np.array(arr.reshape(len(arr), -1), order='F')
+        if not self.codes_:
+            return out.reshape(arr.shape)
+
+        n_iter = 0
+        converged = True
+        for j in range(out.shape[1]):
+            col = out[:, j]
+            threshold = self.tol * max(np.abs(col).max(initial=0.0), 1.0)
+            for it in range(1, self.max_iter + 1):
+                max_change = self._sweep(col)
+                if len(self.codes_) == 1 or max_change <= threshold:
+                    break
+            else:
+                converged = False
+            n_iter = max(n_iter, it)
+        self.n_iter_ = n_iter
+        self.converged_ = converged
+        if not converged:
+            warnings.warn(f"Fixed-effect demeaning did not converge in {self.max_iter} sweeps "
+                          f"(tol={self.tol}); estimates may be biased. Raise max_iter or check "
+                          f"the connectedness of the fixed effects.", FixedEffectConvergenceWarning)
+        return out.reshape(arr.shape)
+
+
 # ============================================================================
 # Wild Cluster Bootstrap Implementation
 # ============================================================================
@@ -40,6 +160,13 @@ os.environ.setdefault("MPLCONFIGDIR", os.path.join(OUTPUT_DIR, "mpl_cache"))
 # for Inference with Clustered Errors"
 # ============================================================================
 
+# Relative tolerance when comparing bootstrap and original t-statistics
+TIE_RTOL = 1e-10
+
+# Number of weight vectors drawn and evaluated per vectorized block
+WEIGHT_BLOCK_SIZE = 1024
+
+
 @dataclass
 class BootstrapConfig:
     """Configuration for Wild Cluster Bootstrap inference."""
@@ -48,11 +175,18 @@ class BootstrapConfig:
     confidence_level: float = 0.95
     seed: Optional[int] = 42
     small_cluster_correction: bool = True  # Use correction for small G
+    impose_null: bool = False  # WCR: generate y* from the restricted model
+    full_enumeration: bool = True  # Rademacher: use all 2^G signs if 2^G <= B
+    joint: bool = False  # One fit over all horizons, sup-t uniform bands
+    n_jobs: int = 1  # Worker processes for per-horizon bootstrap (-1: all cores)
+    legacy_rng: bool = False  # Weight draws of RandomState-based releases (no enumeration or tie tolerance)
 
     def __post_init__(self):
         valid_dists = ["rademacher", "mammen", "webb_6pt"]
         if self.distribution not in valid_dists:
             raise ValueError(f"distribution must be one of {valid_dists}")
+        if self.n_jobs == 0:
+            raise ValueError("n_jobs must be a positive integer or -1")
 
 
 class WildClusterBootstrap:
@@ -67,6 +201,28 @@ class WildClusterBootstrap:
     ----------
     config : BootstrapConfig
         Configuration object specifying bootstrap parameters
+    seed_sequence : Optional[np.random.SeedSequence]
+        If given, weight block c is drawn from its own child stream
+        (spawn key ``seed_sequence.spawn_key + (c,)``) instead of one
+        sequential stream, so any subset of blocks can be evaluated
+        independently with identical results.
+
+    Notes
+    -----
+    Weights are drawn from ``np.random.default_rng(seed)`` as compact
+    int8 codes, WEIGHT_BLOCK_SIZE x G at a time, and expanded to the
+    support of the distribution only for the block being evaluated.
+    ``BootstrapConfig(legacy_rng=True)`` (yaml: ``bootstrap.legacy_rng:
+    true``) draws the same weights as earlier releases, which used
+    ``np.random.RandomState(seed).choice`` one replication after another,
+    and turns off what those releases lacked: Rademacher full enumeration,
+    the ``TIE_RTOL`` tie tolerance and centred t-statistics.
+    ``run_wild_bootstrap_inference`` then shares one stream across
+    horizons in order, as they did. Fits without absorbed fixed effects
+    reproduce those releases; absorbed fits do not, because the estimate
+    and standard errors now come from the exact within transformation
+    (``FixedEffectDemeaner``) rather than the single demeaning sweep and
+    undemeaned sandwich of those releases.
 
     References
     ----------
@@ -80,28 +236,28 @@ class WildClusterBootstrap:
     Economics Working Paper Series 2008-21, UC Davis.
     """
 
-    def __init__(self, config: Optional[BootstrapConfig] = None):
+    def __init__(self, config: Optional[BootstrapConfig] = None,
+                 seed_sequence: Optional[np.random.SeedSequence] = None):
         self.config = config or BootstrapConfig()
-        self.rng = np.random.RandomState(self.config.seed)
+        self.seed_sequence = seed_sequence
+        if self.config.legacy_rng:
+            self.rng = np.random.RandomState(self.config.seed)
+        else:
+            self.rng = np.random.default_rng(self.config.seed)
         self.results_ = None
 
-    def _generate_weights(self, n_clusters: int) -> np.ndarray:
+    def _weight_support(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
         """
-        Generate wild bootstrap weights.
-
-        Parameters
-        ----------
-        n_clusters : int
-            Number of clusters
+        Support points and probabilities of the weight distribution.
 
         Returns
         -------
-        np.ndarray
-            Array of shape (n_clusters,) with bootstrap weights
+        Tuple[np.ndarray, Optional[np.ndarray]]
+            Values and their probabilities (None for equal probabilities)
         """
         if self.config.distribution == "rademacher":
             # Rademacher: {-1, 1} with equal probability
-            return self.rng.choice([-1.0, 1.0], size=n_clusters)
+            return np.array([-1.0, 1.0]), None
 
         elif self.config.distribution == "mammen":
             # Mammen (1993) two-point distribution
@@ -111,7 +267,7 @@ class WildClusterBootstrap:
             w1 = (1 - sqrt5) / 2  # ≈ -0.618
             w2 = (1 + sqrt5) / 2  # ≈ 1.618
             p1 = (sqrt5 + 1) / (2 * sqrt5)  # ≈ 0.724
-            return self.rng.choice([w1, w2], size=n_clusters, p=[p1, 1-p1])
+            return np.array([w1, w2]), np.array([p1, 1 - p1])
 
         elif self.config.distribution == "webb_6pt":
             # Webb (2013) six-point distribution
@@ -119,13 +275,139 @@ class WildClusterBootstrap:
             # Weights: ±√(3/2), ±√(1/2) with specific probabilities
             sqrt32 = np.sqrt(3/2)
             sqrt12 = np.sqrt(1/2)
-            values = [-sqrt32, -sqrt12, sqrt12, sqrt32]
-            probs = [1/6, 1/3, 1/3, 1/6]
-            return self.rng.choice(values, size=n_clusters, p=probs)
+            values = np.array([-sqrt32, -sqrt12, sqrt12, sqrt32])
+            return values, np.array([1/6, 1/3, 1/3, 1/6])
 
         else:
             raise ValueError(f"Unknown distribution: {self.config.distribution}")
 
+    def _generate_weights(self, n_clusters: int,
+                          n_draws: Optional[int] = None,
+                          rng=None) -> np.ndarray:
+        """
+        Generate wild bootstrap weights.
+
+        A ``np.random.Generator`` draws int8 codes (from int8 integers for
+        equal probabilities, float32 uniforms otherwise) that index the
+        support; a legacy ``RandomState`` draws with ``choice`` exactly as
+        earlier releases did.
+
+        Parameters
+        ----------
+        n_clusters : int
+            Number of clusters
+        n_draws : Optional[int]
+            Number of replications to draw at once. If None, a single
+            vector of cluster weights is returned.
+        rng : optional
+            Random source to draw from (default: ``self.rng``)
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_clusters,) or (n_draws, n_clusters) with
+            bootstrap weights. For a RandomState, row b of a batched draw
+            equals the b-th single draw from the same seed.
+        """
+        size = n_clusters if n_draws is None else (n_draws, n_clusters)
+        rng = self.rng if rng is None else rng
+        values, probs = self._weight_support()
+
+        if isinstance(rng, np.random.RandomState):
+            if probs is None:
+                return rng.choice(list(values), size=size)
+            return rng.choice(list(values), size=size, p=list(probs))
+
+        if probs is None:
+            codes = rng.integers(0, len(values), size=size, dtype=np.int8)
+        else:
+            edges = np.cumsum(probs)[:-1].astype(np.float32)
+            uniforms = rng.random(size, dtype=np.float32)
+            codes = np.searchsorted(edges, uniforms, side='right').astype(np.int8)
+        return values[codes]
+
+    def _t_center(self, estimate: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Value subtracted from beta* in the bootstrap t-statistics.
+
+        The bootstrap DGP has beta = estimate, so t* = (beta* - estimate) / se*
+        mimics the distribution of (estimate - beta) / se; ``legacy_rng``
+        keeps the uncentred beta* / se* of earlier releases.
+        """
+        return 0.0 if self.config.legacy_rng else estimate
+
+    def _tie_rtol(self) -> float:
+        """Tolerance for ties with the original t-statistic (none under ``legacy_rng``)."""
+        return 0.0 if self.config.legacy_rng else TIE_RTOL
+
+    def _use_enumeration(self, n_clusters: int) -> bool:
+        """Whether all 2^G Rademacher sign vectors fit in the replication budget."""
+        return (self.config.full_enumeration
+                and not self.config.legacy_rng
+                and self.config.distribution == "rademacher"
+                and 2 ** n_clusters <= self.config.n_bootstrap)
+
+    def _decode_signs(self, codes: np.ndarray, n_clusters: int) -> np.ndarray:
+        """
+        Unpack bit-packed sign vectors.
+
+        Bit g of each integer code is the sign of cluster g (0 -> +1,
+        1 -> -1), so codes 0..2^G-1 cover every Rademacher draw once.
+        """
+        bits = (codes[:, None] >> np.arange(n_clusters, dtype=np.int64)) & 1
+        return 1.0 - 2.0 * bits
+
+    def _n_blocks(self, n_clusters: int) -> int:
+        """Number of WEIGHT_BLOCK_SIZE blocks covering all bootstrap draws."""
+        if self._use_enumeration(n_clusters):
+            n_draws = 2 ** n_clusters
+        else:
+            n_draws = self.config.n_bootstrap
+        return -(-n_draws // WEIGHT_BLOCK_SIZE)
+
+    def _block_rng(self, block: int) -> np.random.Generator:
+        """Independent random stream for weight block ``block``."""
+        child = np.random.SeedSequence(self.seed_sequence.entropy,
+                                       spawn_key=self.seed_sequence.spawn_key + (block,))
+        return np.random.Generator(np.random.PCG64(child))
+
+    def _weight_blocks(self, n_clusters: int,
+                       blocks: Optional[range] = None) -> Iterator[np.ndarray]:
+        """
+        Yield bootstrap weights in blocks of at most WEIGHT_BLOCK_SIZE rows.
+
+        Enumerates all sign vectors when ``_use_enumeration`` holds. Otherwise
+        each block comes from its own ``seed_sequence`` child stream, or,
+        without a seed sequence, ``n_bootstrap`` rows are drawn from the
+        RNG in sequence.
+
+        Parameters
+        ----------
+        n_clusters : int
+            Number of clusters
+        blocks : Optional[range]
+            Block indices to yield (default: all). A subset requires
+            enumeration or a ``seed_sequence``.
+        """
+        enumerate_signs = self._use_enumeration(n_clusters)
+        n_draws = 2 ** n_clusters if enumerate_signs else self.config.n_bootstrap
+        if blocks is None:
+            blocks = range(self._n_blocks(n_clusters))
+        elif not enumerate_signs and self.seed_sequence is None:
+            raise ValueError("Drawing a subset of weight blocks requires a seed_sequence")
+
+        for block in blocks:
+            start = block * WEIGHT_BLOCK_SIZE
+            stop = min(start + WEIGHT_BLOCK_SIZE, n_draws)
+            if enumerate_signs:
+                yield self._decode_signs(np.arange(start, stop, dtype=np.int64),
+                                         n_clusters)
+            elif self.seed_sequence is not None:
+                yield self._generate_weights(n_clusters, stop - start,
+                                             rng=self._block_rng(block))
+            else:
+                yield self._generate_weights(n_clusters, stop - start)
+
     def _get_cluster_indices(self, cluster_col: np.ndarray) -> Dict:
         """
         Get indices for each cluster.
@@ -173,12 +455,176 @@ class WildClusterBootstrap:
         WildClusterBootstrap
             Fitted bootstrap object
         """
-        n_obs = len(y)
+        cluster_dict, se_orig = self._prepare(y, X, cluster_col, absorb,
+                                              weights, param_idx)
+        beta_orig = self.beta_orig_
+        n_clusters = self.n_clusters_
+        self.t_orig_ = beta_orig[param_idx] / se_orig[param_idx]
+
+        if self.config.impose_null:
+            # WCR: p-value at H0: beta = 0, CI by test inversion
+            t_stats_boot = self._restricted_bootstrap(cluster_dict, weights,
+                                                      se_orig[param_idx])
+            self.t_stats_boot_ = t_stats_boot
+            self.p_value_ = self._restricted_p_value(0.0)
+            self.ci_lower_, self.ci_upper_ = self._restricted_ci()
+        else:
+            # Perform bootstrap
+            t_stats_boot = self._bootstrap_loop(cluster_dict, weights)
+            self.t_stats_boot_ = t_stats_boot
+            self.p_value_, self.ci_lower_, self.ci_upper_ = self._percentile_t(
+                t_stats_boot, beta_orig[param_idx], se_orig[param_idx])
+
+        # Store results
+        self.results_ = {
+            'estimate': beta_orig[param_idx],
+            'std_error': se_orig[param_idx],
+            't_stat': self.t_orig_,
+            'p_value': self.p_value_,
+            'ci_lower': self.ci_lower_,
+            'ci_upper': self.ci_upper_,
+            'n_clusters': n_clusters,
+            'n_bootstrap': self.n_draws_,
+            'enumerated': self.enumerated_,
+            'distribution': self.config.distribution,
+            'impose_null': self.config.impose_null
+        }
+
+        return self
+
+    def _percentile_t(self, t_stats_boot: np.ndarray, estimate: float,
+                      std_error: float) -> Tuple[float, float, float]:
+        """
+        Two-tailed p-value and percentile-t interval from bootstrap t-statistics.
+
+        Draws that tie with the original t-statistic (under ``legacy_rng``,
+        e.g. all Rademacher signs equal) are compared with a relative
+        tolerance so they count regardless of rounding.
+
+        Returns
+        -------
+        Tuple[float, float, float]
+            p-value, CI lower bound, CI upper bound
+        """
+        t_orig = estimate / std_error
+        p_value = np.mean(np.abs(t_stats_boot) >= np.abs(t_orig) * (1 - self._tie_rtol()))
+
+        alpha = 1 - self.config.confidence_level
+        t_lower = np.percentile(t_stats_boot, 100 * alpha / 2)
+        t_upper = np.percentile(t_stats_boot, 100 * (1 - alpha / 2))
+        return p_value, estimate - t_upper * std_error, estimate - t_lower * std_error
+
+    def fit_joint(self,
+                  y: np.ndarray,
+                  X: np.ndarray,
+                  cluster_col: np.ndarray,
+                  absorb: Optional[np.ndarray] = None,
+                  weights: Optional[np.ndarray] = None,
+                  param_idx: Optional[List[int]] = None) -> 'WildClusterBootstrap':
+        """
+        Bootstrap several coefficients jointly with shared weight draws.
+
+        Every tested coefficient is evaluated on the same draws, so besides
+        pointwise p-values and percentile-t intervals the fit yields sup-t
+        uniform confidence bands: the (1 - alpha) quantile of
+        max_m |t*_m| over draws scales all standard errors at once.
+        Bootstrap t-statistics are centred as in ``fit`` (see
+        ``_t_center``), so each pointwise result equals ``fit`` on that
+        coefficient.
+
+        Parameters
+        ----------
+        y, X, cluster_col, absorb, weights
+            As in ``fit``
+        param_idx : Optional[List[int]]
+            Indices of parameters to test (default: all)
+
+        Returns
+        -------
+        WildClusterBootstrap
+            Fitted bootstrap object with array-valued ``results_``
+        """
+        if param_idx is None:
+            param_idx = list(range(X.shape[1]))
+        param_idx = np.asarray(param_idx, dtype=int)
+
+        cluster_dict, se_orig = self._prepare(y, X, cluster_col, absorb,
+                                              weights, param_idx)
+        beta_orig = self.beta_orig_
+        estimate = beta_orig[param_idx]
+        std_error = se_orig[param_idx]
+
+        X_design = self.X_design_
+        Z = self._estimation_design(weights)
+        stats = self._cluster_statistics(cluster_dict, X_design, Z,
+                                         self.resid_orig_, weights)
+        bread_est = np.linalg.pinv(Z.T @ X_design)
+        bread_se = np.linalg.pinv(stats['XWX'])
+
+        t_stats_boot = np.vstack([
+            self._batched_t_stats(block, stats, bread_est, bread_se,
+                                  beta_orig, beta_null=self._t_center(estimate))
+            for block in self._weight_blocks(self.n_clusters_)
+        ])
+        self.t_stats_boot_ = t_stats_boot
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.t_orig_ = estimate / std_error
+        self.p_value_ = np.mean(
+            np.abs(t_stats_boot) >= np.abs(self.t_orig_) * (1 - self._tie_rtol()), axis=0)
+
+        alpha = 1 - self.config.confidence_level
+        t_lower = np.nanpercentile(t_stats_boot, 100 * alpha / 2, axis=0)
+        t_upper = np.nanpercentile(t_stats_boot, 100 * (1 - alpha / 2), axis=0)
+        self.ci_lower_ = estimate - t_upper * std_error
+        self.ci_upper_ = estimate - t_lower * std_error
+
+        # Sup-t band over the tested coefficients with finite t-statistics
+        finite = np.isfinite(t_stats_boot).all(axis=0)
+        sup_t = np.abs(t_stats_boot[:, finite]).max(axis=1)
+        self.sup_t_critical_ = np.percentile(sup_t, 100 * (1 - alpha))
+        self.band_lower_ = estimate - self.sup_t_critical_ * std_error
+        self.band_upper_ = estimate + self.sup_t_critical_ * std_error
+
+        self.results_ = {
+            'estimate': estimate,
+            'std_error': std_error,
+            't_stat': self.t_orig_,
+            'p_value': self.p_value_,
+            'ci_lower': self.ci_lower_,
+            'ci_upper': self.ci_upper_,
+            'band_lower': self.band_lower_,
+            'band_upper': self.band_upper_,
+            'sup_t_critical': self.sup_t_critical_,
+            'n_clusters': self.n_clusters_,
+            'n_bootstrap': self.n_draws_,
+            'enumerated': self.enumerated_,
+            'distribution': self.config.distribution,
+            'impose_null': False
+        }
+
+        return self
+
+    def _prepare(self, y: np.ndarray, X: np.ndarray, cluster_col: np.ndarray,
+                 absorb: Optional[np.ndarray], weights: Optional[np.ndarray],
+                 param_idx: Union[int, np.ndarray]) -> Tuple[Dict, np.ndarray]:
+        """
+        Store the data, fit the original model and its clustered SEs.
+
+        Returns
+        -------
+        Tuple[Dict, np.ndarray]
+            Cluster index dictionary and original standard errors
+        """
         cluster_dict = self._get_cluster_indices(cluster_col)
         n_clusters = len(cluster_dict)
 
+        self.enumerated_ = self._use_enumeration(n_clusters)
+        self.n_draws_ = 2 ** n_clusters if self.enumerated_ else self.config.n_bootstrap
+
         print(f"Wild Cluster Bootstrap: G={n_clusters} clusters, "
-              f"B={self.config.n_bootstrap} replications")
+              f"B={self.n_draws_} replications"
+              f"{' (all sign vectors)' if self.enumerated_ else ''}")
         print(f"Distribution: {self.config.distribution}")
 
         # Store original data
@@ -190,101 +636,42 @@ class WildClusterBootstrap:
         self.param_idx_ = param_idx
         self.n_clusters_ = n_clusters
 
-        # Estimate original model
+        # Estimate original model. Absorbed fixed effects are removed once
+        # here; because y* = X beta + w * u is linear, every bootstrap draw
+        # is then a linear combination of the cached within-transformed
+        # design, fitted values and residuals and is never demeaned again.
         if absorb is not None:
-            beta_orig, resid_orig = self._estimate_with_absorb(y, X, absorb, weights)
+            demeaner = FixedEffectDemeaner(absorb, weights)
+            y_design = demeaner.demean(y)
+            X_design = demeaner.demean(X)
         else:
-            beta_orig, resid_orig = self._estimate_ols(y, X, weights)
+            y_design, X_design = y, X
+        beta_orig, resid_orig = self._estimate_ols(y_design, X_design, weights)
 
+        self.y_design_ = y_design
+        self.X_design_ = X_design
         self.beta_orig_ = beta_orig
+        self.fitted_ = X_design @ beta_orig
         self.resid_orig_ = resid_orig
 
         # Calculate original t-statistic
         # Use clustered variance for original SE
-        se_orig = self._clustered_se(resid_orig, X, cluster_col, weights)
-        self.t_orig_ = beta_orig[param_idx] / se_orig[param_idx]
-
-        # Perform bootstrap
-        t_stats_boot = self._bootstrap_loop(cluster_dict, absorb, weights)
-        self.t_stats_boot_ = t_stats_boot
+        se_orig = self._clustered_se(resid_orig, X_design, cluster_col, weights)
 
-        # Calculate p-value (two-tailed)
-        self.p_value_ = np.mean(np.abs(t_stats_boot) >= np.abs(self.t_orig_))
-
-        # Calculate confidence interval using percentile-t method
-        alpha = 1 - self.config.confidence_level
-        t_lower = np.percentile(t_stats_boot, 100 * alpha / 2)
-        t_upper = np.percentile(t_stats_boot, 100 * (1 - alpha / 2))
-
-        self.ci_lower_ = beta_orig[param_idx] - t_upper * se_orig[param_idx]
-        self.ci_upper_ = beta_orig[param_idx] - t_lower * se_orig[param_idx]
-
-        # Store results
-        self.results_ = {
-            'estimate': beta_orig[param_idx],
-            'std_error': se_orig[param_idx],
-            't_stat': self.t_orig_,
-            'p_value': self.p_value_,
-            'ci_lower': self.ci_lower_,
-            'ci_upper': self.ci_upper_,
-            'n_clusters': n_clusters,
-            'n_bootstrap': self.config.n_bootstrap,
-            'distribution': self.config.distribution
-        }
-
-        return self
+        return cluster_dict, se_orig
 
     def _estimate_ols(self, y: np.ndarray, X: np.ndarray,
                       weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """Estimate OLS coefficients and residuals."""
         if weights is not None:
-            W = np.diag(weights)
-            beta = np.linalg.lstsq(X.T @ W @ X, X.T @ W @ y, rcond=None)[0]
+            # WLS as OLS on sqrt-weight scaled rows; avoids an N x N diag(W)
+            sqrt_w = np.sqrt(weights)
+            beta = np.linalg.lstsq(X * sqrt_w[:, None], y * sqrt_w, rcond=None)[0]
         else:
             beta = np.linalg.lstsq(X, y, rcond=None)[0]
         resid = y - X @ beta
         return beta, resid
 
-    def _estimate_with_absorb(self, y: np.ndarray, X: np.ndarray,
-                              absorb: np.ndarray,
-                              weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
-        """
-        Estimate model with absorbed fixed effects.
-        Uses within-transformation (demeaning by absorbed groups).
-        """
-        # For simplicity, use mean absorption per group
-        # In practice, you might want to use more sophisticated methods
-        absorb_df = pd.DataFrame(absorb)
-
-        if weights is not None:
-            # Weighted demeaning
-            y_demean = y.copy()
-            X_demean = X.copy()
-            for col in absorb_df.columns:
-                groups = absorb_df[col].values
-                for g in np.unique(groups):
-                    mask = groups == g
-                    if mask.sum() > 0:
-                        w = weights[mask]
-                        y_demean[mask] -= np.average(y[mask], weights=w)
-                        for j in range(X.shape[1]):
-                            X_demean[mask, j] -= np.average(X[mask, j], weights=w)
-        else:
-            # Simple demeaning
-            y_demean = y.copy()
-            X_demean = X.copy()
-            for col in absorb_df.columns:
-                groups = absorb_df[col].values
-                for g in np.unique(groups):
-                    mask = groups == g
-                    if mask.sum() > 0:
-                        y_demean[mask] -= y[mask].mean()
-                        X_demean[mask] -= X[mask].mean(axis=0)
-
-        beta = np.linalg.lstsq(X_demean, y_demean, rcond=None)[0]
-        resid = y - X @ beta  # Residuals from original y
-        return beta, resid
-
     def _clustered_se(self, resid: np.ndarray, X: np.ndarray,
                       cluster_col: np.ndarray,
                       weights: Optional[np.ndarray] = None) -> np.ndarray:
@@ -293,24 +680,20 @@ class WildClusterBootstrap:
         cluster_dict = self._get_cluster_indices(cluster_col)
         n_clusters = len(cluster_dict)
 
-        # Bread: (X'X)^(-1)
-        if weights is not None:
-            XWX = X.T @ np.diag(weights) @ X
-        else:
-            XWX = X.T @ X
-
-        XWX_inv = np.linalg.inv(XWX)
-
-        # Meat: sum over clusters of X_g' u_g u_g' X_g
+        # Bread (X'WX) and meat (sum_g s_g s_g', s_g = X_g' W_g u_g),
+        # accumulated cluster by cluster so memory stays O(N_g * k)
+        XWX = np.zeros((n_params, n_params))
         meat = np.zeros((n_params, n_params))
-        for c, idx in cluster_dict.items():
+        for idx in cluster_dict.values():
             X_g = X[idx]
-            u_g = resid[idx]
-            if weights is not None:
-                W_g = np.diag(weights[idx])
-                meat += X_g.T @ W_g @ np.outer(u_g, u_g) @ W_g @ X_g
-            else:
-                meat += X_g.T @ np.outer(u_g, u_g) @ X_g
+            WX_g = X_g * weights[idx, None] if weights is not None else X_g
+            s_g = WX_g.T @ resid[idx]
+            XWX += WX_g.T @ X_g
+            meat += np.outer(s_g, s_g)
+
+        # Columns fully absorbed by the fixed effects (e.g. a constant)
+        # are zero after demeaning; the pseudo-inverse leaves them at zero
+        XWX_inv = np.linalg.pinv(XWX)
 
         # Small sample correction
         if self.config.small_cluster_correction:
@@ -321,11 +704,104 @@ class WildClusterBootstrap:
         se = np.sqrt(np.diag(vcov))
         return se
 
+    def _cluster_statistics(self, cluster_dict: Dict, X: np.ndarray,
+                            Z: np.ndarray, resid: np.ndarray,
+                            weights: Optional[np.ndarray] = None) -> Dict:
+        """
+        Per-cluster sufficient statistics for the batched bootstrap.
+
+        Returns
+        -------
+        Dict
+            'score' (G, k): Z_g' u_g, drives the bootstrap coefficients
+            'score_se' (G, k): X_g' W_g u_g, drives the sandwich meat
+            'hessian' (G, k, k): X_g' W_g X_g
+            'XWX' (k, k): sum of the cluster hessians
+        """
+        n_clusters = len(cluster_dict)
+        n_params = X.shape[1]
+        score = np.zeros((n_clusters, n_params))
+        score_se = np.zeros((n_clusters, n_params))
+        hessian = np.zeros((n_clusters, n_params, n_params))
+
+        for i, idx in enumerate(cluster_dict.values()):
+            X_g = X[idx]
+            u_g = resid[idx]
+            WX_g = X_g * weights[idx, None] if weights is not None else X_g
+            score[i] = Z[idx].T @ u_g
+            score_se[i] = WX_g.T @ u_g
+            hessian[i] = WX_g.T @ X_g
+
+        return {
+            'score': score,
+            'score_se': score_se,
+            'hessian': hessian,
+            'XWX': hessian.sum(axis=0)
+        }
+
+    def _batched_t_stats(self, wild_weights: np.ndarray, stats: Dict,
+                         bread_est: np.ndarray, bread_se: np.ndarray,
+                         beta_center: np.ndarray,
+                         beta_null: Union[float, np.ndarray] = 0.0) -> np.ndarray:
+        """
+        Bootstrap t-statistics for a block of weight draws.
+
+        With y* = X beta + w_g u_g, the bootstrap estimate is
+        beta* = beta + bread_est * sum_g w_g Z_g'u_g and the bootstrap
+        cluster scores are w_g X_g'W_g u_g - H_g (beta* - beta), so every
+        replication is a handful of (B, G) x (G, k) products.
+
+        Parameters
+        ----------
+        wild_weights : np.ndarray
+            Weight draws of shape (n_draws, n_clusters)
+        stats : Dict
+            Output of ``_cluster_statistics``
+        bread_est : np.ndarray
+            (Z'X)^+, maps summed scores to coefficient shifts
+        bread_se : np.ndarray
+            (X'WX)^(-1), bread of the clustered sandwich
+        beta_center : np.ndarray
+            Coefficients around which the bootstrap outcome is generated
+        beta_null : Union[float, np.ndarray]
+            Value subtracted from the bootstrap coefficient in the t-statistic
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_draws,) with bootstrap t-statistics, or
+            (n_draws, n_tested) when ``param_idx_`` is an index array
+        """
+        n_clusters = wild_weights.shape[1]
+        j = self.param_idx_
+        a = np.atleast_2d(bread_se[j])
+
+        delta = (wild_weights @ stats['score']) @ bread_est.T
+        q = stats['score_se'] @ a.T
+        R = stats['hessian'] @ a.T
+        cluster_contrib = (wild_weights[:, :, None] * q
+                           - np.einsum('bk,gkm->bgm', delta, R))
+
+        var = (cluster_contrib ** 2).sum(axis=1)
+        if self.config.small_cluster_correction:
+            var *= n_clusters / (n_clusters - 1)
+
+        beta_star = beta_center[j] + delta[:, j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (beta_star - beta_null) / np.sqrt(var.reshape(beta_star.shape))
+
     def _bootstrap_loop(self, cluster_dict: Dict,
-                        absorb: Optional[np.ndarray],
-                        weights: Optional[np.ndarray]) -> np.ndarray:
+                        weights: Optional[np.ndarray],
+                        blocks: Optional[range] = None) -> np.ndarray:
         """
-        Main bootstrap loop.
+        Main bootstrap loop, evaluated in vectorized blocks.
+
+        Wild weights come from ``_weight_blocks`` (row b of the random
+        stream matches the b-th sequential draw, so the draws are unchanged
+        for a fixed seed) and the t-statistics are computed from
+        precomputed cluster statistics, centred at the estimate (see
+        ``_t_center``). ``blocks`` restricts the loop to a subset of
+        weight blocks (see ``_weight_blocks``).
 
         Returns
         -------
@@ -333,57 +809,142 @@ class WildClusterBootstrap:
             Array of bootstrap t-statistics
         """
         n_clusters = len(cluster_dict)
-        n_params = self.X_orig_.shape[1]
-        t_stats = np.zeros(self.config.n_bootstrap)
-
-        for b in range(self.config.n_bootstrap):
-            if (b + 1) % 1000 == 0:
-                print(f"  Bootstrap iteration {b + 1}/{self.config.n_bootstrap}")
-
-            # Generate wild weights
-            wild_weights = self._generate_weights(n_clusters)
-
-            # Create bootstrap sample
-            y_star = self.y_orig_.copy()
-            cluster_ids = list(cluster_dict.keys())
-
-            for i, c in enumerate(cluster_ids):
-                idx = cluster_dict[c]
-                # Wild bootstrap: y* = X*beta + w*resid
-                y_star[idx] = self.X_orig_[idx] @ self.beta_orig_ + \
-                              wild_weights[i] * self.resid_orig_[idx]
-
-            # Estimate on bootstrap sample
-            if absorb is not None:
-                beta_star, resid_star = self._estimate_with_absorb(
-                    y_star, self.X_orig_, absorb, weights)
-            else:
-                beta_star, resid_star = self._estimate_ols(
-                    y_star, self.X_orig_, weights)
+        X = self.X_design_
+        Z = self._estimation_design(weights)
+
+        stats = self._cluster_statistics(cluster_dict, X, Z,
+                                         self.resid_orig_, weights)
+        bread_est = np.linalg.pinv(Z.T @ X)
+        bread_se = np.linalg.pinv(stats['XWX'])
+
+        return np.concatenate([
+            self._batched_t_stats(block, stats, bread_est, bread_se, self.beta_orig_,
+                                  beta_null=self._t_center(self.beta_orig_[self.param_idx_]))
+            for block in self._weight_blocks(n_clusters, blocks)
+        ])
+
+    def _estimation_design(self, weights: Optional[np.ndarray]) -> np.ndarray:
+        """Design Z such that the fitted estimator is beta = (Z'X)^+ Z'y."""
+        if weights is not None:
+            return self.X_design_ * weights[:, None]
+        return self.X_design_
+
+    def _restricted_bootstrap(self, cluster_dict: Dict,
+                              weights: Optional[np.ndarray],
+                              se_orig: float) -> np.ndarray:
+        """
+        Set up the restricted (WCR) bootstrap and return t-statistics at H0: beta = 0.
 
-            # Calculate t-statistic
-            cluster_col_numeric = pd.Categorical(self.cluster_col_).codes
-            se_star = self._clustered_se(resid_star, self.X_orig_,
-                                          cluster_col_numeric, weights)
-            t_stats[b] = beta_star[self.param_idx_] / se_star[self.param_idx_]
+        Under H0: beta_j = b0 the restricted residuals are
+        u(b0) = u(0) - b0 * v, with v the part of x_j not explained by the
+        other regressors. The per-cluster statistics are therefore linear
+        in b0 and are computed once for u(0) and v; evaluating a p-value
+        for any b0 afterwards costs O(B*G*k) and never touches the N rows.
+        """
+        n_clusters = len(cluster_dict)
+        j = self.param_idx_
+        y, X = self.y_design_, self.X_design_
+        Z = self._estimation_design(weights)
+        keep = np.arange(X.shape[1]) != j
+
+        # Restricted fit and the b0-direction of the restricted residuals
+        proj = np.linalg.pinv(Z[:, keep].T @ X[:, keep]) @ Z[:, keep].T
+        beta_restricted = np.zeros(X.shape[1])
+        beta_restricted[keep] = proj @ y
+        beta_slope = np.zeros(X.shape[1])
+        beta_slope[keep] = -(proj @ X[:, j])
+        beta_slope[j] = 1.0
+        resid_restricted = y - X @ beta_restricted
+        resid_slope = X @ beta_slope
+
+        stats_0 = self._cluster_statistics(cluster_dict, X, Z, resid_restricted, weights)
+        stats_v = self._cluster_statistics(cluster_dict, X, Z, resid_slope, weights)
+
+        self.restricted_ = {
+            'stats_0': stats_0,
+            'stats_v': stats_v,
+            'beta_0': beta_restricted,
+            'beta_v': beta_slope,
+            'bread_est': np.linalg.pinv(Z.T @ X),
+            'bread_se': np.linalg.pinv(stats_0['XWX']),
+            'wild_weights': np.vstack(list(self._weight_blocks(n_clusters))),
+            'se_orig': se_orig
+        }
+        return self._restricted_t_stats(0.0)
+
+    def _restricted_t_stats(self, beta0: float) -> np.ndarray:
+        """Bootstrap t-statistics for H0: beta = beta0 from the cached WCR pieces."""
+        r = self.restricted_
+        stats = {
+            'score': r['stats_0']['score'] - beta0 * r['stats_v']['score'],
+            'score_se': r['stats_0']['score_se'] - beta0 * r['stats_v']['score_se'],
+            'hessian': r['stats_0']['hessian']
+        }
+        beta_center = r['beta_0'] + beta0 * r['beta_v']
+        return self._batched_t_stats(r['wild_weights'], stats, r['bread_est'],
+                                     r['bread_se'], beta_center, beta_null=beta0)
+
+    def _restricted_p_value(self, beta0: float) -> float:
+        """WCR bootstrap p-value for H0: beta = beta0."""
+        r = self.restricted_
+        t_orig = (self.beta_orig_[self.param_idx_] - beta0) / r['se_orig']
+        t_boot = self._restricted_t_stats(beta0)
+        return np.mean(np.abs(t_boot) >= np.abs(t_orig) * (1 - self._tie_rtol()))
+
+    def _restricted_ci(self, max_expand: int = 20,
+                       n_bisect: int = 50) -> Tuple[float, float]:
+        """
+        Confidence interval by inverting the WCR test.
 
-        return t_stats
+        Each bound is the b0 at which the bootstrap p-value crosses
+        1 - confidence_level, bracketed outwards from the estimate and
+        then located by bisection.
+        """
+        alpha = 1 - self.config.confidence_level
+        estimate = self.beta_orig_[self.param_idx_]
+        step = self.restricted_['se_orig']
+        if not np.isfinite(step) or step <= 0:
+            return np.nan, np.nan
+
+        bounds = []
+        for sign in (-1.0, 1.0):
+            inside = estimate
+            outside = estimate + sign * 2 * step
+            for _ in range(max_expand):
+                if self._restricted_p_value(outside) <= alpha:
+                    break
+                inside, outside = outside, outside + sign * 2 * step
+            else:
+                bounds.append(np.nan)
+                continue
+            for _ in range(n_bisect):
+                mid = 0.5 * (inside + outside)
+                if self._restricted_p_value(mid) > alpha:
+                    inside = mid
+                else:
+                    outside = mid
+            bounds.append(0.5 * (inside + outside))
+        return bounds[0], bounds[1]
 
     def summary(self) -> pd.DataFrame:
         """Return summary of bootstrap results."""
         if self.results_ is None:
             raise RuntimeError("Bootstrap not yet fitted. Call fit() first.")
 
-        return pd.DataFrame({
-            'Estimate': [self.results_['estimate']],
-            'Std. Error': [self.results_['std_error']],
-            't-stat': [self.results_['t_stat']],
-            'P-value (Bootstrap)': [self.results_['p_value']],
-            f"CI Lower ({self.config.confidence_level*100:.0f}%)": [self.results_['ci_lower']],
-            f"CI Upper ({self.config.confidence_level*100:.0f}%)": [self.results_['ci_upper']],
-            'Clusters': [self.results_['n_clusters']],
-            'Bootstrap Reps': [self.results_['n_bootstrap']]
+        summary = pd.DataFrame({
+            'Estimate': np.atleast_1d(self.results_['estimate']),
+            'Std. Error': np.atleast_1d(self.results_['std_error']),
+            't-stat': np.atleast_1d(self.results_['t_stat']),
+            'P-value (Bootstrap)': np.atleast_1d(self.results_['p_value']),
+            f"CI Lower ({self.config.confidence_level*100:.0f}%)": np.atleast_1d(self.results_['ci_lower']),
+            f"CI Upper ({self.config.confidence_level*100:.0f}%)": np.atleast_1d(self.results_['ci_upper']),
+            'Clusters': self.results_['n_clusters'],
+            'Bootstrap Reps': self.results_['n_bootstrap']
         })
+        if 'band_lower' in self.results_:
+            summary['Sup-t Band Lower'] = self.results_['band_lower']
+            summary['Sup-t Band Upper'] = self.results_['band_upper']
+        return summary
 
 
 def load_bootstrap_config_from_yaml(config: Dict = None) -> BootstrapConfig:
@@ -414,7 +975,12 @@ def load_bootstrap_config_from_yaml(config: Dict = None) -> BootstrapConfig:
         distribution=bootstrap_config.get("distribution", "rademacher"),
         confidence_level=bootstrap_config.get("confidence_level", 0.95),
         seed=bootstrap_config.get("seed", 42),
-        small_cluster_correction=bootstrap_config.get("small_cluster_correction", True)
+        small_cluster_correction=bootstrap_config.get("small_cluster_correction", True),
+        impose_null=bootstrap_config.get("impose_null", False),
+        full_enumeration=bootstrap_config.get("full_enumeration", True),
+        joint=bootstrap_config.get("joint", False),
+        n_jobs=bootstrap_config.get("n_jobs", 1),
+        legacy_rng=bootstrap_config.get("legacy_rng", False)
     )
 
 
@@ -453,8 +1019,9 @@ def run_main_analysis_with_bootstrap(df: pd.DataFrame,
 
     # Run main regression
     weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-    res_main, col_names = run_absorbing_regression(
+    res_main, col_names = cached_absorbing_regression(
         stacked_df,
+        sample="main",
         y_col="norm_log_hicp",
         treat_vars=["treat_shock"],
         half_window=half_window,
@@ -583,6 +1150,93 @@ def save_bootstrap_latex_table(df: pd.DataFrame,
     print(f"Saved bootstrap LaTeX table to {TABLES_DIR}/{filename}")
 
 
+def _horizon_arrays(df_t: pd.DataFrame,
+                    y_col: str,
+                    treat_var: str,
+                    absorb_cols: List[str],
+                    cluster_col: str,
+                    weights_col: Optional[str] = None) -> Optional[Tuple]:
+    """
+    Numeric inputs of the single-horizon bootstrap regression.
+
+    Returns
+    -------
+    Optional[Tuple]
+        (y, X, clusters, absorb, weights) with a constant added to X and
+        incomplete rows dropped, or None if fewer than 10 rows remain
+    """
+    if df_t.empty:
+        return None
+
+    # Prepare data
+    df_t = df_t.reset_index(drop=True)
+    df_t = df_t.replace([np.inf, -np.inf], np.nan)
+
+    y = df_t[y_col].to_numpy(dtype=np.float64)
+    X = df_t[[treat_var]].to_numpy(dtype=np.float64)
+    X = np.column_stack([np.ones(len(X)), X])  # Add constant
+
+    clusters = df_t[cluster_col].to_numpy()
+    clusters_numeric = pd.Categorical(clusters).codes
+
+    absorb = None
+    if absorb_cols:
+        absorb = df_t[absorb_cols].copy()
+        for col in absorb_cols:
+            absorb[col] = absorb[col].astype('category').cat.codes
+        absorb = absorb.to_numpy()
+
+    weights = None
+    if weights_col and weights_col in df_t.columns:
+        weights = df_t[weights_col].to_numpy()
+
+    # Drop NaNs
+    valid = ~np.isnan(y) & ~np.isnan(X[:, 1])
+    if absorb is not None:
+        valid = valid & ~np.isnan(absorb).any(axis=1)
+    if weights is not None:
+        valid = valid & ~np.isnan(weights)
+
+    if valid.sum() < 10:
+        return None
+
+    return (y[valid], X[valid], clusters_numeric[valid],
+            absorb[valid] if absorb is not None else None,
+            weights[valid] if weights is not None else None)
+
+
+def _bootstrap_horizon_task(task: Tuple,
+                            bootstrap: Optional['WildClusterBootstrap'] = None) -> Dict:
+    """
+    Process-pool worker: bootstrap one horizon, or a range of its weight blocks.
+
+    ``task`` is (rel_time, config, seed_sequence, arrays, blocks). With
+    ``blocks=None`` the full fit is run and its ``results_`` returned;
+    otherwise the original model is fitted and the bootstrap t-statistics
+    of the given blocks are returned for the caller to combine. Errors are
+    returned rather than raised so one horizon cannot abort the others.
+    A ``bootstrap`` instance passed in (legacy RNG) keeps its stream.
+    """
+    t, config, seed_sequence, (y, X, clusters, absorb, weights), blocks = task
+    print(f"\nBootstrap for t={t}")
+    try:
+        if bootstrap is None:
+            bootstrap = WildClusterBootstrap(config, seed_sequence=seed_sequence)
+        if blocks is None:
+            return bootstrap.fit(y, X, clusters, absorb, weights, param_idx=1).results_
+
+        cluster_dict, se_orig = bootstrap._prepare(y, X, clusters, absorb,
+                                                   weights, param_idx=1)
+        return {
+            'estimate': bootstrap.beta_orig_[1],
+            'std_error': se_orig[1],
+            't_stat': bootstrap.beta_orig_[1] / se_orig[1],
+            't_stats_boot': bootstrap._bootstrap_loop(cluster_dict, weights, blocks)
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
+
 def run_wild_bootstrap_inference(df: pd.DataFrame,
                                   y_col: str,
                                   treat_var: str,
@@ -597,8 +1251,9 @@ def run_wild_bootstrap_inference(df: pd.DataFrame,
 
     Parameters
     ----------
-    df : pd.DataFrame
-        Stacked event study dataset
+    df : pd.DataFrame or VirtualStack
+        Stacked event study dataset; a VirtualStack is materialized one
+        event time (or, with ``config.joint``, the needed columns) at a time
     y_col : str
         Name of dependent variable
     treat_var : str
@@ -619,107 +1274,107 @@ def run_wild_bootstrap_inference(df: pd.DataFrame,
     Returns
     -------
     pd.DataFrame
-        DataFrame with bootstrap results for each time period
+        DataFrame with bootstrap results for each time period. Horizons
+        (and, with more workers than horizons, their replication blocks)
+        run on ``config.n_jobs`` processes with per-horizon seed streams,
+        so results are identical for any worker count (``legacy_rng`` runs
+        serially on the shared stream of earlier releases). With
+        ``config.joint`` the full event-study design is fitted once and the
+        frame also carries sup-t band columns.
     """
     if config is None:
         config = BootstrapConfig()
 
-    bootstrap = WildClusterBootstrap(config)
+    if config.joint:
+        return _run_joint_wild_bootstrap(df, y_col, treat_var, half_window,
+                                         base_period, absorb_cols, cluster_col,
+                                         weights_col, config)
 
     times = [t for t in range(-half_window, half_window + 1) if t != base_period]
-    results = []
-
-    for t in times:
-        print(f"\nBootstrap for t={t}")
-
-        # Subset to current time period
-        df_t = df[df['rel_time'] == t].copy()
-        if df_t.empty:
-            results.append({
-                'rel_time': t,
-                'coef': np.nan,
-                'se': np.nan,
-                't_stat': np.nan,
-                'pval_bootstrap': np.nan,
-                'ci_lower': np.nan,
-                'ci_upper': np.nan
-            })
-            continue
-
-        # Prepare data
-        df_t = df_t.reset_index(drop=True)
-        df_t = df_t.replace([np.inf, -np.inf], np.nan)
-
-        y = df_t[y_col].to_numpy(dtype=np.float64)
-        X = df_t[[treat_var]].to_numpy(dtype=np.float64)
-        X = np.column_stack([np.ones(len(X)), X])  # Add constant
-
-        clusters = df_t[cluster_col].to_numpy()
-        clusters_numeric = pd.Categorical(clusters).codes
-
-        absorb = None
-        if absorb_cols:
-            absorb = df_t[absorb_cols].copy()
-            for col in absorb_cols:
-                absorb[col] = absorb[col].astype('category').cat.codes
-            absorb = absorb.to_numpy()
+    empty_row = {
+        'coef': np.nan,
+        'se': np.nan,
+        't_stat': np.nan,
+        'pval_bootstrap': np.nan,
+        'ci_lower': np.nan,
+        'ci_upper': np.nan
+    }
 
-        weights = None
-        if weights_col and weights_col in df_t.columns:
-            weights = df_t[weights_col].to_numpy()
+    # Horizon i draws from child stream i of the configured seed, and
+    # weight block c within it from grandchild c, independent of which
+    # worker evaluates it; results do not depend on n_jobs.
+    horizon_seeds = np.random.SeedSequence(config.seed).spawn(len(times))
+    n_jobs = config.n_jobs if config.n_jobs > 0 else (os.cpu_count() or 1)
 
-        # Drop NaNs
-        valid = ~np.isnan(y) & ~np.isnan(X[:, 1])
-        if absorb is not None:
-            valid = valid & ~np.isnan(absorb).any(axis=1)
-        if weights is not None:
-            valid = valid & ~np.isnan(weights)
+    arrays = {}
+    needed = [y_col, treat_var, 'rel_time', *absorb_cols, cluster_col, weights_col]
+    for t in times:
+        if isinstance(df, VirtualStack):
+            df_t = df.rel_time_frame(t, [c for c in needed if c and c in VirtualStack.COLUMNS + VirtualStack.EXTRA_COLUMNS])
+        else:
+            df_t = df[df['rel_time'] == t]
+        arrays[t] = _horizon_arrays(df_t, y_col, treat_var,
+                                    absorb_cols, cluster_col, weights_col)
+    active = [i for i, t in enumerate(times) if arrays[t] is not None]
+
+    # Split replication blocks of a horizon over workers only when there
+    # are more workers than horizons; WCR keeps each horizon in one task
+    # because test inversion needs all draws.
+    n_groups = max(1, -(-n_jobs // max(len(active), 1)))
+    tasks = []
+    for i in active:
+        t = times[i]
+        n_blocks = WildClusterBootstrap(config)._n_blocks(len(np.unique(arrays[t][2])))
+        if config.impose_null or config.legacy_rng:
+            groups = [None]
+        else:
+            groups = [range(int(b[0]), int(b[-1]) + 1)
+                      for b in np.array_split(np.arange(n_blocks), min(n_groups, n_blocks))]
+        tasks.extend((t, config, horizon_seeds[i], arrays[t], g) for g in groups)
+
+    if config.legacy_rng:
+        # Earlier releases drew all horizons from one sequential stream
+        legacy = WildClusterBootstrap(config)
+        outputs = [_bootstrap_horizon_task(task, legacy) for task in tasks]
+    elif n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+            outputs = list(pool.map(_bootstrap_horizon_task, tasks))
+    else:
+        outputs = [_bootstrap_horizon_task(task) for task in tasks]
 
-        y = y[valid]
-        X = X[valid]
-        clusters_numeric = clusters_numeric[valid]
-        if absorb is not None:
-            absorb = absorb[valid]
-        if weights is not None:
-            weights = weights[valid]
+    by_time = {}
+    for (t, *_), out in zip(tasks, outputs):
+        by_time.setdefault(t, []).append(out)
 
-        if len(y) < 10:
-            results.append({
-                'rel_time': t,
-                'coef': np.nan,
-                'se': np.nan,
-                't_stat': np.nan,
-                'pval_bootstrap': np.nan,
-                'ci_lower': np.nan,
-                'ci_upper': np.nan
-            })
+    finalizer = WildClusterBootstrap(config)
+    results = []
+    for t in times:
+        parts = by_time.get(t)
+        if parts is None:
+            results.append({'rel_time': t, **empty_row})
+            continue
+        errors = [p['error'] for p in parts if 'error' in p]
+        if errors:
+            print(f"  Error in bootstrap for t={t}: {errors[0]}")
+            results.append({'rel_time': t, **empty_row})
             continue
 
-        # Run bootstrap
-        try:
-            bootstrap.fit(y, X, clusters_numeric, absorb, weights, param_idx=1)
-            res = bootstrap.results_
-
-            results.append({
-                'rel_time': t,
-                'coef': res['estimate'],
-                'se': res['std_error'],
-                't_stat': res['t_stat'],
-                'pval_bootstrap': res['p_value'],
-                'ci_lower': res['ci_lower'],
-                'ci_upper': res['ci_upper']
-            })
-        except Exception as e:
-            print(f"  Error in bootstrap for t={t}: {e}")
-            results.append({
-                'rel_time': t,
-                'coef': np.nan,
-                'se': np.nan,
-                't_stat': np.nan,
-                'pval_bootstrap': np.nan,
-                'ci_lower': np.nan,
-                'ci_upper': np.nan
-            })
+        res = parts[0]
+        if 't_stats_boot' in res:
+            t_stats_boot = np.concatenate([p['t_stats_boot'] for p in parts])
+            p_value, ci_lower, ci_upper = finalizer._percentile_t(
+                t_stats_boot, res['estimate'], res['std_error'])
+            res = {**res, 'p_value': p_value, 'ci_lower': ci_lower, 'ci_upper': ci_upper}
+
+        results.append({
+            'rel_time': t,
+            'coef': res['estimate'],
+            'se': res['std_error'],
+            't_stat': res['t_stat'],
+            'pval_bootstrap': res['p_value'],
+            'ci_lower': res['ci_lower'],
+            'ci_upper': res['ci_upper']
+        })
 
     # Add base period
     results.append({
@@ -735,6 +1390,66 @@ def run_wild_bootstrap_inference(df: pd.DataFrame,
     return pd.DataFrame(results).sort_values('rel_time').reset_index(drop=True)
 
 
+def _run_joint_wild_bootstrap(df: pd.DataFrame,
+                              y_col: str,
+                              treat_var: str,
+                              half_window: int,
+                              base_period: int,
+                              absorb_cols: List[str],
+                              cluster_col: str,
+                              weights_col: Optional[str],
+                              config: BootstrapConfig) -> pd.DataFrame:
+    """
+    Bootstrap all event-time coefficients of the stacked design in one pass.
+
+    Fits the same specification as ``run_absorbing_regression`` and runs
+    ``WildClusterBootstrap.fit_joint`` over every rt_t x treat column, so
+    all horizons share the weight draws.
+    """
+    df = _stack_columns(df, [y_col, treat_var, 'rel_time', *absorb_cols, cluster_col, weights_col])
+    df = df.reset_index(drop=True).replace([np.inf, -np.inf], np.nan)
+    X, col_names = build_event_design_matrix_np(df, [treat_var], half_window, base_period)
+
+    cols_to_check = [y_col, cluster_col] + list(absorb_cols)
+    if weights_col and weights_col in df.columns:
+        cols_to_check.append(weights_col)
+    valid = df[cols_to_check].notna().all(axis=1).to_numpy()
+
+    y = df.loc[valid, y_col].to_numpy(dtype=np.float64)
+    X = X[valid].astype(np.float64)
+    clusters = pd.Categorical(df.loc[valid, cluster_col]).codes
+    absorb = None
+    if absorb_cols:
+        absorb = np.column_stack([
+            pd.Categorical(df.loc[valid, col]).codes for col in absorb_cols
+        ])
+    weights = None
+    if weights_col and weights_col in df.columns:
+        weights = df.loc[valid, weights_col].to_numpy(dtype=np.float64)
+
+    print(f"\nJoint bootstrap over {len(col_names)} event-time coefficients")
+    bootstrap = WildClusterBootstrap(config).fit_joint(y, X, clusters, absorb, weights)
+    res = bootstrap.results_
+
+    results = pd.DataFrame({
+        'rel_time': [int(name.split('_')[1]) for name in col_names],
+        'coef': res['estimate'],
+        'se': res['std_error'],
+        't_stat': res['t_stat'],
+        'pval_bootstrap': res['p_value'],
+        'ci_lower': res['ci_lower'],
+        'ci_upper': res['ci_upper'],
+        'band_lower': res['band_lower'],
+        'band_upper': res['band_upper']
+    })
+    base = pd.DataFrame([{
+        'rel_time': base_period, 'coef': 0, 'se': 0, 't_stat': 0,
+        'pval_bootstrap': 1.0, 'ci_lower': 0, 'ci_upper': 0,
+        'band_lower': 0, 'band_upper': 0
+    }])
+    return pd.concat([results, base], ignore_index=True).sort_values('rel_time').reset_index(drop=True)
+
+
 # Ensure output directories exist
 os.makedirs(FIGURES_DIR, exist_ok=True)
 os.makedirs(TABLES_DIR, exist_ok=True)
@@ -787,15 +1502,34 @@ def filter_clean_events(events, window_months=6):
     print(f"New clean events (window={window_months}): {len(filtered)}")
     return filtered
 
+def open_result_cache(input_paths):
+    """Point ``RESULT_CACHE`` at the configured cache directory for fits on ``input_paths``."""
+    global RESULT_CACHE
+    cache_dir = CONFIG.get("analysis", {}).get("result_cache")
+    if not cache_dir:
+        RESULT_CACHE = None
+        return None
+    config = {
+        "identification": CONFIG.get("identification", {}),
+        "analysis": {k: v for k, v in CONFIG.get("analysis", {}).items()
+                     if k not in ("bootstrap", "result_cache")},
+    }
+    # The estimators live in this module, so editing it invalidates the cache
+    RESULT_CACHE = ResultCache(cache_dir, input_paths, config, code_paths=[__file__])
+    return RESULT_CACHE
+
 def load_and_prep_data():
     print("Loading data...")
-    df = pd.read_parquet(os.path.join(PROCESSED_DIR, "panel_with_wedge.parquet"))
-    events = pd.read_parquet(os.path.join(PROCESSED_DIR, "events_list.parquet"))
+    panel_path = os.path.join(PROCESSED_DIR, "panel_with_wedge.parquet")
+    events_path = os.path.join(PROCESSED_DIR, "events_list.parquet")
+    df = pd.read_parquet(panel_path)
+    events = pd.read_parquet(events_path)
+    open_result_cache([panel_path, events_path])
 
     # Ensure time is datetime in both
-    df['time'] = pd.to_datetime(df['time'].map(normalize_time))
+    df['time'] = abs_month_to_timestamp(to_abs_month(df['time']))
     if 'time' in events.columns:
-        events['time'] = pd.to_datetime(events['time'].map(normalize_time))
+        events['time'] = abs_month_to_timestamp(to_abs_month(events['time']))
 
     threshold = CONFIG.get("identification", {}).get("event_threshold", 0.01)
     clean_events = events[events['delta_tw'].abs() > threshold].copy()
@@ -816,67 +1550,287 @@ def build_stacked_with_controls(df, events, half_window=12):
     df['geo_coicop'] = df['geo'].astype(str) + "_" + df['coicop'].astype(str)
     df['abs_month'] = df['time'].dt.year * 12 + df['time'].dt.month
 
-    datasets = []
-    event_list = events.to_dict('records')
-    coicop_groups = {c: g.copy() for c, g in df.groupby('coicop')}
+    # Format each calendar month once
+    months = df['abs_month'].to_numpy(dtype=np.int64)
+    _, first_row, month_codes = np.unique(months, return_index=True, return_inverse=True)
+    df['cal_time'] = df['time'].iloc[first_row].dt.strftime("%Y-%m").array.take(month_codes.ravel())
+
+    event_time = pd.to_datetime(events['time'])
+    event_abs = (event_time.dt.year * 12 + event_time.dt.month).to_numpy(dtype=np.int64)
+    coicop_codes, coicop_levels = pd.factorize(df['coicop'])
+    event_codes = coicop_levels.get_indexer(events['coicop'])
+    geo_codes, geo_levels = pd.factorize(df['geo'])
+    event_geo_codes = geo_levels.get_indexer(events['geo'])
+
+    # Panel rows sorted by (coicop, abs_month); each event window is then one
+    # contiguous slice located with searchsorted on a combined integer key
+    min_month, max_month = months.min(), months.max()
+    span = max_month - min_month + 1
+    keys = coicop_codes.astype(np.int64) * span + (months - min_month)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    lo_month = np.maximum(event_abs - half_window, min_month) - min_month
+    hi_month = np.minimum(event_abs + half_window, max_month) - min_month
+    valid = (event_codes >= 0) & (lo_month <= hi_month)
+    lo = np.searchsorted(sorted_keys, event_codes * span + lo_month, side='left')
+    hi = np.searchsorted(sorted_keys, event_codes * span + hi_month, side='right')
+    counts = np.where(valid, hi - lo, 0)
+
+    # Expand to (event, panel row) pairs, panel rows in original order per event
+    event_idx = np.repeat(np.arange(len(events)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    row_idx = order[np.repeat(lo, counts) + offsets]
+    pair_order = np.lexsort((row_idx, event_idx))
+    event_idx, row_idx = event_idx[pair_order], row_idx[pair_order]
+
+    # Base-period level of every (event, geo) by one keyed join; inner, so
+    # geos without a base observation drop out as before
+    pairs = pd.DataFrame({
+        '_row': row_idx,
+        'event_id': event_idx,
+        'coicop_code': coicop_codes[row_idx],
+        'geo_code': geo_codes[row_idx],
+        'base_month': event_abs[event_idx] + base_period,
+    })
+    base = pd.DataFrame({
+        'coicop_code': coicop_codes,
+        'geo_code': geo_codes,
+        'base_month': months,
+        'log_hicp_base': df['log_hicp'].to_numpy(),
+        'weight_base': df['weight'].to_numpy(),
+    })
+    pairs = pairs.merge(base, on=['coicop_code', 'geo_code', 'base_month'], how='inner')
+    if pairs.empty:
+        print("Warning: No datasets created. Check data matching.")
+        return pd.DataFrame()
 
-    for i, row in enumerate(event_list):
-        event_geo = row['geo']
-        coicop = row['coicop']
-        event_time = pd.to_datetime(row['time'])
-        shock_size = row['delta_tw']
-        event_type = row.get('event_type', 'unknown')
+    window = df.iloc[pairs['_row'].to_numpy()].reset_index(drop=True)
+    window['log_hicp_base'] = pairs['log_hicp_base'].to_numpy()
+    window['weight_base'] = pairs['weight_base'].to_numpy()
+    event_id = pairs['event_id'].to_numpy()
+
+    if window['weight_base'].isna().any():
+        event_mean_weight = window['weight'].groupby(event_id).transform('mean')
+        window['weight_base'] = window['weight_base'].fillna(event_mean_weight)
+
+    window['rel_time'] = (window['abs_month'].to_numpy() - event_abs[event_id]).astype(window['abs_month'].dtype)
+    window['norm_log_hicp'] = (window['log_hicp'] - window['log_hicp_base']) * 100
+    window['event_id'] = event_id
+    window['event_geo'] = events['geo'].array.take(event_id)
+    window['shock_size'] = events['delta_tw'].to_numpy(dtype=np.float64)[event_id] * 100
+    if 'event_type' in events.columns:
+        window['event_type'] = events['event_type'].array.take(event_id)
+    else:
+        window['event_type'] = 'unknown'
+    window['treated'] = (geo_codes[pairs['_row'].to_numpy()] == event_geo_codes[event_id]).astype(int)
+    window['treat_shock'] = window['shock_size'] * window['treated']
+    window['event_weight'] = window['weight_base']
+
+    # Keep only columns needed downstream to reduce memory
+    stacked_df = window[[
+        'geo', 'coicop', 'time', 'rel_time',
+        'norm_log_hicp', 'event_id', 'event_geo',
+        'shock_size', 'event_type', 'treated', 'treat_shock',
+        'geo_coicop', 'cal_time', 'event_weight'
+    ]]
+    print(f"Stacked dataset size: {len(stacked_df)} rows")
+    return stacked_df
 
-        df_subset = coicop_groups.get(coicop)
-        if df_subset.empty:
-            continue
+class VirtualStack:
+    """
+    Stacked event panel that is never materialized as a whole.
 
-        event_abs = event_time.year * 12 + event_time.month
-        window = df_subset[(df_subset['abs_month'] >= event_abs - half_window) & (df_subset['abs_month'] <= event_abs + half_window)].copy()
-        if window.empty:
-            continue
+    Every stacked observation is a (panel row, event) pair. The panel is
+    kept once, sorted by (coicop, abs_month), and each event stores only
+    its metadata and the [start, stop) range of its window in that order;
+    base-period rows are found by searchsorted on an integer
+    (coicop, geo, month) key. Columns of ``build_stacked_with_controls``
+    are produced on demand for all events, for chunks of events or for a
+    single event time, so memory scales with the panel plus whatever
+    columns a consumer asks for.
 
-        base_rows = df_subset[df_subset['abs_month'] == event_abs + base_period][['geo', 'log_hicp', 'weight']].copy()
-        if base_rows.empty:
-            continue
+    Base-period lookups assume (geo, coicop, month) identifies a panel
+    row, as in ``panel_with_wedge.parquet``; for such panels ``frame()``
+    equals ``build_stacked_with_controls`` row for row.
 
-        base_rows = base_rows.rename(columns={'log_hicp': 'log_hicp_base', 'weight': 'weight_base'})
-        window = window.merge(base_rows, on='geo', how='inner')
-        if window.empty:
-            continue
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Panel with geo, coicop, time, log_hicp and weight
+    events : pd.DataFrame
+        Events with geo, coicop, time, delta_tw and optional event_type
+    half_window : int
+        Event window in months
+    base_period : Optional[int]
+        Normalization period (default: identification.base_period)
+    """
 
-        if 'weight_base' in window.columns:
-            window['weight_base'] = window['weight_base'].fillna(window['weight'].mean())
-
-        window['rel_time'] = window['abs_month'] - event_abs
-        window['norm_log_hicp'] = (window['log_hicp'] - window['log_hicp_base']) * 100
-        window['event_id'] = i
-        window['event_geo'] = event_geo
-        window['shock_size'] = shock_size * 100
-        window['event_type'] = event_type
-        window['treated'] = (window['geo'] == event_geo).astype(int)
-        window['treat_shock'] = window['shock_size'] * window['treated']
-        window['geo_coicop'] = window['geo'] + "_" + window['coicop']
-        window['cal_time'] = window['time'].dt.strftime("%Y-%m")
-        window['event_weight'] = window['weight_base']
-
-        # Keep only columns needed downstream to reduce memory
-        window = window[[
-            'geo', 'coicop', 'time', 'rel_time',
-            'norm_log_hicp', 'event_id', 'event_geo',
-            'shock_size', 'event_type', 'treated', 'treat_shock',
-            'geo_coicop', 'cal_time', 'event_weight'
-        ]]
-
-        datasets.append(window)
-
-    if not datasets:
-        print("Warning: No datasets created. Check data matching.")
-        return pd.DataFrame()
+    COLUMNS = ['geo', 'coicop', 'time', 'rel_time',
+               'norm_log_hicp', 'event_id', 'event_geo',
+               'shock_size', 'event_type', 'treated', 'treat_shock',
+               'geo_coicop', 'cal_time', 'event_weight']
+    # Available on request, not part of the default frame
+    EXTRA_COLUMNS = ['year', 'geo_year']
 
-    stacked_df = pd.concat(datasets, ignore_index=True)
-    print(f"Stacked dataset size: {len(stacked_df)} rows")
-    return stacked_df
+    def __init__(self, df, events, half_window=12, base_period=None):
+        if base_period is None:
+            base_period = CONFIG.get("identification", {}).get("base_period", -1)
+        self.half_window = half_window
+        self.base_period = base_period
+
+        panel = df[['geo', 'coicop', 'time', 'log_hicp', 'weight']].copy()
+        panel['time'] = pd.to_datetime(panel['time'])
+        panel['geo_coicop'] = panel['geo'].astype(str) + "_" + panel['coicop'].astype(str)
+        panel['abs_month'] = panel['time'].dt.year * 12 + panel['time'].dt.month
+        months = panel['abs_month'].to_numpy(dtype=np.int64)
+        _, first_row, month_codes = np.unique(months, return_index=True, return_inverse=True)
+        panel['cal_time'] = panel['time'].iloc[first_row].dt.strftime("%Y-%m").array.take(month_codes.ravel())
+        self.panel = panel.reset_index(drop=True)
+
+        self._months = months
+        self._min_month = months.min() if len(months) else 0
+        self._span = (months.max() - self._min_month + 1) if len(months) else 1
+        self._coicop_codes, coicop_levels = pd.factorize(panel['coicop'])
+        self._geo_codes, geo_levels = pd.factorize(panel['geo'])
+        self._n_geo = max(len(geo_levels), 1)
+
+        # Window search: panel order by (coicop, month)
+        window_keys = self._coicop_codes.astype(np.int64) * self._span + (months - self._min_month)
+        self._order = np.argsort(window_keys, kind='stable')
+        self._window_keys = window_keys[self._order]
+
+        # Base lookup: panel order by (coicop, geo, month)
+        base_keys = ((self._coicop_codes.astype(np.int64) * self._n_geo + self._geo_codes)
+                     * self._span + (months - self._min_month))
+        self._base_order = np.argsort(base_keys, kind='stable')
+        self._base_keys = base_keys[self._base_order]
+
+        events = events.reset_index(drop=True)
+        event_time = pd.to_datetime(events['time'])
+        self.events = pd.DataFrame({
+            'event_id': np.arange(len(events)),
+            'event_geo': events['geo'].array,
+            'coicop': events['coicop'].array,
+            'event_abs': (event_time.dt.year * 12 + event_time.dt.month).to_numpy(dtype=np.int64),
+            'shock_size': events['delta_tw'].to_numpy(dtype=np.float64) * 100,
+            'event_type': (events['event_type'].array if 'event_type' in events.columns
+                           else 'unknown'),
+        })
+        self._event_abs = self.events['event_abs'].to_numpy()
+        self._event_codes = coicop_levels.get_indexer(events['coicop'])
+        self._event_geo_codes = geo_levels.get_indexer(events['geo'])
+        self._starts, self._stops = self._ranges(-half_window, half_window)
+        self._n_obs = None
+
+    def _ranges(self, first, last):
+        """[start, stop) per event of panel rows with first <= rel_time <= last."""
+        lo_month = np.maximum(self._event_abs + first, self._min_month) - self._min_month
+        hi_month = np.minimum(self._event_abs + last, self._min_month + self._span - 1) - self._min_month
+        valid = (self._event_codes >= 0) & (lo_month <= hi_month)
+        base = self._event_codes.astype(np.int64) * self._span
+        starts = np.searchsorted(self._window_keys, base + lo_month, side='left')
+        stops = np.searchsorted(self._window_keys, base + hi_month, side='right')
+        return starts, np.where(valid, stops, starts)
+
+    def _pairs(self, event_idx, starts, stops):
+        """
+        Stacked (event, panel row, base row) triples for the given events.
+
+        Events come in the given order and panel rows in panel order
+        within an event; pairs without a base-period row are dropped.
+        """
+        counts = stops[event_idx] - starts[event_idx]
+        pair_events = np.repeat(event_idx, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = self._order[np.repeat(starts[event_idx], counts) + offsets]
+        perm = np.lexsort((rows, np.repeat(np.arange(len(event_idx)), counts)))
+        pair_events, rows = pair_events[perm], rows[perm]
+
+        base_month = self._event_abs[pair_events] + self.base_period - self._min_month
+        keys = ((self._coicop_codes[rows].astype(np.int64) * self._n_geo + self._geo_codes[rows])
+                * self._span + base_month)
+        pos = np.minimum(np.searchsorted(self._base_keys, keys), len(self._base_keys) - 1)
+        found = ((base_month >= 0) & (base_month < self._span)
+                 & (self._base_keys[pos] == keys))
+        return pair_events[found], rows[found], self._base_order[pos[found]]
+
+    def _build(self, columns, pair_events, rows, base_rows):
+        panel = self.panel
+        log_hicp = panel['log_hicp'].to_numpy()
+        out = {}
+        for col in columns:
+            if col in ('geo', 'coicop', 'time', 'geo_coicop', 'cal_time'):
+                out[col] = panel[col].array.take(rows)
+            elif col == 'rel_time':
+                out[col] = (panel['abs_month'].to_numpy()[rows]
+                            - self._event_abs[pair_events]).astype(panel['abs_month'].dtype)
+            elif col == 'norm_log_hicp':
+                out[col] = (log_hicp[rows] - log_hicp[base_rows]) * 100
+            elif col == 'event_id':
+                out[col] = pair_events
+            elif col in ('event_geo', 'event_type', 'shock_size'):
+                out[col] = self.events[col].array.take(pair_events)
+            elif col in ('treated', 'treat_shock'):
+                treated = (self._geo_codes[rows] == self._event_geo_codes[pair_events]).astype(int)
+                out[col] = (treated if col == 'treated'
+                            else self.events['shock_size'].to_numpy()[pair_events] * treated)
+            elif col in self.EXTRA_COLUMNS:
+                if col not in panel.columns:
+                    panel['year'] = panel['time'].dt.year
+                    panel['geo_year'] = panel['geo'].astype(str) + "_" + panel['year'].astype(str)
+                out[col] = panel[col].array.take(rows)
+            elif col == 'event_weight':
+                event_weight = pd.Series(panel['weight'].array.take(base_rows))
+                missing = event_weight.isna().to_numpy()
+                if missing.any():
+                    event_weight[missing] = self._mean_window_weight(pair_events[missing])
+                out[col] = event_weight.to_numpy()
+            else:
+                raise KeyError(f"Unknown stacked column: {col}")
+        return pd.DataFrame(out, columns=list(columns))
+
+    def _mean_window_weight(self, pair_events):
+        """Mean panel weight over each event's full stacked window, per pair."""
+        need = np.unique(pair_events)
+        window_events, rows, _ = self._pairs(need, self._starts, self._stops)
+        means = pd.Series(self.panel['weight'].to_numpy()[rows]).groupby(window_events).mean()
+        return means.reindex(pair_events).to_numpy()
+
+    def __len__(self):
+        if self._n_obs is None:
+            self._n_obs = sum(len(self._pairs(idx, self._starts, self._stops)[0])
+                              for idx in self._event_chunks())
+        return self._n_obs
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def _event_chunks(self, chunk_rows=1_000_000):
+        """Consecutive event index blocks of about ``chunk_rows`` window rows."""
+        counts = self._stops - self._starts
+        bounds = np.searchsorted(np.cumsum(counts), np.arange(chunk_rows, counts.sum(), chunk_rows))
+        return [idx for idx in np.split(np.arange(len(counts)), np.unique(bounds + 1)) if len(idx)]
+
+    def frame(self, columns=None, events=None):
+        """
+        Materialize ``columns`` (default: all) for ``events`` (positions, default: all).
+        """
+        columns = self.COLUMNS if columns is None else list(dict.fromkeys(columns))
+        event_idx = np.arange(len(self.events)) if events is None else np.asarray(events)
+        return self._build(columns, *self._pairs(event_idx, self._starts, self._stops))
+
+    def iter_frames(self, columns=None, chunk_rows=1_000_000):
+        """Yield ``frame(columns)`` in event blocks of about ``chunk_rows`` rows."""
+        for event_idx in self._event_chunks(chunk_rows):
+            yield self.frame(columns, event_idx)
+
+    def rel_time_frame(self, rel_time, columns=None):
+        """Materialize ``columns`` for the stacked rows with the given rel_time only."""
+        columns = self.COLUMNS if columns is None else list(dict.fromkeys(columns))
+        starts, stops = self._ranges(rel_time, rel_time)
+        return self._build(columns, *self._pairs(np.arange(len(self.events)), starts, stops))
 
 def run_regression_base(data, formula, cluster_col='geo', weights_col=None):
     print(f"Running regression: {formula}")
@@ -926,18 +1880,235 @@ def build_event_design_matrix_np(df, treat_vars, half_window, base_period, inclu
 
     return X, col_names
 
-def run_absorbing_regression(df, y_col, treat_vars, half_window, base_period, absorb_cols, cluster_col, weights_col=None, include_time_dummies=False):
+def build_event_design_matrix_sparse(df, treat_vars, half_window, base_period, include_time_dummies=False, format='csr'):
+    """
+    Sparse counterpart of ``build_event_design_matrix_np``.
+
+    Each row has at most one event time, so the matrix is assembled
+    directly from ``rel_time`` codes with one entry per row and column
+    slot (time dummy and each treatment variable). Columns, names and
+    values are identical to the dense builder.
+    """
+    times = [t for t in range(-half_window, half_window + 1) if t != base_period]
+    n = len(df)
+    rel = df['rel_time'].to_numpy()
+    per_time = len(treat_vars) + int(include_time_dummies)
+
+    # Position of each rel_time in `times`; -1 outside the window or at the base period
+    positions = np.full(2 * half_window + 1, -1, dtype=np.int64)
+    positions[np.asarray(times, dtype=np.int64) + half_window] = np.arange(len(times))
+    in_window = (rel >= -half_window) & (rel <= half_window)
+    codes = np.full(n, -1, dtype=np.int64)
+    codes[in_window] = positions[rel[in_window].astype(np.int64) + half_window]
+    rows = np.flatnonzero(codes >= 0)
+    first_col = codes[rows] * per_time
+
+    row_idx, col_idx, data = [], [], []
+    slot = 0
+    if include_time_dummies:
+        row_idx.append(rows)
+        col_idx.append(first_col)
+        data.append(np.ones(len(rows), dtype=np.float32))
+        slot += 1
+    for var in treat_vars:
+        row_idx.append(rows)
+        col_idx.append(first_col + slot)
+        data.append(df[var].to_numpy(dtype=np.float32)[rows])
+        slot += 1
+
+    X = coo_matrix(
+        (np.concatenate(data), (np.concatenate(row_idx), np.concatenate(col_idx))),
+        shape=(n, len(times) * per_time), dtype=np.float32
+    ).asformat(format)
+
+    col_names = []
+    for t in times:
+        if include_time_dummies:
+            col_names.append(f"rt_{t}")
+        col_names.extend(f"rt_{t}_x_{var}" for var in treat_vars)
+    return X, col_names
+
+class SparseWithinResults:
+    """
+    Clustered within-estimator results for a sparse design.
+
+    Exposes the parts of the linearmodels results interface used in this
+    module (``params``, ``std_errors``, ``pvalues``, ``cov``, ``nobs``,
+    ``conf_int``), indexed by the design column names. Covariance and
+    inference follow ``AbsorbingLS.fit(cov_type='clustered')``: no
+    small-sample scaling and normal p-values.
+    """
+
+    def __init__(self, params, cov, nobs, col_names):
+        self.params = pd.Series(params, index=col_names, name='parameter')
+        self.cov = pd.DataFrame(cov, index=col_names, columns=col_names)
+        self.std_errors = pd.Series(np.sqrt(np.diag(cov)), index=col_names, name='stderr')
+        self.tstats = self.params / self.std_errors
+        self.pvalues = pd.Series(2 * stats.norm.sf(np.abs(self.tstats)), index=col_names, name='pvalue')
+        self.nobs = nobs
+
+    def conf_int(self, level=0.95):
+        q = stats.norm.ppf(0.5 + level / 2)
+        return pd.DataFrame({'lower': self.params - q * self.std_errors,
+                             'upper': self.params + q * self.std_errors})
+
+def _cluster_key(spec):
+    """Normalized key of a clustering: a column name or a tuple of two names."""
+    if isinstance(spec, str):
+        return spec
+    spec = tuple(spec)
+    if len(spec) == 1:
+        return spec[0]
+    if len(spec) != 2:
+        raise ValueError(f"Only one- and two-way clustering is supported, got {spec}")
+    return spec
+
+def _cluster_components(spec):
+    """
+    One-way score components of a clustering and their signs in the meat.
+
+    Two-way clustering by (a, b) follows Cameron, Gelbach & Miller (2011):
+    meat_a + meat_b - meat_ab, with ab the intersection clusters.
+    """
+    key = _cluster_key(spec)
+    if isinstance(key, str):
+        return [(1.0, key)]
+    return [(1.0, key[0]), (1.0, key[1]), (-1.0, key)]
+
+class MultiClusterResults:
+    """
+    One fit with clustered covariances for several clusterings.
+
+    Stores the coefficients, the inverse Gram matrix of the within design
+    and per-cluster score sums for every one-way component; indexing by a
+    cluster column (or a tuple of two columns for two-way clustering)
+    assembles that sandwich on demand and returns a ``SparseWithinResults``.
+    """
+
+    def __init__(self, params, gram_inv, scores, nobs, col_names):
+        self.params = params
+        self.gram_inv = gram_inv
+        self.scores = scores
+        self.nobs = nobs
+        self.col_names = col_names
+        self._results = {}
+
+    def keys(self):
+        keys = [k for k in self.scores if isinstance(k, str)]
+        return keys + [k for k in self.scores if not isinstance(k, str)]
+
+    def __contains__(self, spec):
+        return all(comp in self.scores for _, comp in _cluster_components(spec))
+
+    def __getitem__(self, spec):
+        key = _cluster_key(spec)
+        if key not in self._results:
+            if key not in self:
+                raise KeyError(f"No cluster scores for {key}")
+            meat = sum(sign * (self.scores[comp].T @ self.scores[comp])
+                       for sign, comp in _cluster_components(key))
+            cov = self.gram_inv @ meat @ self.gram_inv
+            self._results[key] = SparseWithinResults(self.params, (cov + cov.T) / 2,
+                                                     self.nobs, self.col_names)
+        return self._results[key]
+
+def _component_codes(clusters, specs):
+    """Integer codes of every one-way component needed by ``specs``."""
+    codes = {}
+    for spec in specs:
+        for _, comp in _cluster_components(spec):
+            if comp in codes:
+                continue
+            if isinstance(comp, str):
+                codes[comp] = pd.factorize(clusters[comp])[0]
+            else:
+                a = pd.factorize(clusters[comp[0]])[0].astype(np.int64)
+                b = pd.factorize(clusters[comp[1]])[0].astype(np.int64)
+                codes[comp] = pd.factorize(a * (b.max() + 1) + b)[0]
+    return codes
+
+def _fit_sparse_within(y, X, demeaner, clusters, weights, col_names, specs=None):
+    """
+    Within estimator and cluster-robust covariance for a sparse design.
+
+    ``y`` is already demeaned. Demeaned columns of ``X`` are formed one
+    at a time and never stored together: since the weighted within
+    transformation is a projection, X~'W x~_j = X'W x~_j, so the Gram
+    matrix only needs sparse products, and the residuals are
+    M(y - X beta). A second pass over the columns gives the cluster
+    scores, keeping peak memory at O(N) on top of the sparse design.
+
+    ``clusters`` is either one array of cluster labels, giving a
+    ``SparseWithinResults``, or a dict of label arrays keyed by column
+    name together with ``specs`` (column names, or pairs of them for
+    two-way clustering), giving a ``MultiClusterResults``.
+    """
+    X = X.tocsc()
+    n, k = X.shape
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    single = not isinstance(clusters, dict)
+    if single:
+        clusters, specs = {'cluster': clusters}, ['cluster']
+    codes = _component_codes(clusters, specs)
+
+    def within_column(j):
+        return demeaner.demean(X[:, j].toarray().ravel())
+
+    gram = np.empty((k, k))
+    for j in range(k):
+        gram[:, j] = X.T @ (w * within_column(j))
+    gram = (gram + gram.T) / 2
+    gram_inv = np.linalg.pinv(gram)
+    params = gram_inv @ (X.T @ (w * y))
+    resid = y - demeaner.demean(X @ params)
+
+    scores = {comp: np.empty((c.max() + 1, k)) for comp, c in codes.items()}
+    for j in range(k):
+        contrib = w * within_column(j) * resid
+        for comp, c in codes.items():
+            scores[comp][:, j] = np.bincount(c, weights=contrib, minlength=len(scores[comp]))
+    multi = MultiClusterResults(params, gram_inv, scores, n, col_names)
+    return multi['cluster'] if single else multi
+
+def _stack_columns(df, columns):
+    """Materialize only ``columns`` of a VirtualStack; DataFrames pass through."""
+    if isinstance(df, VirtualStack):
+        available = VirtualStack.COLUMNS + VirtualStack.EXTRA_COLUMNS
+        return df.frame([c for c in columns if c and c in available])
+    return df
+
+def run_absorbing_regression(df, y_col, treat_vars, half_window, base_period, absorb_cols, cluster_col, weights_col=None, include_time_dummies=False, sparse=None):
+    """
+    Stacked event-study regression with absorbed fixed effects.
+
+    ``cluster_col`` may also be a list of cluster columns and column
+    pairs (two-way clustering); the model is then fitted once on the
+    sparse path and a ``MultiClusterResults`` holding every requested
+    clustered covariance is returned.
+    """
+    multi = not isinstance(cluster_col, str)
+    if multi:
+        specs = [_cluster_key(c) for c in cluster_col]
+        cluster_names = list(dict.fromkeys(
+            name for spec in specs for name in ([spec] if isinstance(spec, str) else spec)))
+        sparse = True
+    else:
+        cluster_names = [cluster_col]
+    df = _stack_columns(df, [y_col, *treat_vars, 'rel_time', *absorb_cols, *cluster_names, weights_col])
     if df.empty:
         return None, None
+    if sparse is None:
+        sparse = CONFIG.get("analysis", {}).get("sparse_design", False)
     df = df.reset_index(drop=True)
-    X, col_names = build_event_design_matrix_np(df, treat_vars, half_window, base_period, include_time_dummies=include_time_dummies)
+    build_design = build_event_design_matrix_sparse if sparse else build_event_design_matrix_np
+    X, col_names = build_design(df, treat_vars, half_window, base_period, include_time_dummies=include_time_dummies)
     data_clean = df.copy()
     data_clean = data_clean.replace([np.inf, -np.inf], np.nan)
     y = data_clean[y_col]
     absorb = data_clean[absorb_cols].copy()
     for col in absorb_cols:
         absorb[col] = absorb[col].astype('category').cat.codes
-    cols_to_check = [y_col, cluster_col] + absorb_cols
+    cols_to_check = [y_col, *cluster_names] + absorb_cols
     if weights_col and weights_col in data_clean.columns:
         cols_to_check.append(weights_col)
     data_clean = data_clean.dropna(subset=cols_to_check)
@@ -949,12 +2120,395 @@ def run_absorbing_regression(df, y_col, treat_vars, half_window, base_period, ab
     if weights_col and weights_col in data_clean.columns:
         weights = data_clean[weights_col]
 
-    clusters = data_clean[[cluster_col]].copy()
-    clusters[cluster_col] = clusters[cluster_col].astype('category').cat.codes
-    mod = AbsorbingLS(y, X, absorb=absorb, weights=weights)
+    clusters = data_clean[cluster_names].copy()
+    for col in cluster_names:
+        clusters[col] = clusters[col].astype('category').cat.codes
+
+    # Absorb the fixed effects with the shared MAP engine, then fit the
+    # demeaned model (no further absorption needed)
+    demeaner = FixedEffectDemeaner(
+        absorb.to_numpy(), None if weights is None else weights.to_numpy()
+    )
+    y = demeaner.demean(y)
+    if multi:
+        res = _fit_sparse_within(y, X, demeaner, {c: clusters[c].to_numpy() for c in cluster_names},
+                                 None if weights is None else weights.to_numpy(), col_names, specs)
+        return res, col_names
+    if sparse:
+        res = _fit_sparse_within(y, X, demeaner, clusters[cluster_col].to_numpy(),
+                                 None if weights is None else weights.to_numpy(), col_names)
+        return res, col_names
+    X = demeaner.demean(X)
+    mod = AbsorbingLS(y, X, weights=weights)
     res = mod.fit(cov_type='clustered', clusters=clusters)
     return res, col_names
 
+def _rows_digest(source, y_col, treat_vars, absorb_cols, cluster_cols, weights_col=None):
+    """
+    Content hash of the rows a cached fit is estimated on.
+
+    A stacked DataFrame is hashed on the columns the fit reads; a
+    ``VirtualStack`` on its panel and events, which together with the
+    window and base period of the spec determine every stacked row.
+    None when no cache is open, so uncached runs skip the hashing.
+    """
+    if RESULT_CACHE is None:
+        return None
+    if isinstance(source, VirtualStack):
+        parts = [source.panel[['geo', 'coicop', 'abs_month', 'log_hicp', 'weight']], source.events]
+    else:
+        columns = [y_col, *treat_vars, 'rel_time', *absorb_cols]
+        for spec in cluster_cols:
+            key = _cluster_key(spec)
+            columns += [key] if isinstance(key, str) else list(key)
+        if weights_col is not None:
+            columns.append(weights_col)
+        parts = [source[[c for c in dict.fromkeys(columns) if c in source.columns]]]
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+def _cache_spec(sample, y_col, treat_vars, half_window, base_period, absorb_cols,
+                cluster_col, weights_col=None, include_time_dummies=False, rows=None):
+    return {
+        'sample': sample, 'rows': rows, 'y': y_col, 'treat_vars': list(treat_vars),
+        'half_window': half_window, 'base_period': base_period,
+        'absorb_cols': list(absorb_cols), 'cluster': _cluster_key(cluster_col),
+        'weights': weights_col, 'include_time_dummies': include_time_dummies,
+    }
+
+def _cached_results(spec):
+    if RESULT_CACHE is None:
+        return None
+    hit = RESULT_CACHE.load(spec)
+    if hit is None:
+        return None
+    return SparseWithinResults(hit['params'], hit['cov'], hit['nobs'], hit['col_names'])
+
+def _store_results(spec, res, col_names):
+    if RESULT_CACHE is not None and res is not None:
+        RESULT_CACHE.store(spec, np.asarray(res.params), np.asarray(res.cov), res.nobs, col_names)
+
+def cached_absorbing_regression(df, sample, y_col, treat_vars, half_window, base_period,
+                                absorb_cols, cluster_col, weights_col=None,
+                                include_time_dummies=False):
+    """
+    ``run_absorbing_regression`` through ``RESULT_CACHE``.
+
+    ``sample`` names the rows of ``df`` (e.g. ``"main"`` or
+    ``"geo_group=Core"``) for readers of the cache; the fit is keyed on a
+    hash of the rows themselves (``_rows_digest``), so a subset or another
+    event list never reuses a fit under the same label. Cached fits come
+    back as ``SparseWithinResults``.
+    """
+    rows = _rows_digest(df, y_col, treat_vars, absorb_cols, [cluster_col], weights_col)
+    spec = _cache_spec(sample, y_col, treat_vars, half_window, base_period, absorb_cols,
+                       cluster_col, weights_col, include_time_dummies, rows=rows)
+    res = _cached_results(spec)
+    if res is not None:
+        return res, list(res.params.index)
+    res, col_names = run_absorbing_regression(
+        df, y_col=y_col, treat_vars=treat_vars, half_window=half_window,
+        base_period=base_period, absorb_cols=absorb_cols, cluster_col=cluster_col,
+        weights_col=weights_col, include_time_dummies=include_time_dummies)
+    _store_results(spec, res, col_names)
+    return res, col_names
+
+def iter_event_chunks(stacked_df, chunk_rows=1_000_000):
+    """
+    Yield a stacked DataFrame in blocks of whole events of about ``chunk_rows`` rows.
+
+    Rows are assumed grouped by ``event_id``, as produced by
+    ``build_stacked_with_controls``; without that column the frame is one chunk.
+    """
+    if 'event_id' not in stacked_df.columns or len(stacked_df) <= chunk_rows:
+        yield stacked_df
+        return
+    event_ids = stacked_df['event_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, event_ids[1:] != event_ids[:-1]])
+    cuts = np.unique(starts[np.searchsorted(starts, np.arange(chunk_rows, len(stacked_df), chunk_rows))
+                            .clip(max=len(starts) - 1)])
+    bounds = np.r_[0, cuts[cuts > 0], len(stacked_df)]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi > lo:
+            yield stacked_df.iloc[lo:hi]
+
+class SufficientStatsRegression:
+    """
+    Stacked event-study regression from normal equations accumulated over chunks.
+
+    Fits the same model as ``run_absorbing_regression`` (``rt_t x treat``
+    columns, absorbed fixed effects, weights) without ever holding the
+    whole stack. Fixed effects enter as sparse dummies D next to the
+    event-time design X. The first pass over the chunks accumulates
+    X'WX, X'Wy, D'WD, D'WX and D'Wy; the fixed effects are then
+    partialled out by solving D'WD Pi = D'W[X y] (preconditioned
+    conjugate gradients on the sparse system). The second pass forms the
+    within-transformed rows x - Pi'd and residuals chunk by chunk and
+    accumulates per-cluster scores for every column in ``cluster_cols``,
+    so all clustered covariances come from the same two passes. A tuple of
+    two columns in ``cluster_cols`` adds two-way clustering, whose
+    intersection scores are accumulated in the same pass.
+
+    Parameters
+    ----------
+    y_col : str
+        Dependent variable
+    treat_vars : List[str]
+        Treatment variables interacted with event time
+    half_window, base_period : int
+        Event window and omitted period
+    absorb_cols : List[str]
+        Fixed-effect columns
+    cluster_cols : List[str or Tuple[str, str]]
+        Cluster variables (or pairs for two-way clustering) to compute
+        covariances for
+    weights_col : Optional[str]
+        Observation weights
+    tol : float
+        Relative tolerance of the fixed-effect solve
+    chunk_rows : int
+        Approximate rows per chunk when splitting a VirtualStack or DataFrame
+    """
+
+    def __init__(self, y_col, treat_vars, half_window, base_period, absorb_cols,
+                 cluster_cols, weights_col=None, tol=1e-12, chunk_rows=250_000):
+        self.y_col = y_col
+        self.treat_vars = list(treat_vars)
+        self.half_window = half_window
+        self.base_period = base_period
+        self.absorb_cols = list(absorb_cols)
+        self.cluster_cols = [_cluster_key(c) for c in cluster_cols]
+        self.weights_col = weights_col
+        self.tol = tol
+        self.chunk_rows = chunk_rows
+
+    def _chunks(self, source):
+        if isinstance(source, VirtualStack):
+            return source.iter_frames(self._columns(source), self.chunk_rows)
+        if isinstance(source, pd.DataFrame):
+            return iter_event_chunks(source, self.chunk_rows)
+        return source()
+
+    def _cluster_names(self):
+        names = []
+        for spec in self.cluster_cols:
+            names.extend([spec] if isinstance(spec, str) else spec)
+        return list(dict.fromkeys(names))
+
+    def _columns(self, source=None):
+        cols = [self.y_col, *self.treat_vars, 'rel_time', *self.absorb_cols, *self._cluster_names()]
+        if self.weights_col:
+            cols.append(self.weights_col)
+        if isinstance(source, VirtualStack):
+            cols = [c for c in cols if c in VirtualStack.COLUMNS + VirtualStack.EXTRA_COLUMNS]
+        return list(dict.fromkeys(cols))
+
+    @staticmethod
+    def _encode(levels, values, tag=None):
+        """Integer ids of ``values`` in ``levels``, assigning new ids to unseen levels."""
+        codes, uniques = pd.factorize(values)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, level in enumerate(uniques):
+            ids[i] = levels.setdefault((tag, level), len(levels))
+        return ids[codes]
+
+    def _prepare_chunk(self, chunk, required=()):
+        """
+        Design, outcome, weights and fixed-effect ids of the rows of a chunk
+        complete in the model columns and the ``required`` cluster columns.
+        """
+        chunk = chunk.replace([np.inf, -np.inf], np.nan)
+        check = [self.y_col, *self.absorb_cols, *required]
+        weighted = bool(self.weights_col) and self.weights_col in chunk.columns
+        if weighted:
+            check.append(self.weights_col)
+        chunk = chunk.dropna(subset=check).reset_index(drop=True)
+
+        X, col_names = build_event_design_matrix_sparse(chunk, self.treat_vars, self.half_window,
+                                                         self.base_period)
+        X = X.astype(np.float64)
+        y = chunk[self.y_col].to_numpy(dtype=np.float64)
+        w = chunk[self.weights_col].to_numpy(dtype=np.float64) if weighted else np.ones(len(chunk))
+        fe_ids = np.empty((len(chunk), len(self.absorb_cols)), dtype=np.int64)
+        for j, col in enumerate(self.absorb_cols):
+            fe_ids[:, j] = self._encode(self._fe_levels, chunk[col].to_numpy(), tag=col)
+        return chunk, X, y, w, fe_ids, col_names
+
+    def _dummies(self, fe_ids, n_levels):
+        n, n_fe = fe_ids.shape
+        return csr_matrix((np.ones(n * n_fe), fe_ids.ravel(), np.arange(0, n * n_fe + 1, n_fe)),
+                          shape=(n, n_levels))
+
+    def fit(self, chunks) -> 'SufficientStatsRegression':
+        """
+        Accumulate the statistics over ``chunks`` and compute all covariances.
+
+        Each clustering uses the rows complete in the model columns and in
+        its own cluster columns, as a separate fit clustered by it would.
+        Clusterings whose columns have no missing values on the model's
+        rows share one fit; the others are refitted on their own rows
+        (two more passes per distinct set of incomplete columns).
+
+        Parameters
+        ----------
+        chunks : VirtualStack, pd.DataFrame or callable
+            Source of stacked chunks; a callable must return a fresh
+            iterable of DataFrames on every call (two passes are made)
+
+        Returns
+        -------
+        SufficientStatsRegression
+            Fitted estimator; per-cluster results via ``results``
+        """
+        results, incomplete = self._fit_sample(chunks, self.cluster_cols)
+        self.params_, self.gram_inv_, self.nobs_ = results.params, results.gram_inv, results.nobs
+        self.results_ = {}
+        refits = {}
+        for spec in self.cluster_cols:
+            names = tuple(n for n in ([spec] if isinstance(spec, str) else spec) if n in incomplete)
+            if names:
+                refits.setdefault(names, []).append(spec)
+            else:
+                self.results_[spec] = results
+        for names, specs in refits.items():
+            sample_results, _ = self._fit_sample(chunks, specs, required=names)
+            for spec in specs:
+                self.results_[spec] = sample_results
+        return self
+
+    def _fit_sample(self, chunks, specs, required=()):
+        """
+        Two-pass fit on the rows complete in the model and ``required``
+        columns. Returns a ``MultiClusterResults`` for those of ``specs``
+        whose cluster columns are complete on these rows, and the set of
+        cluster columns that are not.
+        """
+        self._fe_levels = {}
+        XX = XY = None
+        DD, DX, DY = [], [], []
+        nobs = 0
+        cluster_names = self._cluster_names()
+        n_missing = pd.Series(0, index=cluster_names)
+
+        # Pass 1: normal equations of [X D]
+        for chunk in self._chunks(chunks):
+            chunk, X, y, w, fe_ids, col_names = self._prepare_chunk(chunk, required)
+            self.col_names_ = col_names
+            if XX is None:
+                XX = np.zeros((X.shape[1], X.shape[1]))
+                XY = np.zeros(X.shape[1])
+            if not len(y):
+                continue
+            n_missing += chunk[cluster_names].isna().sum()
+            WX = X.multiply(w[:, None]).tocsr()
+            XX += (X.T @ WX).toarray()
+            XY += X.T @ (w * y)
+            D = self._dummies(fe_ids, len(self._fe_levels))
+            DD.append((D.T @ D.multiply(w[:, None])).tocoo())
+            DX.append((D.T @ WX).tocoo())
+            DY.append(D.T @ (w * y))
+            nobs += len(y)
+
+        if XX is None:
+            raise ValueError("SufficientStatsRegression.fit got no chunks to fit")
+        if not nobs:
+            raise ValueError("SufficientStatsRegression.fit found no complete rows to fit")
+        n_levels = len(self._fe_levels)
+        k = XX.shape[0]
+        DD = coo_matrix((np.concatenate([m.data for m in DD]) if DD else [],
+                         (np.concatenate([m.row for m in DD]) if DD else [],
+                          np.concatenate([m.col for m in DD]) if DD else [])),
+                        shape=(n_levels, n_levels)).tocsr()
+        DXY = np.zeros((n_levels, k + 1))
+        for m, dy in zip(DX, DY):
+            np.add.at(DXY, (m.row, m.col), m.data)
+            DXY[:len(dy), k] += dy
+
+        # Partial out the fixed effects: Pi = (D'WD)^- D'W[X y]
+        Pi = np.zeros_like(DXY)
+        if n_levels:
+            diag = DD.diagonal()
+            precond = diags(np.divide(1.0, diag, out=np.zeros_like(diag), where=diag > 0))
+            for j in range(k + 1):
+                if np.any(DXY[:, j]):
+                    Pi[:, j], info = cg(DD, DXY[:, j], rtol=self.tol, atol=0.0,
+                                        maxiter=10 * n_levels, M=precond)
+                    if info > 0:
+                        print(f"Warning: fixed-effect solve did not converge for column {j}")
+        gram = XX - DXY[:, :k].T @ Pi[:, :k]
+        gram = (gram + gram.T) / 2
+        gram_inv = np.linalg.pinv(gram)
+        params = gram_inv @ (XY - DXY[:, :k].T @ Pi[:, k])
+
+        # Pass 2: cluster scores of the within-transformed rows, one set per
+        # one-way component (two-way specs add their intersection), for the
+        # clusterings defined on every row of this sample
+        incomplete = set(n_missing.index[n_missing > 0])
+        specs = [spec for spec in specs
+                 if not incomplete.intersection([spec] if isinstance(spec, str) else spec)]
+        components = list(dict.fromkeys(comp for spec in specs
+                                        for _, comp in _cluster_components(spec)))
+        cluster_levels = {comp: {} for comp in components}
+        scores = {comp: np.zeros((0, k)) for comp in components}
+        for chunk in self._chunks(chunks) if components else ():
+            chunk, X, y, w, fe_ids, _ = self._prepare_chunk(chunk, required)
+            if not len(y):
+                continue
+            X_within = X.toarray()
+            y_within = y.copy()
+            for j in range(fe_ids.shape[1]):
+                X_within -= Pi[fe_ids[:, j], :k]
+                y_within -= Pi[fe_ids[:, j], k]
+            contrib = X_within
+            contrib *= (w * (y_within - X_within @ params))[:, None]
+            chunk_ids = {}
+            for comp in components:
+                if isinstance(comp, str):
+                    values = chunk[comp].to_numpy()
+                else:
+                    # Component ids are stable across chunks, so their pair is too
+                    values = (chunk_ids[comp[0]] << 32) | chunk_ids[comp[1]]
+                ids = chunk_ids[comp] = self._encode(cluster_levels[comp], values)
+                n_clusters = len(cluster_levels[comp])
+                grown = np.zeros((n_clusters, k))
+                grown[:len(scores[comp])] = scores[comp]
+                for j in range(k):
+                    grown[:, j] += np.bincount(ids, weights=contrib[:, j], minlength=n_clusters)
+                scores[comp] = grown
+
+        return MultiClusterResults(params, gram_inv, scores, nobs, self.col_names_), incomplete
+
+    def results(self, cluster_col):
+        """Results clustered by ``cluster_col`` (a column, or a pair for two-way)."""
+        return self.results_[_cluster_key(cluster_col)][cluster_col]
+
+def cached_stacked_regression(source, sample, cluster_cols, y_col, treat_vars, half_window,
+                              base_period, absorb_cols, weights_col=None):
+    """
+    ``SufficientStatsRegression`` through ``RESULT_CACHE``.
+
+    ``source`` (a stacked DataFrame or a ``VirtualStack``) is streamed
+    once, for all clusterings in ``cluster_cols`` missing from the cache.
+    ``sample`` labels the rows and the fits are keyed on their content,
+    as in ``cached_absorbing_regression``. Returns the results keyed by
+    clustering and the column names.
+    """
+    spec = dict(y_col=y_col, treat_vars=treat_vars, half_window=half_window,
+                base_period=base_period, absorb_cols=absorb_cols, weights_col=weights_col)
+    rows = _rows_digest(source, y_col, treat_vars, absorb_cols, cluster_cols, weights_col)
+    cache_specs = {c: _cache_spec(sample, cluster_col=c, rows=rows, **spec) for c in cluster_cols}
+    results = {c: _cached_results(cache_specs[c]) for c in cluster_cols}
+    missing = [c for c, res in results.items() if res is None]
+    if not missing:
+        return results, list(results[cluster_cols[0]].params.index)
+    estimator = SufficientStatsRegression(cluster_cols=missing, **spec).fit(source)
+    for c in missing:
+        results[c] = estimator.results(c)
+        _store_results(cache_specs[c], results[c], estimator.col_names_)
+    return results, estimator.col_names_
+
 def extract_coefficients_absorbing(res, treat_var, half_window, base_period, col_names=None):
     if res is None:
         return pd.DataFrame()
@@ -1224,8 +2778,9 @@ def analysis_asymmetry(stacked_df):
 
     # Run main asymmetry regression
     weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-    res, col_names = run_absorbing_regression(
+    res, col_names = cached_absorbing_regression(
         stacked_df,
+        sample="main",
         y_col="norm_log_hicp",
         treat_vars=["pos_shock", "neg_shock"],
         half_window=half_window,
@@ -1792,8 +3347,9 @@ def run_interaction_regression(stacked_df, half_window=12, base_period=-1):
     weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
 
     # Run regression with interaction terms
-    res, col_names = run_absorbing_regression(
+    res, col_names = cached_absorbing_regression(
         stacked_df,
+        sample="main",
         y_col="norm_log_hicp",
         treat_vars=["shock_abs", "shock_x_hike"],
         half_window=half_window,
@@ -2143,8 +3699,9 @@ def analysis_heterogeneity_v2(stacked_df):
             continue
         print(f"Running for Geo Group: {grp} (Obs: {len(sub_df)})")
         weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-        res, col_names = run_absorbing_regression(
+        res, col_names = cached_absorbing_regression(
             sub_df,
+            sample=f"geo_group={grp}",
             y_col="norm_log_hicp",
             treat_vars=["treat_shock"],
             half_window=CONFIG.get("analysis", {}).get("event_window", 12),
@@ -2183,8 +3740,9 @@ def analysis_heterogeneity_v2(stacked_df):
             continue
         print(f"Running for Durability Group: {grp} (Obs: {len(sub_df)})")
         weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-        res, col_names = run_absorbing_regression(
+        res, col_names = cached_absorbing_regression(
             sub_df,
+            sample=f"durability={grp}",
             y_col="norm_log_hicp",
             treat_vars=["treat_shock"],
             half_window=CONFIG.get("analysis", {}).get("event_window", 12),
@@ -2219,38 +3777,47 @@ def analysis_robustness(df, events, stacked_df_main):
     robustness_summary = []
 
     # 1. Alternative Clustering
-    # Clusters: geo (Main), geo-year, geo-coicop
-    clustering_options = ['geo', 'geo_year', 'geo_coicop']
+    # Clusters: geo (Main), geo-year, geo-coicop, two-way geo x calendar month
+    clustering_options = ['geo', 'geo_year', 'geo_coicop', ('geo', 'cal_time')]
 
     # Ensure columns exist (geo_coicop exists from create_stacked_dataset)
     if 'geo_year' not in stacked_df_main.columns:
          stacked_df_main['year'] = stacked_df_main['time'].dt.year
-         stacked_df_main['geo_year'] = stacked_df_main['geo'] + "_" + stacked_df_main['year'].astype(str)
+         stacked_df_main['geo_year'] = stacked_df_main['geo'].astype(str) + "_" + stacked_df_main['year'].astype(str)
+
+    def cluster_label(spec):
+        return spec if isinstance(spec, str) else " x ".join(spec)
+
+    def has_columns(spec):
+        return all(c in stacked_df_main.columns for c in ([spec] if isinstance(spec, str) else spec))
 
     for cluster_col in clustering_options:
-        if cluster_col not in stacked_df_main.columns:
-            print(f"Warning: {cluster_col} not found in dataset")
-            continue
+        if not has_columns(cluster_col):
+            print(f"Warning: {cluster_label(cluster_col)} not found in dataset")
+    clustering_options = [c for c in clustering_options if has_columns(c)]
 
-        print(f"Robustness: Clustering by {cluster_col}")
-        weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-        res, col_names = run_absorbing_regression(
-            stacked_df_main,
-            y_col="norm_log_hicp",
-            treat_vars=["treat_shock"],
-            half_window=CONFIG.get("analysis", {}).get("event_window", 12),
-            base_period=CONFIG.get("identification", {}).get("base_period", -1),
-            absorb_cols=["geo_coicop", "cal_time", "rel_time"],
-            cluster_col=cluster_col,
-            weights_col=weights_col,
-            include_time_dummies=False
-        )
+    # One fit serves every clustering variant; each one only costs its
+    # covariance sandwich
+    weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
+    spec = dict(
+        y_col="norm_log_hicp",
+        treat_vars=["treat_shock"],
+        half_window=CONFIG.get("analysis", {}).get("event_window", 12),
+        base_period=CONFIG.get("identification", {}).get("base_period", -1),
+        absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+        weights_col=weights_col
+    )
+    cluster_results, _ = cached_stacked_regression(stacked_df_main, "main", clustering_options, **spec)
+
+    for cluster_col in clustering_options:
+        print(f"Robustness: Clustering by {cluster_label(cluster_col)}")
+        res = cluster_results[cluster_col]
         coeffs = extract_coefficients_absorbing(
             res,
             'treat_shock',
-            half_window=CONFIG.get("analysis", {}).get("event_window", 12),
-            base_period=CONFIG.get("identification", {}).get("base_period", -1),
-            col_names=col_names
+            half_window=spec['half_window'],
+            base_period=spec['base_period'],
+            col_names=list(res.params.index)
         )
 
         # Extract key stats for t=0 and t=12
@@ -2258,7 +3825,7 @@ def analysis_robustness(df, events, stacked_df_main):
             row = coeffs[coeffs['rel_time'] == t]
             if not row.empty:
                 robustness_summary.append({
-                    'Check': f"Cluster: {cluster_col}",
+                    'Check': f"Cluster: {cluster_label(cluster_col)}",
                     'Time': t,
                     'Coef': row['coef'].values[0],
                     'SE': row['se'].values[0],
@@ -2271,23 +3838,25 @@ def analysis_robustness(df, events, stacked_df_main):
         if w == 12:
             current_stacked = stacked_df_main
         else:
-            # Need to re-stack with larger window
-            current_stacked = build_stacked_with_controls(df, events, half_window=w)
+            # Larger window: stream the stack event by event instead of
+            # materializing it
+            current_stacked = VirtualStack(df, events, half_window=w)
 
         if current_stacked.empty: continue
 
         weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-        res, col_names = run_absorbing_regression(
+        fits, col_names = cached_stacked_regression(
             current_stacked,
+            "main",
+            ["geo"],
             y_col="norm_log_hicp",
             treat_vars=["treat_shock"],
             half_window=w,
             base_period=CONFIG.get("identification", {}).get("base_period", -1),
             absorb_cols=["geo_coicop", "cal_time", "rel_time"],
-            cluster_col="geo",
-            weights_col=weights_col,
-            include_time_dummies=False
+            weights_col=weights_col
         )
+        res = fits["geo"]
         coeffs = extract_coefficients_absorbing(
             res,
             'treat_shock',
@@ -2315,8 +3884,9 @@ def analysis_robustness(df, events, stacked_df_main):
 
     if not non_crisis_stacked.empty:
         weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-        res_nc, col_names = run_absorbing_regression(
+        res_nc, col_names = cached_absorbing_regression(
             non_crisis_stacked,
+            sample="excl_crisis",
             y_col="norm_log_hicp",
             treat_vars=["treat_shock"],
             half_window=CONFIG.get("analysis", {}).get("event_window", 12),
@@ -2348,6 +3918,52 @@ def analysis_robustness(df, events, stacked_df_main):
         # Save specific table for crisis robustness
         save_latex_table(coeffs_nc, "robustness_crisis.tex", "Robustness: Excluding Crisis Periods (2008-09, 2020-21)", "tab:rob_crisis")
 
+    # 4. Alternative Event Thresholds, read from the event grid of detect_events
+    grid_path = os.path.join(PROCESSED_DIR, "events_grid.parquet")
+    thresholds = CONFIG.get("robustness", {}).get("thresholds", [])
+    if thresholds and not os.path.exists(grid_path):
+        print("Warning: events_grid.parquet not found (processing.event_grid); skipping thresholds")
+    elif thresholds:
+        half_window = CONFIG.get("analysis", {}).get("event_window", 12)
+        clean_window = CONFIG.get("identification", {}).get("clean_window_months", 12)
+        for threshold in thresholds:
+            print(f"Robustness: Event threshold {threshold}")
+            grid_events = load_event_grid(threshold, clean_window, grid_path)
+            grid_events = grid_events[grid_events['is_clean']].reset_index(drop=True)
+            if grid_events.empty: continue
+            grid_events['time'] = abs_month_to_timestamp(to_abs_month(grid_events['time']))
+
+            weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
+            fits, col_names = cached_stacked_regression(
+                VirtualStack(df, grid_events, half_window=half_window),
+                f"threshold={threshold}",
+                ["geo"],
+                y_col="norm_log_hicp",
+                treat_vars=["treat_shock"],
+                half_window=half_window,
+                base_period=CONFIG.get("identification", {}).get("base_period", -1),
+                absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                weights_col=weights_col
+            )
+            coeffs = extract_coefficients_absorbing(
+                fits["geo"],
+                'treat_shock',
+                half_window=half_window,
+                base_period=CONFIG.get("identification", {}).get("base_period", -1),
+                col_names=col_names
+            )
+
+            for t in [0, 12]:
+                row = coeffs[coeffs['rel_time'] == t]
+                if not row.empty:
+                    robustness_summary.append({
+                        'Check': f"Threshold: {threshold}",
+                        'Time': t,
+                        'Coef': row['coef'].values[0],
+                        'SE': row['se'].values[0],
+                        'P-val': row['pval'].values[0]
+                    })
+
     # Save Robustness Table
     rob_df = pd.DataFrame(robustness_summary)
     rob_df.to_csv(os.path.join(TABLES_DIR, "robustness_summary.csv"), index=False)
@@ -2372,17 +3988,18 @@ def main():
 
     # 3. Main Regression (Cluster by Geo)
     weights_col = CONFIG.get("analysis", {}).get("weight_column", None)
-    res_main, col_names = run_absorbing_regression(
+    fits, col_names = cached_stacked_regression(
         stacked_df,
+        "main",
+        ["geo"],
         y_col="norm_log_hicp",
         treat_vars=["treat_shock"],
         half_window=half_window,
         base_period=CONFIG.get("identification", {}).get("base_period", -1),
         absorb_cols=["geo_coicop", "cal_time", "rel_time"],
-        cluster_col="geo",
-        weights_col=weights_col,
-        include_time_dummies=False
+        weights_col=weights_col
     )
+    res_main = fits["geo"]
     results_main = extract_coefficients_absorbing(
         res_main,
         treat_var='treat_shock',
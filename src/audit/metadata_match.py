@@ -1,7 +1,6 @@
 import os
 import json
 import pandas as pd
-import numpy as np
 import eurostat
 import sys
 from pathlib import Path
@@ -10,7 +9,7 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from src.utils.time_parse import normalize_time
+from src.utils.time_parse import abs_month_to_period, to_abs_month
 
 OUTPUT_DIR = "output"
 TABLES_DIR = os.path.join(OUTPUT_DIR, "tables")
@@ -18,29 +17,14 @@ TABLES_DIR = os.path.join(OUTPUT_DIR, "tables")
 os.makedirs(TABLES_DIR, exist_ok=True)
 
 def _load_metadata():
-    local_path = "data/raw/prc_hicp_manr.parquet"
+    local_path = "data/raw/prc_hicp_manr"
     if os.path.exists(local_path):
-        return pd.read_parquet(local_path)
+        meta = pd.read_parquet(local_path, columns=['geo', 'coicop', 'time', 'value'])
+        meta['geo'] = meta['geo'].astype(str)
+        meta['coicop'] = meta['coicop'].astype(str)
+        return meta
     return eurostat.get_data_df("prc_hicp_manr")
 
-def _to_abs_month(val):
-    if pd.isna(val):
-        return np.nan
-    s = normalize_time(val)
-    if isinstance(s, str) and "-" in s:
-        parts = s.split("-")
-        if len(parts) >= 2:
-            try:
-                return int(parts[0]) * 12 + int(parts[1])
-            except ValueError:
-                pass
-    try:
-        dt = pd.to_datetime(s)
-        return int(dt.year) * 12 + int(dt.month)
-    except Exception:
-        return np.nan
-
-
 def match_events(sample_n=500, seed=12345):
     try:
         events = pd.read_parquet("data/processed/events_list.parquet")
@@ -51,8 +35,8 @@ def match_events(sample_n=500, seed=12345):
         return {"precision": 0.0, "error": "events_list empty"}
 
     events = events.copy()
-    events['time'] = events['time'].map(normalize_time)
-    events['abs_month'] = events['time'].map(_to_abs_month)
+    events['abs_month'] = to_abs_month(events['time'])
+    events['time'] = abs_month_to_period(events['abs_month'])
 
     if len(events) > sample_n:
         events = events.sample(sample_n, random_state=seed)
@@ -77,8 +61,10 @@ def match_events(sample_n=500, seed=12345):
         value_vars = [c for c in meta.columns if c not in id_vars]
         meta_long = meta.melt(id_vars=id_vars, value_vars=value_vars, var_name='time', value_name='value')
 
-    meta_long['time'] = meta_long['time'].map(normalize_time)
-    meta_long['abs_month'] = meta_long['time'].map(_to_abs_month)
+    # Local raw datasets already store absolute months; labels are parsed
+    meta_long['abs_month'] = to_abs_month(meta_long['time'], errors='coerce')
+    meta_long = meta_long.dropna(subset=['abs_month'])
+    meta_long['time'] = abs_month_to_period(meta_long['abs_month'])
 
     # Keep only relevant columns if available
     keep_cols = [c for c in ['geo', 'coicop', 'time', 'abs_month', 'value'] if c in meta_long.columns]
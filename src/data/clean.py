@@ -1,43 +1,258 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import os
 import json
 import sys
+from functools import partial
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from src.utils.time_parse import normalize_time
+from src.utils.config import load_config
+from src.utils.partitions import map_partitions
+from src.utils.time_parse import abs_month_to_period
 
 RAW_DIR = "data/raw"
 PROCESSED_DIR = "data/processed"
 METADATA_DIR = "output/metadata"
 
-def load_and_clean(file_name, value_col_name, filter_unit=None):
-    print(f"Processing {file_name}...")
-    path = os.path.join(RAW_DIR, f"{file_name}.parquet")
-    df = pd.read_parquet(path)
-    
-    # Rename weird column if exists
-    if 'geo\\time_period' in df.columns:
-        df = df.rename(columns={'geo\\time_period': 'geo'})
-    
-    # Filter unit if specified
-    if filter_unit and 'unit' in df.columns:
-        df = df[df['unit'] == filter_unit]
-    
-    # Keep only necessary columns
-    cols_to_keep = ['geo', 'coicop', 'time', 'value']
-    df = df[cols_to_keep]
-    
-    # Rename value column
-    df = df.rename(columns={'value': value_col_name})
-
-    # Normalize time format
-    df['time'] = df['time'].map(normalize_time)
-    
-    return df
+CONFIG = load_config()
+
+# Upper bound on rows per row group; groups never span two geos
+ROW_GROUP_ROWS = 256_000
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+PANEL_SCHEMA = pa.schema([("geo", DICTIONARY_TYPE), ("coicop", DICTIONARY_TYPE), ("time", pa.int32()),
+                          ("hicp", pa.float32()), ("hicp_ct", pa.float32()), ("year", pa.int16()),
+                          ("weight", pa.float32())])
+
+def _raw_dataset(file_name, raw_dir=None):
+    return ds.dataset(os.path.join(raw_dir or RAW_DIR, file_name), format="parquet",
+                      partitioning=ds.partitioning(flavor="hive", dictionaries="infer"))
+
+def load_index(file_name, filter_unit=None, geos=None, raw_dir=None):
+    """
+    Geo, coicop, absolute month and value columns of a raw dataset.
+
+    Raw datasets are geo-partitioned parquet directories (see fetch.py);
+    the column selection and the unit filter are pushed down to the scan,
+    so other units are never decoded, and restricting to ``geos`` only
+    opens those partitions. Returns a dict with categorical
+    ``geo``/``coicop``, int32 ``time`` and float32 ``value``.
+    """
+    if geos is None:
+        print(f"Processing {file_name}...")
+    flt = (ds.field("unit") == filter_unit) if filter_unit else None
+    if geos is not None:
+        in_geos = ds.field("geo").isin(list(geos))
+        flt = in_geos if flt is None else flt & in_geos
+    table = _raw_dataset(file_name, raw_dir).to_table(columns=["geo", "coicop", "time", "value"],
+                                                      filter=flt)
+    return {
+        "geo": pd.Categorical(table.column("geo").to_pandas()),
+        "coicop": pd.Categorical(table.column("coicop").to_pandas()),
+        "time": table.column("time").to_numpy().astype(np.int32, copy=False),
+        "value": table.column("value").to_numpy().astype(np.float32, copy=False),
+    }
+
+def raw_categories(file_name, column, raw_dir=None):
+    """Distinct values of a dimension of a raw dataset, scanning one column a batch at a time."""
+    values = set()
+    for batch in _raw_dataset(file_name, raw_dir).to_batches(columns=[column]):
+        arr = batch.column(0)
+        values.update((arr.dictionary if pa.types.is_dictionary(arr.type) else pc.unique(arr)).to_pylist())
+    values.discard(None)
+    return values
+
+def _categories(*columns):
+    return pd.Index(sorted(set().union(*(c.categories for c in columns))))
+
+def _keys(index, geo_cats, coicop_cats, slot, n_slots):
+    """Integer (geo, coicop, slot) keys; their order is the (geo, coicop, slot) sort order."""
+    geo = index["geo"].set_categories(geo_cats).codes.astype(np.int64)
+    coicop = index["coicop"].set_categories(coicop_cats).codes.astype(np.int64)
+    return (geo * len(coicop_cats) + coicop) * n_slots + slot
+
+def _sort_keys(keys, name):
+    """Sorted keys and their order; raises on duplicate rows, which a join would multiply."""
+    order = np.argsort(keys)
+    keys = keys[order]
+    if (np.diff(keys) == 0).any():
+        raise ValueError(f"{name} has duplicate (geo, coicop, time) rows")
+    return keys, order
+
+def _lookup(sorted_keys, probe):
+    """Positions of ``probe`` in ``sorted_keys`` and whether each was found."""
+    if not len(sorted_keys):
+        return np.zeros(len(probe), dtype=np.int64), np.zeros(len(probe), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_keys, probe), len(sorted_keys) - 1)
+    return pos, sorted_keys[pos] == probe
+
+def merge_indices(hicp, hicp_ct, weights, geo_cats=None, coicop_cats=None):
+    """
+    Inner-join HICP and HICP-CT on (geo, coicop, month) and left-join the
+    annual weights on (geo, coicop, year).
+
+    Keys are integer codes over shared, sorted dictionaries: each side is
+    sorted once and probed by binary search, and the output comes out
+    sorted by geo, coicop and month. ``geo_cats``/``coicop_cats`` fix the
+    dictionaries (default: the values present), so partitions merged
+    separately share them. Returns the panel as an arrow table and the
+    overlap statistics of the join.
+    """
+    geo_cats = _categories(hicp["geo"], hicp_ct["geo"], weights["geo"]) if geo_cats is None else pd.Index(geo_cats)
+    coicop_cats = (_categories(hicp["coicop"], hicp_ct["coicop"], weights["coicop"])
+                   if coicop_cats is None else pd.Index(coicop_cats))
+
+    months = np.concatenate([hicp["time"], hicp_ct["time"]])
+    first = int(months.min()) if len(months) else 0
+    n_months = int(months.max()) - first + 1 if len(months) else 1
+    hicp_keys = _keys(hicp, geo_cats, coicop_cats, hicp["time"] - first, n_months)
+    ct_keys = _keys(hicp_ct, geo_cats, coicop_cats, hicp_ct["time"] - first, n_months)
+    hicp_keys, hicp_order = _sort_keys(hicp_keys, "prc_hicp_midx")
+    ct_keys, ct_order = _sort_keys(ct_keys, "prc_hicp_cind")
+    pos, found = _lookup(ct_keys, hicp_keys)
+    keys = hicp_keys[found]
+    hicp_rows, ct_rows = hicp_order[found], ct_order[pos[found]]
+
+    n_coicop = len(coicop_cats)
+    series, slot = np.divmod(keys, n_months)
+    geo_codes, coicop_codes = np.divmod(series, n_coicop)
+    time = (slot + first).astype(np.int32)
+    year = (time - 1) // 12
+
+    # Weights: sorted (geo, coicop, year) keys, probed by binary search
+    weight_years = (weights["time"] - 1) // 12
+    first_year = int(min(weight_years.min(), year.min())) if len(weight_years) and len(year) else 0
+    n_years = int(max(weight_years.max(), year.max())) - first_year + 1 if len(weight_years) and len(year) else 1
+    weight_keys = _keys(weights, geo_cats, coicop_cats, weight_years - first_year, n_years)
+    weight_keys, weight_order = _sort_keys(weight_keys, "prc_hicp_inw")
+    pos, found = _lookup(weight_keys, series * n_years + (year - first_year))
+    weight = np.full(len(keys), np.nan, dtype=np.float32)
+    weight[found] = weights["value"][weight_order[pos[found]]]
+
+    panel = pa.table({
+        "geo": pa.DictionaryArray.from_arrays(geo_codes.astype(np.int32), pa.array(geo_cats, pa.string())),
+        "coicop": pa.DictionaryArray.from_arrays(coicop_codes.astype(np.int32),
+                                                 pa.array(coicop_cats, pa.string())),
+        "time": time,
+        "hicp": hicp["value"][hicp_rows],
+        "hicp_ct": hicp_ct["value"][ct_rows],
+        "year": year.astype(np.int16),
+        "weight": weight,
+    }, schema=PANEL_SCHEMA)
+    overlap = {
+        "hicp_rows": int(len(hicp_keys)),
+        "hicp_ct_rows": int(len(ct_keys)),
+        "merged_rows": int(len(keys)),
+        "overlap_ratio": float(len(keys) / max(len(hicp_keys), 1)),
+    }
+    return panel, overlap
+
+def merge_partition(geos=None, geo_cats=None, coicop_cats=None, raw_dir=None):
+    """
+    Load and merge the raw indices of ``geos`` (all of them when None).
+
+    Returns the panel and the counts behind the data quality report.
+    """
+    hicp = load_index("prc_hicp_midx", filter_unit="I15", geos=geos, raw_dir=raw_dir)
+    hicp_ct = load_index("prc_hicp_cind", filter_unit="I15", geos=geos, raw_dir=raw_dir)
+    weights = load_index("prc_hicp_inw", geos=geos, raw_dir=raw_dir)
+    if geos is None:
+        print("Merging HICP, HICP-CT and weights...")
+    panel, stats = merge_indices(hicp, hicp_ct, weights, geo_cats, coicop_cats)
+    time = panel.column("time").to_numpy()
+    stats.update({
+        "hicp_missing": int(np.isnan(hicp["value"]).sum()),
+        "hicp_ct_missing": int(np.isnan(hicp_ct["value"]).sum()),
+        "weight_missing": int(np.isnan(panel.column("weight").to_numpy()).sum()),
+        "time_min": int(time.min()) if len(time) else None,
+        "time_max": int(time.max()) if len(time) else None,
+    })
+    return panel, stats
+
+def _merge_geo(geo, geo_cats, coicop_cats, raw_dir):
+    return merge_partition([geo], geo_cats, coicop_cats, raw_dir)
+
+def quality_report(stats):
+    """Data quality report from the per-partition counts of ``merge_partition``."""
+    total = {k: sum(s[k] for s in stats) for k in
+             ("hicp_rows", "hicp_ct_rows", "merged_rows", "hicp_missing", "hicp_ct_missing", "weight_missing")}
+    times = [t for s in stats for t in (s["time_min"], s["time_max"]) if t is not None]
+    time_min, time_max = abs_month_to_period([min(times), max(times)]) if times else (None, None)
+
+    def rate(missing, rows):
+        return float(total[missing] / total[rows]) if total[rows] else float("nan")
+
+    return {
+        "hicp_rows": total["hicp_rows"],
+        "hicp_ct_rows": total["hicp_ct_rows"],
+        "merged_rows": total["merged_rows"],
+        "overlap_ratio": float(total["merged_rows"] / max(total["hicp_rows"], 1)),
+        "time_min": time_min,
+        "time_max": time_max,
+        "missing_hicp_rate": rate("hicp_missing", "hicp_rows"),
+        "missing_hicp_ct_rate": rate("hicp_ct_missing", "hicp_ct_rows"),
+        "missing_weight_rate": rate("weight_missing", "merged_rows"),
+    }
+
+def write_panel(panels, path, row_group_rows=ROW_GROUP_ROWS):
+    """
+    Write sorted panel tables, in order, with one or more row groups per geo.
+
+    ``panels`` is a table or an iterable of them (e.g. one per geo, written
+    as each arrives). Dictionary-encoded columns, min/max statistics and
+    the page index let a reader filtering on geo (or geo and coicop) skip
+    every other row group.
+    """
+    if isinstance(panels, pa.Table):
+        panels = [panels]
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, PANEL_SCHEMA, use_dictionary=True, write_statistics=True,
+                          write_page_index=True) as writer:
+        for panel in panels:
+            geo = panel.column("geo").combine_chunks().indices.to_numpy()
+            bounds = np.concatenate([[0], np.flatnonzero(np.diff(geo)) + 1, [len(geo)]])
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                if hi > lo:
+                    writer.write_table(panel.slice(lo, hi - lo), row_group_size=row_group_rows)
+    os.replace(tmp_path, path)
+
+def build_panel(output_path, by_geo=False, n_jobs=1):
+    """
+    Merge the raw indices into ``output_path``; returns the data quality report.
+
+    By default everything is loaded and merged at once. With ``by_geo``
+    each geo is loaded, merged and appended to the output on its own (on
+    ``n_jobs`` processes), so memory is bounded by a few geos however large
+    the panel; the output is the same.
+    """
+    if by_geo:
+        geos = sorted(raw_categories("prc_hicp_midx", "geo") | raw_categories("prc_hicp_cind", "geo"))
+        names = ("prc_hicp_midx", "prc_hicp_cind", "prc_hicp_inw")
+        geo_cats = sorted(set(geos) | raw_categories("prc_hicp_inw", "geo"))
+        coicop_cats = sorted(set().union(*(raw_categories(n, "coicop") for n in names)))
+        print(f"Merging {len(geos)} geos on {n_jobs} job(s)...")
+        parts = map_partitions(partial(_merge_geo, geo_cats=geo_cats, coicop_cats=coicop_cats,
+                                       raw_dir=RAW_DIR), geos, n_jobs)
+    else:
+        parts = [merge_partition()]
+
+    stats = []
+
+    def panels():
+        for panel, part_stats in parts:
+            stats.append(part_stats)
+            yield panel
+
+    write_panel(panels(), output_path)
+    print(f"Saved merged data to {output_path} ({sum(s['merged_rows'] for s in stats)} rows)")
+    return quality_report(stats)
 
 def main():
     if not os.path.exists(PROCESSED_DIR):
@@ -45,71 +260,13 @@ def main():
     if not os.path.exists(METADATA_DIR):
         os.makedirs(METADATA_DIR)
 
-    # 1. Load HICP (I15)
-    # Ensure we use Index 2015=100
-    hicp = load_and_clean("prc_hicp_midx", "hicp", filter_unit="I15")
-    
-    # 2. Load HICP-CT (I15)
-    hicp_ct = load_and_clean("prc_hicp_cind", "hicp_ct", filter_unit="I15")
-    
-    # Validation: Check overlap
-    common_ids = pd.merge(hicp[['geo', 'coicop', 'time']], hicp_ct[['geo', 'coicop', 'time']], on=['geo', 'coicop', 'time'], how='inner')
-    overlap_ratio = len(common_ids) / max(len(hicp), 1)
-    if overlap_ratio < 0.5:
+    # HICP and HICP-CT as Index 2015=100; weights are annual
+    processing = CONFIG.get("processing", {})
+    quality = build_panel(os.path.join(PROCESSED_DIR, "merged_indices.parquet"),
+                          by_geo=processing.get("by_geo", False), n_jobs=processing.get("n_jobs", 1))
+    if quality["overlap_ratio"] < 0.5:
         print("Warning: Low overlap between HICP and HICP-CT. Check data integrity.")
 
-    # 3. Merge HICP and HICP-CT
-    print("Merging HICP and HICP-CT...")
-    merged = pd.merge(hicp, hicp_ct, on=['geo', 'coicop', 'time'], how='inner')
-    
-    # 4. Load Weights
-    # Weights are annual. Time format might be "2015".
-    weights = load_and_clean("prc_hicp_inw", "weight")
-    
-    # Create 'year' column for merging
-    # HICP time is YYYY-MM
-    merged['year'] = merged['time'].str[:4].astype(int)
-    
-    # Weights time is usually YYYY (int or str)
-    # Let's inspect weights time format. Assuming it is string "YYYY" from fetch.py
-    # If fetch.py treated "2015" as "2015", it is fine.
-    # But sometimes Eurostat annual data might be "2015" or "2015A00" etc.
-    # Let's try to convert to int.
-    try:
-        weights['year'] = weights['time'].astype(str).str[:4].astype(int)
-    except:
-        print("Warning: Could not parse year from weights time column. Check data.")
-        print(weights['time'].unique()[:5])
-    
-    # Drop time column from weights to avoid conflict
-    weights = weights.drop(columns=['time'])
-    
-    # Merge Weights
-    print("Merging Weights...")
-    final_df = pd.merge(merged, weights, on=['geo', 'coicop', 'year'], how='left')
-    
-    # Save
-    output_path = os.path.join(PROCESSED_DIR, "merged_indices.parquet")
-    final_df.to_parquet(output_path, index=False)
-    print(f"Saved merged data to {output_path} ({len(final_df)} rows)")
-
-    # Data quality report
-    time_vals = merged['time'].dropna().astype(str)
-    time_min = time_vals.min() if not time_vals.empty else None
-    time_max = time_vals.max() if not time_vals.empty else None
-
-    quality = {
-        "hicp_rows": int(len(hicp)),
-        "hicp_ct_rows": int(len(hicp_ct)),
-        "merged_rows": int(len(merged)),
-        "overlap_ratio": float(overlap_ratio),
-        "time_min": time_min,
-        "time_max": time_max,
-        "missing_hicp_rate": float(hicp['hicp'].isna().mean()),
-        "missing_hicp_ct_rate": float(hicp_ct['hicp_ct'].isna().mean()),
-        "missing_weight_rate": float(final_df['weight'].isna().mean()),
-    }
-
     quality_path = os.path.join(METADATA_DIR, "data_quality.json")
     with open(quality_path, "w") as f:
         json.dump(quality, f, indent=2)
@@ -1,10 +1,17 @@
-import eurostat
+import gzip
+import numpy as np
 import pandas as pd
 import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+import random
+import requests
+import shutil
+import threading
 import time
 import json
-import hashlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -13,85 +20,520 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from src.utils.config import load_config
-from src.utils.time_parse import normalize_time
+from src.utils.hashing import hash_path
+from src.utils.time_parse import abs_month_to_period, to_abs_month
 
 DATA_DIR = "data/raw"
+DOWNLOAD_DIR = os.path.join(DATA_DIR, "downloads")
 METADATA_DIR = "output/metadata"
+ROW_HASH_DIR = os.path.join(METADATA_DIR, "row_hashes")
+
+# Bulk TSV endpoint used by the eurostat package
+EUROSTAT_BASE_URL = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Blocks are buffered per geo up to this many rows, so scans see few, large row groups
+ROW_GROUP_ROWS = 128_000
 
 CONFIG = load_config()
-datasets = CONFIG.get("fetch", {}).get("datasets", [
+FETCH_CONFIG = CONFIG.get("fetch", {})
+datasets = FETCH_CONFIG.get("datasets", [
     "prc_hicp_midx",  # HICP (2015=100) - monthly
     "prc_hicp_cind",  # HICP-CT (Constant Tax) - monthly
     "prc_hicp_inw",   # Item weights
     "prc_hicp_cmon"   # Monthly change (for validation)
 ])
 
-def _hash_file(path):
-    hasher = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
 
-def fetch_and_save(code, manifest_records, hash_records):
+class RateLimiter:
+    """Spaces request starts at least ``min_interval`` seconds apart across threads."""
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def dataset_url(code, base_url=EUROSTAT_BASE_URL, start_period=None):
+    url = f"{base_url.rstrip('/')}/data/{code}?format=TSV&compressed=true"
+    if start_period:
+        url += f"&startPeriod={start_period}"
+    return url
+
+
+def _validators(headers):
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def download(url, dest, session=None, limiter=None, max_retries=4, backoff=1.0, timeout=60):
+    """
+    Download ``url`` to ``dest``, resuming from ``dest + '.part'`` if present.
+
+    A partial file is continued with a ``Range`` request guarded by
+    ``If-Range`` (the validator of the response it came from), so a
+    server that does not support ranges, or whose file changed, sends
+    the whole body again. Connection errors, truncated bodies and
+    429/5xx responses are retried up to ``max_retries`` times with
+    exponential backoff (honouring ``Retry-After``); other HTTP errors
+    are raised at once. Returns the ``etag``/``last_modified`` of the
+    downloaded version.
+    """
+    session = session or requests.Session()
+    limiter = limiter or RateLimiter()
+    part = f"{dest}.part"
+    part_meta = f"{part}.json"
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+    for attempt in range(max_retries + 1):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        meta = _read_json(part_meta)
+        validator = meta.get("etag") or meta.get("last_modified")
+        headers = {}
+        if offset and validator:
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        limiter.wait()
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+                if resp.status_code == 416:
+                    # Stale partial file: start over
+                    os.remove(part)
+                    continue
+                if resp.status_code in RETRY_STATUS and attempt < max_retries:
+                    delay = backoff * 2 ** attempt
+                    retry_after = resp.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    time.sleep(delay * (1 + 0.1 * random.random()))
+                    continue
+                resp.raise_for_status()
+
+                resumed = resp.status_code == 206
+                if not resumed:
+                    offset = 0
+                    meta = {"url": url, **_validators(resp.headers)}
+                    with open(part_meta, "w") as f:
+                        json.dump(meta, f)
+                length = resp.headers.get("Content-Length")
+                expected = offset + int(length) if length is not None else None
+                with open(part, "ab" if resumed else "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+            size = os.path.getsize(part)
+            if expected is not None and size < expected:
+                raise requests.ConnectionError(f"Truncated download: {size} of {expected} bytes")
+        except requests.RequestException as e:
+            if isinstance(e, requests.HTTPError) or attempt == max_retries:
+                raise
+            print(f"Retrying {url} after error: {e}")
+            time.sleep(backoff * 2 ** attempt)
+            continue
+
+        os.replace(part, dest)
+        if os.path.exists(part_meta):
+            os.remove(part_meta)
+        return {"etag": meta.get("etag"), "last_modified": meta.get("last_modified")}
+    raise RuntimeError(f"Download of {url} failed after {max_retries + 1} attempts")
+
+
+# Typed long format: dimensions as dictionary-encoded strings, time as
+# absolute month (year * 12 + month), value as float32
+DIMENSION_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+
+def long_schema(dimensions):
+    return pa.schema([*(pa.field(d, DIMENSION_TYPE) for d in dimensions),
+                      pa.field("time", pa.int32()), pa.field("value", pa.float32())])
+
+
+def _dimensions(first_field):
+    """Dimension names from the first header field, e.g. ``freq,unit,coicop,geo\\TIME_PERIOD``."""
+    dimensions = [c.lower() for c in first_field.split(",")]
+    dimensions[-1] = dimensions[-1].split("\\")[0]
+    return dimensions
+
+
+def _parse_values(column):
+    """Eurostat cells as float32: status flags dropped, ':' missing."""
+    token = column.str.strip().str.split(" ", n=1).str[0]
+    return pd.to_numeric(token.where(token != ":"), errors="coerce").to_numpy(dtype=np.float32)
+
+
+def iter_long_frames(path, block_rows=20_000, block_periods=24):
+    """
+    Typed long-format blocks of a compressed Eurostat TSV.
+
+    The wide table is read ``block_rows`` series at a time and each of
+    those is melted ``block_periods`` period columns at a time, so memory
+    stays bounded by one block whatever the size of the dataset. Period
+    labels are parsed once per column; dimension columns (lower-cased,
+    ``geo\\time_period`` renamed to ``geo``) become categoricals whose codes
+    are tiled instead of repeating strings. Rows come out period-major
+    within each block, as ``DataFrame.melt`` orders them.
+    """
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = pd.read_csv(f, sep="\t", dtype=str, keep_default_na=False, chunksize=block_rows)
+        for raw in reader:
+            if raw.empty:
+                continue
+            first = raw.columns[0]
+            dimensions = _dimensions(first)
+            ids = raw[first].str.split(",", expand=True)
+            labels = [c.strip() for c in raw.columns[1:]]
+            months = to_abs_month(labels)
+            codes = {}
+            for j, dim in enumerate(dimensions):
+                cat = pd.Categorical(ids[j].to_numpy())
+                codes[dim] = (cat.codes.astype(np.int32), cat.categories)
+            n = len(raw)
+            for lo in range(0, len(labels), block_periods):
+                hi = min(lo + block_periods, len(labels))
+                block = {dim: pd.Categorical.from_codes(np.tile(c, hi - lo), categories)
+                         for dim, (c, categories) in codes.items()}
+                block["time"] = np.repeat(months[lo:hi], n)
+                block["value"] = np.concatenate(
+                    [_parse_values(raw.iloc[:, 1 + j]) for j in range(lo, hi)])
+                yield pd.DataFrame(block)
+
+
+def _to_batch(frame, schema):
+    return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def write_long_dataset(frames, output_dir, dimensions):
+    """
+    Write long frames as a parquet dataset partitioned by geo (``geo=XX/``).
+
+    The dataset is built next to ``output_dir`` and swapped in at the end
+    (the old version is moved aside first and deleted last), so readers
+    never see a half-written table. An empty stream raises ValueError and
+    leaves the existing dataset in place.
+    """
+    schema = long_schema(dimensions)
+    tmp_dir = f"{output_dir}.tmp"
+    old_dir = f"{output_dir}.old"
+    n_rows = 0
+
+    def batches():
+        nonlocal n_rows
+        for frame in frames:
+            n_rows += len(frame)
+            yield _to_batch(frame, schema)
+
+    _remove(tmp_dir)
+    ds.write_dataset(batches(), tmp_dir, schema=schema,
+                     format="parquet", partitioning=["geo"], partitioning_flavor="hive",
+                     existing_data_behavior="overwrite_or_ignore", max_partitions=4096,
+                     min_rows_per_group=ROW_GROUP_ROWS, max_rows_per_group=ROW_GROUP_ROWS)
+    if not n_rows:
+        _remove(tmp_dir)
+        raise ValueError(f"No rows to write to {output_dir}; keeping the existing dataset")
+    _remove(old_dir)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    _remove(old_dir)
+
+
+def _remove(path):
+    """Delete a file or directory tree if it exists."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def read_long(path, **kwargs):
+    """Read a raw dataset (all of it, or e.g. ``filters=[('geo', 'in', [...])]``)."""
+    df = pd.read_parquet(path, **kwargs)
+    if "geo" in df.columns:
+        df["geo"] = df["geo"].astype(str).astype("category")
+    return df
+
+
+def check_for_update(url, previous, session=None, limiter=None, timeout=60):
+    """
+    Conditional HEAD request against the validators of the stored version.
+
+    Returns ``(changed, validators)``; a server without validators counts
+    as changed, so the caller falls back to a (cheap) delta download.
+    """
+    session = session or requests.Session()
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    if limiter:
+        limiter.wait()
+    resp = session.head(url, headers=headers, timeout=timeout)
+    if resp.status_code == 304:
+        return False, {k: previous.get(k) for k in ("etag", "last_modified")}
+    resp.raise_for_status()
+    validators = _validators(resp.headers)
+    same = (validators["etag"] is not None and validators["etag"] == previous.get("etag")) or \
+           (validators["etag"] is None and validators["last_modified"] is not None
+            and validators["last_modified"] == previous.get("last_modified"))
+    return not same, validators
+
+
+def _key_columns(df_long):
+    return [c for c in df_long.columns if c not in ("time", "value")]
+
+
+def _row_hash(df_long):
+    return pd.util.hash_pandas_object(df_long[_key_columns(df_long) + ['time', 'value']],
+                                      index=False).to_numpy()
+
+
+def row_hashes(df_long, tail_months):
+    """Per-row hashes (series key, time, value) of the rows in ``tail_months``."""
+    tail = df_long[df_long['time'].isin(tail_months)]
+    hashes = tail[_key_columns(tail) + ['time']].reset_index(drop=True)
+    hashes['row_hash'] = _row_hash(tail)
+    return hashes
+
+
+def _header(path):
+    """Dimension names and absolute months of the period columns of a compressed TSV."""
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        fields = f.readline().rstrip("\r\n").split("\t")
+    return _dimensions(fields[0]), to_abs_month(fields[1:]).tolist()
+
+
+def _is_annual(df_long):
+    return "freq" in df_long.columns and len(df_long) > 0 and str(df_long["freq"].iloc[0]) == "A"
+
+
+class _LongStats:
+    """Running manifest statistics and tail rows of frames streamed to disk."""
+
+    def __init__(self, tail_months):
+        self.tail_months = tail_months
+        self.rows = self.missing = 0
+        self.time_min = self.time_max = None
+        self.annual = False
+        self.tail = []
+
+    def update(self, frame):
+        self.rows += len(frame)
+        self.missing += int(frame['value'].isna().sum())
+        if len(frame):
+            lo, hi = int(frame['time'].min()), int(frame['time'].max())
+            self.time_min = lo if self.time_min is None else min(self.time_min, lo)
+            self.time_max = hi if self.time_max is None else max(self.time_max, hi)
+            self.annual = _is_annual(frame)
+        tail = frame[frame['time'].isin(self.tail_months)]
+        if len(tail):
+            self.tail.append(tail)
+        return frame
+
+    @classmethod
+    def of(cls, df_long, tail_months):
+        stats = cls(tail_months)
+        stats.update(df_long)
+        return stats
+
+    def tail_frame(self):
+        return _categorize(pd.concat(self.tail, ignore_index=True)) if self.tail else None
+
+
+def _categorize(df_long):
+    for col in _key_columns(df_long):
+        df_long[col] = df_long[col].astype(str).astype("category")
+    return df_long
+
+
+def _record(code, stats, validators, refresh, bytes_downloaded):
+    labels = (abs_month_to_period([stats.time_min, stats.time_max], annual=stats.annual)
+              if stats.rows else [None, None])
+    return {
+        "dataset": code,
+        "rows": stats.rows,
+        "time_min": labels[0],
+        "time_max": labels[1],
+        "missing_rate": stats.missing / max(stats.rows, 1),
+        **validators,
+        "refresh": refresh,
+        "bytes_downloaded": int(bytes_downloaded),
+    }
+
+
+def fetch_dataset(code, session=None, limiter=None, base_url=EUROSTAT_BASE_URL, previous=None,
+                  full=False, overlap_periods=3, max_retries=4, backoff=1.0, timeout=60,
+                  block_rows=20_000, block_periods=24):
+    """
+    Refresh one dataset and save it; returns its manifest record and hash.
+
+    The table is stored in typed long format (see ``iter_long_frames``)
+    as a parquet dataset partitioned by geo, ``data/raw/<code>/``; a full
+    download is converted and written block by block.
+
+    With a ``previous`` manifest record (holding the ETag/Last-Modified of
+    the stored version), the stored dataset and its row hashes, a
+    conditional request first checks for a new version and an unchanged
+    dataset is not downloaded at all (``previous`` is returned). A changed
+    one is fetched from the first of its last ``overlap_periods`` stored
+    periods onwards: rows whose hash is unchanged are kept, revised rows
+    and new periods are merged into the dataset. Series the stored table
+    does not have, or ``full=True``, trigger a full download.
+    """
     print(f"Fetching {code}...")
-    try:
-        # get_data_df returns a pandas dataframe
-        df = eurostat.get_data_df(code)
-        if df is not None and not df.empty:
-            # Rename columns to lowercase for consistency
-            df.columns = [c.lower() for c in df.columns]
-            
-            # Melt the dataframe to long format (Eurostat returns wide format with dates as columns)
-            # Identifying ID columns (usually the first few columns like unit, coicop, geo)
-            id_vars = [c for c in df.columns if not c[0].isdigit() and not c.startswith('19') and not c.startswith('20')]
-            value_vars = [c for c in df.columns if c not in id_vars]
-            
-            df_long = df.melt(id_vars=id_vars, value_vars=value_vars, var_name='time', value_name='value')
-            df_long['time'] = df_long['time'].map(normalize_time)
-            
-            # Clean time column (remove letters, keep YYYY-MM)
-            # Eurostat time format in columns is often '2020M01' or just '2020M01'
-            # But the column names in the dataframe from eurostat package might be just '2020M01'
-            
-            output_path = os.path.join(DATA_DIR, f"{code}.parquet")
-            df_long.to_parquet(output_path, index=False)
-            print(f"Saved {code} to {output_path} ({len(df_long)} rows)")
-
-            time_vals = df_long['time'].dropna().astype(str)
-            time_min = time_vals.min() if not time_vals.empty else None
-            time_max = time_vals.max() if not time_vals.empty else None
-            missing_rate = df_long['value'].isna().mean()
-
-            manifest_records.append({
-                "dataset": code,
-                "rows": len(df_long),
-                "time_min": time_min,
-                "time_max": time_max,
-                "missing_rate": float(missing_rate)
-            })
-            hash_records[code] = _hash_file(output_path)
+    retry = dict(max_retries=max_retries, backoff=backoff, timeout=timeout)
+    output_path = os.path.join(DATA_DIR, code)
+    row_hash_path = os.path.join(ROW_HASH_DIR, f"{code}.parquet")
+    os.makedirs(ROW_HASH_DIR, exist_ok=True)
+
+    delta = None
+    if previous and not full and os.path.isdir(output_path) and os.path.exists(row_hash_path):
+        changed, validators = check_for_update(dataset_url(code, base_url), previous,
+                                               session, limiter, timeout)
+        if not changed:
+            print(f"{code} unchanged since {previous.get('last_modified') or previous.get('etag')}")
+            return {**previous, "refresh": "unchanged", "bytes_downloaded": 0}, hash_path(output_path)
+
+        stored = pd.read_parquet(row_hash_path)
+        start = int(stored['time'].min())
+        gz_path = os.path.join(DOWNLOAD_DIR, f"{code}.delta.tsv.gz")
+        start_label = abs_month_to_period([start], annual=_is_annual(stored))[0]
+        download(dataset_url(code, base_url, start_label), gz_path, session, limiter, **retry)
+        size = os.path.getsize(gz_path)
+        delta = _categorize(pd.concat(iter_long_frames(gz_path, block_rows, block_periods),
+                                      ignore_index=True))
+        os.remove(gz_path)
+        keys = _key_columns(delta)
+        delta = delta[delta['time'] >= start]
+        if list(stored.columns[:-2]) != keys:
+            print(f"{code}: dimensions changed, falling back to a full download")
+            delta = None
+        else:
+            new_series = delta[keys].drop_duplicates().merge(
+                stored[keys].drop_duplicates(), how='left', indicator=True)['_merge'] == 'left_only'
+            if new_series.any():
+                print(f"{code}: {int(new_series.sum())} new series, falling back to a full download")
+                delta = None
+
+    if delta is not None:
+        delta_hashes = delta[keys + ['time']].reset_index(drop=True)
+        delta_hashes['row_hash'] = _row_hash(delta)
+        compared = delta_hashes.merge(stored, on=keys + ['time'], how='left', suffixes=('', '_stored'))
+        n_changed = int((compared['row_hash'] != compared['row_hash_stored']).sum())
+        # Stored rows of the overlap window that the new version withdrew
+        n_removed = int((stored[keys + ['time']].merge(delta_hashes[keys + ['time']], how='left',
+                                                       indicator=True)['_merge'] == 'left_only').sum())
+        existing = read_long(output_path)[keys + ['time', 'value']]
+        if n_changed == 0 and n_removed == 0:
+            print(f"{code}: no new, revised or removed rows")
+            df_long = existing
         else:
-            print(f"Warning: {code} returned empty data")
-    except Exception as e:
-        print(f"Error fetching {code}: {e}")
+            df_long = _categorize(pd.concat([existing[existing['time'] < start], delta],
+                                            ignore_index=True))
+            write_long_dataset([df_long], output_path, keys)
+            print(f"Merged {n_changed} new or revised rows and dropped {n_removed} removed rows "
+                  f"from {start_label} into {output_path} ({len(df_long)} rows, {size} bytes downloaded)")
+        tail_months = sorted(df_long['time'].unique())[-overlap_periods:]
+        stats = _LongStats.of(df_long, tail_months)
+        refresh = "delta"
+    else:
+        gz_path = os.path.join(DOWNLOAD_DIR, f"{code}.tsv.gz")
+        validators = download(dataset_url(code, base_url), gz_path, session, limiter, **retry)
+        size = os.path.getsize(gz_path)
+        dimensions, months = _header(gz_path)
+        stats = _LongStats(sorted(m for m in set(months) if m is not None)[-overlap_periods:])
+        try:
+            write_long_dataset((stats.update(frame)
+                                for frame in iter_long_frames(gz_path, block_rows, block_periods)),
+                               output_path, dimensions)
+        finally:
+            os.remove(gz_path)
+        print(f"Saved {code} to {output_path} ({stats.rows} rows)")
+        refresh = "full"
+
+    tail = stats.tail_frame()
+    if tail is not None:
+        row_hashes(tail, stats.tail_months).to_parquet(row_hash_path, index=False)
+    return _record(code, stats, validators, refresh, size), hash_path(output_path)
+
+
+def fetch_all(codes, max_workers=4, min_request_interval=0.5, base_url=EUROSTAT_BASE_URL,
+              previous=None, full=False, overlap_periods=3, max_retries=4, backoff=1.0, timeout=60):
+    """
+    Refresh ``codes`` concurrently on a bounded thread pool.
+
+    Request starts are spaced by ``min_request_interval`` seconds across
+    all workers; ``previous`` maps dataset codes to their last manifest
+    record for conditional/delta refreshes (see ``fetch_dataset``).
+    Returns the manifest records and hashes of the datasets that
+    succeeded (in ``codes`` order) and the errors of those that failed.
+    """
+    limiter = RateLimiter(min_request_interval)
+    local = threading.local()
+    previous = previous or {}
+
+    def task(code):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return fetch_dataset(code, local.session, limiter, base_url, previous=previous.get(code),
+                             full=full, overlap_periods=overlap_periods, max_retries=max_retries,
+                             backoff=backoff, timeout=timeout)
+
+    manifest, hashes, errors = [], {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {code: pool.submit(task, code) for code in codes}
+        for code, future in futures.items():
+            try:
+                record, digest = future.result()
+            except Exception as e:
+                print(f"Error fetching {code}: {e}")
+                errors[code] = str(e)
+                continue
+            manifest.append(record)
+            hashes[code] = digest
+    return manifest, hashes, errors
+
 
 if __name__ == "__main__":
+    full = "--full" in sys.argv[1:]  # ignore stored versions and download everything
+
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
     if not os.path.exists(METADATA_DIR):
         os.makedirs(METADATA_DIR)
 
-    manifest = []
-    hashes = {}
+    manifest_path = os.path.join(METADATA_DIR, "data_manifest.json")
+    previous = {r["dataset"]: r for r in _read_json(manifest_path).get("datasets", [])}
+
     fetch_timestamp = datetime.now(timezone.utc).isoformat()
-        
-    for code in datasets:
-        fetch_and_save(code, manifest, hashes)
-        time.sleep(1) # Be nice to the API
+    manifest, hashes, errors = fetch_all(
+        datasets,
+        max_workers=FETCH_CONFIG.get("max_workers", 4),
+        min_request_interval=FETCH_CONFIG.get("min_request_interval", 0.5),
+        base_url=FETCH_CONFIG.get("base_url", EUROSTAT_BASE_URL),
+        previous=previous,
+        full=full,
+        overlap_periods=FETCH_CONFIG.get("overlap_periods", 3),
+        max_retries=FETCH_CONFIG.get("max_retries", 4),
+        backoff=FETCH_CONFIG.get("backoff", 1.0),
+        timeout=FETCH_CONFIG.get("timeout", 60),
+    )
+    # Keep the records of datasets that failed this time
+    fetched = {r["dataset"] for r in manifest}
+    manifest += [r for code, r in previous.items() if code in errors and code not in fetched]
 
-    manifest_path = os.path.join(METADATA_DIR, "data_manifest.json")
     with open(manifest_path, "w") as f:
         json.dump({
             "fetched_at_utc": fetch_timestamp,
@@ -99,5 +541,9 @@ if __name__ == "__main__":
         }, f, indent=2)
 
     hashes_path = os.path.join(METADATA_DIR, "data_hashes.json")
+    hashes = {**{k: v for k, v in _read_json(hashes_path).items() if k in errors}, **hashes}
     with open(hashes_path, "w") as f:
         json.dump(hashes, f, indent=2)
+
+    if errors:
+        sys.exit(f"Failed to fetch: {', '.join(errors)}")
@@ -3,6 +3,12 @@ import numpy as np
 import os
 import json
 import sys
+import shutil
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from functools import partial
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
@@ -10,113 +16,500 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from src.utils.config import load_config
-from src.utils.time_parse import normalize_time
+from src.utils.partitions import map_partitions, resolve_jobs
+from src.utils.time_parse import abs_month_to_period, to_abs_month
 
 PROCESSED_DIR = "data/processed"
 METADATA_DIR = "output/metadata"
 
 CONFIG = load_config()
 
-def _to_abs_month(val):
-    if pd.isna(val):
-        return np.nan
-    s = normalize_time(val)
-    if isinstance(s, str) and "-" in s:
-        parts = s.split("-")
-        if len(parts) >= 2:
-            try:
-                return int(parts[0]) * 12 + int(parts[1])
-            except ValueError:
-                pass
-    try:
-        dt = pd.to_datetime(s)
-        return int(dt.year) * 12 + int(dt.month)
-    except Exception:
-        return np.nan
+# Wedge panel and events column types: the merged panel stores geo/coicop as
+# dictionaries and the indices as float32, the analysis stages build string
+# keys from geo/coicop and regress on float64 logs
+PANEL_DTYPES = {'geo': str, 'coicop': str, 'hicp': np.float64, 'hicp_ct': np.float64,
+                'year': np.int64, 'weight': np.float64}
+
+def series_starts(df):
+    """Mask of the first row of every (geo, coicop) series of a panel sorted by series."""
+    start = np.ones(len(df), dtype=bool)
+    if len(df) > 1:
+        geo = pd.factorize(df['geo'])[0]
+        coicop = pd.factorize(df['coicop'])[0]
+        start[1:] = (geo[1:] != geo[:-1]) | (coicop[1:] != coicop[:-1])
+    return start
+
+def compute_wedge(df):
+    """
+    Add log indices, the tax wedge and its monthly change to a panel sorted
+    by geo, coicop and month.
+
+    TW = ln(HICP) - ln(HICP_CT), using the log difference approximation.
+    Series are contiguous blocks of the sorted panel, so ``delta_tw`` is a
+    single vectorized difference with each series' first month masked.
+    """
+    for col in ['hicp', 'hicp_ct']:
+        values = df[col].to_numpy()
+        df[col] = np.where(values > 0, values, np.nan).astype(values.dtype, copy=False)
+    df['log_hicp'] = np.log(df['hicp'])
+    df['log_hicp_ct'] = np.log(df['hicp_ct'])
+    df['tax_wedge'] = df['log_hicp'] - df['log_hicp_ct']
+
+    tax_wedge = df['tax_wedge'].to_numpy()
+    delta = np.empty_like(tax_wedge)
+    delta[1:] = tax_wedge[1:] - tax_wedge[:-1]
+    delta[series_starts(df)] = np.nan
+    df['delta_tw'] = delta
+    return df
+
+def classify_events(df, threshold):
+    """
+    Rows of a wedge panel whose |delta_tw| exceeds ``threshold``.
+
+    Tax Hike: Wedge increases (HICP grows faster than HICP-CT, or drops slower) -> Positive Delta TW
+    Tax Cut: Wedge decreases -> Negative Delta TW
+    """
+    events = df[np.abs(df['delta_tw']) > threshold].copy()
+    conditions = [
+        events['delta_tw'] > threshold,
+        events['delta_tw'] < -threshold
+    ]
+    choices = ['hike', 'cut']
+    events['event_type'] = np.select(conditions, choices, default='none')
+    return events
+
+def _neighbour_months(months, first):
+    """Previous and next event months within each series (NaN at its ends) of sorted events."""
+    last = np.ones_like(first)
+    last[:-1] = first[1:]
+    prev_month = np.full(len(months), np.nan)
+    next_month = np.full(len(months), np.nan)
+    prev_month[1:] = months[:-1]
+    next_month[:-1] = months[1:]
+    prev_month[first] = np.nan
+    next_month[last] = np.nan
+    return prev_month, next_month
 
 def apply_clean_window(events, window_months):
+    """
+    Flag events with no other event of their (geo, coicop) series within
+    ``window_months`` on either side.
+
+    After sorting, neighbouring events of a series are adjacent rows, so
+    the previous/next event months are array shifts masked at series
+    boundaries rather than groupby shifts.
+    """
     events = events.copy()
-    events['time'] = events['time'].map(normalize_time)
-    events['abs_month'] = events['time'].map(_to_abs_month)
+    events['abs_month'] = to_abs_month(events['time'])
+    events['time'] = abs_month_to_period(events['abs_month'])
     events = events.sort_values(['geo', 'coicop', 'abs_month'])
 
-    events['prev_event_time'] = events.groupby(['geo', 'coicop'])['abs_month'].shift(1)
-    events['next_event_time'] = events.groupby(['geo', 'coicop'])['abs_month'].shift(-1)
-    events['dist_prev'] = events['abs_month'] - events['prev_event_time']
-    events['dist_next'] = events['next_event_time'] - events['abs_month']
+    months = events['abs_month'].to_numpy(dtype=np.float64)
+    prev_month, next_month = _neighbour_months(months, series_starts(events))
+    events['prev_event_time'] = prev_month
+    events['next_event_time'] = next_month
+    events['dist_prev'] = months - prev_month
+    events['dist_next'] = next_month - months
 
     is_clean_prev = events['dist_prev'].isna() | (events['dist_prev'] > window_months)
     is_clean_next = events['dist_next'].isna() | (events['dist_next'] > window_months)
     events['is_clean'] = is_clean_prev & is_clean_next
     return events
 
+def detect_partition(df, threshold, window_months):
+    """
+    Wedge panel and flagged events of a sorted panel block.
+
+    Every (geo, coicop) series is independent, so any set of whole geos
+    can be processed on its own and the results concatenated.
+    """
+    df = compute_wedge(df)
+    return df, apply_clean_window(classify_events(df, threshold), window_months)
+
+def geo_blocks(df):
+    """Contiguous per-geo slices of a panel sorted by geo."""
+    geo = pd.factorize(df['geo'])[0]
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(geo)) + 1, [len(geo)]])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        yield df.iloc[lo:hi]
+
+def load_panel(path, row_groups=None, after_month=None):
+    """
+    Merged indices (or just the given row groups, or just the months after
+    the absolute month ``after_month``) sorted by geo, coicop and month,
+    with the compact storage types of the merged panel decoded to those of
+    the wedge panel (PANEL_DTYPES).
+
+    The ``after_month`` filter is pushed down to the parquet scan, so only
+    the matching rows are materialized.
+    """
+    if row_groups is not None:
+        df = pq.ParquetFile(path).read_row_groups(row_groups).to_pandas()
+    elif after_month is not None:
+        df = ds.dataset(path).to_table(filter=pc.field('time') > after_month).to_pandas()
+    else:
+        df = pd.read_parquet(path)
+    df['abs_month'] = to_abs_month(df['time'])
+    df['time'] = abs_month_to_period(df['abs_month'])
+    df = df.sort_values(['geo', 'coicop', 'abs_month']).drop(columns='abs_month')
+    return df.astype({col: dtype for col, dtype in PANEL_DTYPES.items() if col in df.columns})
+
+def geo_row_groups(path):
+    """
+    Row groups of each geo of the merged panel, from the row-group
+    statistics (clean.py never lets a group span two geos); None if the
+    file has no usable statistics.
+    """
+    meta = pq.ParquetFile(path).metadata
+    column = meta.schema.names.index('geo')
+    groups = {}
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max or stats.min != stats.max:
+            return None
+        groups.setdefault(stats.min, []).append(i)
+    return dict(sorted(groups.items()))
+
+def _detect_geo(row_groups, path, threshold, window_months):
+    return detect_partition(load_panel(path, row_groups), threshold, window_months)
+
+def _row_hashes(df):
+    """
+    Hash of each row's inputs to the wedge panel, summed per series to
+    detect revisions. Non-positive indices hash as NaN, as compute_wedge
+    stores them, so merged and wedge panel rows hash alike.
+    """
+    inputs = df[['time', 'hicp', 'hicp_ct', 'weight']].copy()
+    for col in ['hicp', 'hicp_ct']:
+        inputs[col] = inputs[col].where(inputs[col] > 0)
+    return pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+
+def series_state(df, events, check_months):
+    """
+    Per-series state at the end of a sorted wedge panel block: row count,
+    last month, checksum of the rows of its last ``check_months`` months
+    and month of the last event.
+    """
+    first = series_starts(df)
+    start = np.flatnonzero(first)
+    last = np.append(start[1:], len(df)) - 1
+    months = to_abs_month(df['time'])
+    tail = months > (months[last] - check_months)[np.cumsum(first) - 1]
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    hashes[tail] = _row_hashes(df[tail])
+    state = pd.DataFrame({
+        'geo': df['geo'].iloc[last].astype(str).to_numpy(),
+        'coicop': df['coicop'].iloc[last].astype(str).to_numpy(),
+        'n_rows': np.diff(np.append(start, len(df))),
+        'last_month': months[last],
+        'tail_checksum': np.add.reduceat(hashes, start) if len(df) else hashes,
+    })
+    # Events come sorted by series and month, like the panel
+    last_event = np.append(series_starts(events)[1:], True) if len(events) else np.zeros(0, dtype=bool)
+    last_events = pd.DataFrame({
+        'geo': events['geo'][last_event].astype(str).to_numpy(),
+        'coicop': events['coicop'][last_event].astype(str).to_numpy(),
+        'last_event_month': events['abs_month'][last_event].to_numpy(dtype=np.float64),
+    })
+    return state.merge(last_events, on=['geo', 'coicop'], how='left')
+
+def _state_params(threshold, window_months, check_months):
+    return {"event_threshold": threshold, "clean_window_months": window_months,
+            "incremental_check_months": check_months}
+
+def write_state(state, path, threshold, window_months, check_months):
+    table = pa.Table.from_pandas(state, preserve_index=False)
+    params = json.dumps(_state_params(threshold, window_months, check_months))
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"detect_params": params.encode()})
+    pq.write_table(table, path)
+
+def load_state(path, threshold, window_months, check_months):
+    """Persisted series state, or None if missing or written for other detection parameters."""
+    if not os.path.exists(path):
+        return None
+    table = pq.read_table(path)
+    params = json.loads((table.schema.metadata or {}).get(b"detect_params", b"{}"))
+    if params != _state_params(threshold, window_months, check_months):
+        return None
+    return table.to_pandas()
+
+def _series_keys(geo, coicop):
+    """Strings whose lexical order is the (geo, coicop) order."""
+    return (pd.Series(geo).astype(str) + "\x00" + pd.Series(coicop).astype(str)).to_numpy(dtype=object)
+
+def _panel_part(panel_path, index):
+    return os.path.join(panel_path, f"part-{index:05d}.parquet")
+
+def panel_parts(panel_path):
+    """
+    Part files of the wedge panel, in order; None if it is not a directory.
+
+    The wedge panel is a parquet dataset directory: a full run writes
+    ``part-00000`` sorted by geo, coicop and month, and every incremental
+    run appends the new months as the next part, sorted the same way.
+    """
+    if not os.path.isdir(panel_path):
+        return None
+    return sorted(name for name in os.listdir(panel_path) if name.startswith("part-"))
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def detect_incremental(merged_path, panel_path, events_path, state, threshold, window_months, check_months):
+    """
+    Extend the panel, events list and series state with the months after
+    each series' last processed month.
+
+    Only each series' last ``check_months`` processed months and the months
+    after them are read, through a filter pushed down to the merged panel
+    scan. Those processed months are checked row by row against the state's
+    checksum, and the merged panel's total row count against the processed
+    count plus the new rows; any difference (a revision within the checked
+    months, a backfill or a removed row) returns None so that the caller
+    runs in full. ``check_months`` must therefore cover the periods the
+    fetch stage re-fetches on a delta refresh.
+
+    The new rows are differenced after the last checked row of their
+    series and appended to the panel as a new part. The only existing
+    events whose ``is_clean`` can change are the last processed events of
+    series with a new event within ``window_months`` of them, and only
+    those are revisited. Returns ``(events, state)``.
+    """
+    parts = panel_parts(panel_path)
+    if not parts:
+        return None
+    df = load_panel(merged_path, after_month=int(state['last_month'].min()) - check_months)
+    months = to_abs_month(df['time'])
+    geo, coicop = pd.Categorical(df['geo']), pd.Categorical(df['coicop'])
+    n_coicop = len(coicop.categories)
+
+    # State row of every row read (-1 for series never processed)
+    lookup = np.full(len(geo.categories) * n_coicop, -1, dtype=np.int64)
+    state_geo = geo.categories.get_indexer(state['geo'])
+    state_coicop = coicop.categories.get_indexer(state['coicop'])
+    known = (state_geo >= 0) & (state_coicop >= 0)
+    lookup[state_geo[known] * n_coicop + state_coicop[known]] = np.flatnonzero(known)
+    idx = lookup[geo.codes.astype(np.int64) * n_coicop + coicop.codes]
+    if (idx < 0).any():
+        # A new series needs its whole history
+        return None
+    last_month = state['last_month'].to_numpy()[idx]
+    new = months > last_month
+    keep = new | (months > last_month - check_months)
+    df, idx, new = df[keep], idx[keep], new[keep]
+
+    # The processed history must be unchanged: same row count, same checked rows
+    n_new = np.bincount(idx[new], minlength=len(state))
+    if pq.ParquetFile(merged_path).metadata.num_rows - n_new.sum() != state['n_rows'].sum():
+        return None
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    hashes[~new] = _row_hashes(df[~new])
+    checksum = np.zeros(len(state), dtype=np.uint64)
+    np.add.at(checksum, idx, hashes)
+    if (checksum != state['tail_checksum'].to_numpy()).any():
+        return None
+
+    # Differencing the checked rows with the new ones continues each series
+    # from its last processed wedge
+    df = compute_wedge(df.copy())
+    new_rows = df[new]
+
+    # Flags of the new events, then the first of each series against the last processed event
+    new_events = apply_clean_window(classify_events(new_rows, threshold), window_months)
+    event_idx = pd.Series(idx[new], index=new_rows.index).loc[new_events.index].to_numpy()
+    prev_event = state['last_event_month'].to_numpy()[event_idx]
+    close = series_starts(new_events) & (new_events['abs_month'].to_numpy() - prev_event <= window_months)
+    is_clean = new_events['is_clean'].to_numpy().copy()
+    is_clean[close] = False
+    new_events['is_clean'] = is_clean
+
+    columns = ['geo', 'coicop', 'time', 'event_type', 'delta_tw', 'is_clean']
+    events = pd.read_parquet(events_path)
+    revisit = state.iloc[event_idx[close]]
+    revisit_keys = set(_series_keys(revisit['geo'], revisit['coicop'])
+                       + "\x00" + abs_month_to_period(revisit['last_event_month']))
+    if revisit_keys:
+        keys = _series_keys(events['geo'], events['coicop']) + "\x00" + events['time'].astype(str).to_numpy()
+        events.loc[pd.Series(keys).isin(revisit_keys).to_numpy(), 'is_clean'] = False
+    events = pd.concat([events[columns], new_events[columns]], ignore_index=True)
+    events['abs_month'] = to_abs_month(events['time'])
+    events = events.sort_values(['geo', 'coicop', 'abs_month'], ignore_index=True)
+
+    if len(new_rows):
+        schema = pq.read_schema(os.path.join(panel_path, parts[0]))
+        table = pa.Table.from_pandas(new_rows, preserve_index=False).select(schema.names).cast(schema)
+        part_path = _panel_part(panel_path, int(parts[-1][len("part-"):-len(".parquet")]) + 1)
+        # Dot-prefixed until complete, so readers of the directory skip it
+        tmp_path = os.path.join(panel_path, f".{os.path.basename(part_path)}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+
+    # Every processed series is among the rows read (its checksum matched)
+    update = series_state(df, new_events, check_months)
+    pos = idx[series_starts(df)]
+    update['n_rows'] = state['n_rows'].to_numpy()[pos] + n_new[pos]
+    update['last_event_month'] = update['last_event_month'].fillna(
+        pd.Series(state['last_event_month'].to_numpy()[pos]))
+    return events, update
+
+def detect_full(merged_path, panel_path, threshold, window_months, check_months, by_geo=False, n_jobs=1):
+    """
+    Wedge panel, events and series state over the whole history, sharded
+    by geo when ``by_geo`` or ``n_jobs > 1``. Writes the panel as a single
+    part (see panel_parts); returns ``(events, state)``.
+    """
+    detect = partial(detect_partition, threshold=threshold, window_months=window_months)
+    groups = geo_row_groups(merged_path) if by_geo else None
+    if by_geo and groups is None:
+        print("Warning: merged panel has no per-geo row groups; processing it in memory.")
+    if groups is not None:
+        # Out-of-core: one geo at a time, appended to the panel as it is done
+        print(f"Processing {len(groups)} geos on {n_jobs} job(s)...")
+        parts = map_partitions(partial(_detect_geo, path=merged_path, threshold=threshold,
+                                       window_months=window_months), groups.values(), n_jobs)
+    else:
+        print("Loading merged data...")
+        df = load_panel(merged_path)
+        parts = map_partitions(detect, geo_blocks(df), n_jobs) if n_jobs > 1 else [detect(df)]
+
+    event_parts, states = [], []
+    tmp_dir = f"{panel_path}.tmp"
+    _remove(tmp_dir)
+    os.makedirs(tmp_dir)
+    writer = None
+    try:
+        for df, part_events in parts:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(_panel_part(tmp_dir, 0), table.schema)
+            writer.write_table(table)
+            event_parts.append(part_events)
+            states.append(series_state(df, part_events, check_months))
+    finally:
+        if writer is not None:
+            writer.close()
+    _remove(panel_path)
+    os.replace(tmp_dir, panel_path)
+    events = pd.concat(event_parts) if len(event_parts) > 1 else event_parts[0]
+    return events, pd.concat(states, ignore_index=True)
+
+def detect_grid(panel, thresholds, windows):
+    """
+    Events and clean-window flags of a sorted wedge panel for every
+    threshold and window, as one long table keyed by (threshold, window).
+
+    Events at any threshold are among those at the smallest one, so the
+    candidates are selected and their months parsed once. Each threshold
+    then needs one neighbour-month pass, and each window only a comparison.
+    """
+    candidates = classify_events(panel[['geo', 'coicop', 'time', 'delta_tw']], min(thresholds))
+    # Incremental runs append parts, so the panel is sorted only within each part
+    candidates = (candidates.assign(abs_month=to_abs_month(candidates['time']))
+                  .sort_values(['geo', 'coicop', 'abs_month']))
+    months = candidates.pop('abs_month').to_numpy(dtype=np.float64)
+    delta = np.abs(candidates['delta_tw'].to_numpy())
+    blocks = []
+    for threshold in sorted(thresholds):
+        events = candidates[delta > threshold]
+        prev_month, next_month = _neighbour_months(months[delta > threshold], series_starts(events))
+        gap = np.fmin(months[delta > threshold] - prev_month, next_month - months[delta > threshold])
+        for window in sorted(windows):
+            # A NaN gap (no neighbour either side) compares False, i.e. clean
+            blocks.append(events.assign(threshold=threshold, window=window, is_clean=~(gap <= window)))
+    grid = pd.concat(blocks, ignore_index=True)
+    grid['window'] = grid['window'].astype(np.int16)
+    return grid[['threshold', 'window', 'geo', 'coicop', 'time', 'event_type', 'delta_tw', 'is_clean']]
+
+def write_grid(grid, path):
+    """Write the event grid with one row group per (threshold, window), so filtered reads skip the rest."""
+    table = pa.Table.from_pandas(grid, preserve_index=False)
+    change = (np.diff(grid['threshold'].to_numpy()) != 0) | (np.diff(grid['window'].to_numpy()) != 0)
+    bounds = np.concatenate([[0], np.flatnonzero(change) + 1, [len(grid)]])
+    with pq.ParquetWriter(path, table.schema) as writer:
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            writer.write_table(table.slice(lo, hi - lo))
+
+def load_event_grid(threshold=None, window=None, path=None):
+    """Events of the grid at one threshold and/or clean window (all of them if None)."""
+    path = path or os.path.join(PROCESSED_DIR, "events_grid.parquet")
+    filters = [(col, "==", value) for col, value in [("threshold", threshold), ("window", window)]
+               if value is not None]
+    return pd.read_parquet(path, filters=filters or None)
+
 def main():
-    print("Loading merged data...")
-    df = pd.read_parquet(os.path.join(PROCESSED_DIR, "merged_indices.parquet"))
+    processing = CONFIG.get("processing", {})
+    merged_path = os.path.join(PROCESSED_DIR, "merged_indices.parquet")
+    panel_path = os.path.join(PROCESSED_DIR, "panel_with_wedge.parquet")
+    events_path = os.path.join(PROCESSED_DIR, "events_list.parquet")
+    state_path = os.path.join(PROCESSED_DIR, "detect_state.parquet")
 
-    # Ensure sorted
-    df['time'] = df['time'].map(normalize_time)
-    df = df.sort_values(['geo', 'coicop', 'time'])
-    
-    # Calculate Tax Wedge (TW)
-    # Use log difference approximation
-    # TW = ln(HICP) - ln(HICP_CT)
-    # Note: HICP and HICP_CT are indices.
-    
-    print("Calculating Tax Wedge...")
-    df.loc[df['hicp'] <= 0, 'hicp'] = np.nan
-    df.loc[df['hicp_ct'] <= 0, 'hicp_ct'] = np.nan
-    df['log_hicp'] = np.log(df['hicp'])
-    df['log_hicp_ct'] = np.log(df['hicp_ct'])
-    df['tax_wedge'] = df['log_hicp'] - df['log_hicp_ct']
-    
-    # Calculate Monthly Change in Wedge (Delta TW)
-    # We need to group by geo and coicop to shift safely
-    df['delta_tw'] = df.groupby(['geo', 'coicop'])['tax_wedge'].diff()
-    
+    print("Calculating Tax Wedge and detecting events...")
     # Define Event Threshold
     THRESHOLD = CONFIG.get("identification", {}).get("event_threshold", 0.01)
-    
-    # Identify Events
-    # Tax Hike: Wedge increases (HICP grows faster than HICP-CT, or drops slower) -> Positive Delta TW
-    # Tax Cut: Wedge decreases -> Negative Delta TW
-    
-    events = df[np.abs(df['delta_tw']) > THRESHOLD].copy()
-    
-    conditions = [
-        events['delta_tw'] > THRESHOLD,
-        events['delta_tw'] < -THRESHOLD
-    ]
-    choices = ['hike', 'cut']
-    events['event_type'] = np.select(conditions, choices, default='none')
-    
-    # --- Clean Window Logic ---
-    print("Applying Clean Window Logic...")
     window_months = CONFIG.get("identification", {}).get("clean_window_months", 12)
-    events = apply_clean_window(events, window_months=window_months)
-    
+
+    check_months = processing.get("incremental_check_months", 36)
+    if check_months < 1:
+        raise ValueError("processing.incremental_check_months must be at least 1")
+
+    result = None
+    if processing.get("incremental", False):
+        state = load_state(state_path, THRESHOLD, window_months, check_months)
+        if state is None or not (panel_parts(panel_path) and os.path.exists(events_path)):
+            print("No detection state for these parameters; running in full.")
+        else:
+            result = detect_incremental(merged_path, panel_path, events_path, state, THRESHOLD,
+                                        window_months, check_months)
+            if result is None:
+                print("Processed history changed (revision, backfill or new series); running in full.")
+    if result is None:
+        result = detect_full(merged_path, panel_path, THRESHOLD, window_months, check_months,
+                             by_geo=processing.get("by_geo", False),
+                             n_jobs=resolve_jobs(processing.get("n_jobs", 1)))
+    events, state = result
+    write_state(state, state_path, THRESHOLD, window_months, check_months)
+
     print(f"Total events: {len(events)}")
     print(f"Clean events (isolated +/- {window_months}m): {events['is_clean'].sum()}")
     print(events['event_type'].value_counts())
     
-    # Save panel with wedge
-    df.to_parquet(os.path.join(PROCESSED_DIR, "panel_with_wedge.parquet"), index=False)
-    
     # Save events list
     events_list = events[['geo', 'coicop', 'time', 'event_type', 'delta_tw', 'is_clean']]
-    events_list.to_parquet(os.path.join(PROCESSED_DIR, "events_list.parquet"), index=False)
+    events_list.to_parquet(events_path, index=False)
     print("Saved events list and panel.")
 
+    grid_counts = None
+    if processing.get("event_grid", False):
+        robustness = CONFIG.get("robustness", {})
+        thresholds = robustness.get("thresholds", [THRESHOLD])
+        # Clean-window lengths (months), not the event half-windows of
+        # ``windows``; the configured clean window is always included
+        windows = sorted({window_months, *robustness.get("clean_windows", [])})
+        # delta_tw is read back from the panel, not recomputed per threshold
+        panel = pd.read_parquet(panel_path, columns=['geo', 'coicop', 'time', 'delta_tw'])
+        grid = detect_grid(panel, thresholds, windows)
+        write_grid(grid, os.path.join(PROCESSED_DIR, "events_grid.parquet"))
+        grid_counts = (grid.groupby(['threshold', 'window'])['is_clean'].agg(['size', 'sum'])
+                       .reset_index().rename(columns={'size': 'total_events', 'sum': 'clean_events'}))
+        grid_counts = grid_counts.astype({'window': int, 'total_events': int, 'clean_events': int})
+        print(f"Saved event grid: {len(thresholds)} thresholds x {len(windows)} windows, {len(grid)} rows.")
+
     if not os.path.exists(METADATA_DIR):
         os.makedirs(METADATA_DIR)
     summary_path = os.path.join(METADATA_DIR, "events_summary.json")
+    summary = {
+        "event_threshold": THRESHOLD,
+        "clean_window_months": window_months,
+        "total_events": int(len(events)),
+        "clean_events": int(events['is_clean'].sum())
+    }
+    if grid_counts is not None:
+        summary["event_grid"] = grid_counts.to_dict(orient="records")
     with open(summary_path, "w") as f:
-        json.dump({
-            "event_threshold": THRESHOLD,
-            "clean_window_months": window_months,
-            "total_events": int(len(events)),
-            "clean_events": int(events['is_clean'].sum())
-        }, f, indent=2)
+        json.dump(summary, f, indent=2)
 
 if __name__ == "__main__":
     main()
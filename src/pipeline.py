@@ -0,0 +1,257 @@
+"""
+Dependency-aware replication pipeline.
+
+Each stage declares the files it reads and writes; a stage depends on
+the stages that write its inputs. A stage is skipped when its outputs
+exist and the content hashes of its inputs, its code and the config
+sections it reads match the last successful run (recorded in
+``pipeline_state.json``). A stage marked ``always_run`` (fetch, which
+has no input files and decides itself what to re-download) runs every
+time. Stages whose dependencies are done run
+concurrently, each in its own Python process, and the wall time and
+peak RSS of every stage are written to ``pipeline_runs.json``.
+
+Usage: python -m src.pipeline [--jobs N] [--force STAGE ...] [--dry-run]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.utils.config import load_config
+from src.utils.hashing import hash_json, hash_path
+
+CONFIG_PATH = "analysis_config.yaml"
+METADATA_DIR = "output/metadata"
+STATE_PATH = os.path.join(METADATA_DIR, "pipeline_state.json")
+RUNS_PATH = os.path.join(METADATA_DIR, "pipeline_runs.json")
+
+UTILS = ["src/utils/config.py", "src/utils/hashing.py", "src/utils/partitions.py",
+         "src/utils/time_parse.py"]
+PANEL = "data/processed/panel_with_wedge.parquet"
+EVENTS = "data/processed/events_list.parquet"
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+    config_sections: List[str] = field(default_factory=list)
+    always_run: bool = False  # Never skipped; the script checks for changes itself
+
+    def fingerprint(self, config):
+        """Hash of the stage's inputs, code and config sections; None if a file is missing."""
+        files = {}
+        for path in [*self.inputs, self.script, *self.code]:
+            if not os.path.exists(path):
+                return None
+            files[path] = hash_path(path)
+        return hash_json({"files": files,
+                          "config": {k: config.get(k) for k in self.config_sections}})
+
+    def outputs_exist(self):
+        return all(os.path.exists(p) for p in self.outputs)
+
+
+def build_stages(config) -> List[Stage]:
+    datasets = config.get("fetch", {}).get("datasets", [])
+    raw = {code: f"data/raw/{code}" for code in datasets}
+    models = "src/analysis/models.py"
+    analysis = ["identification", "analysis", "robustness"]
+    event_grid = config.get("processing", {}).get("event_grid", False)
+    grid = ["data/processed/events_grid.parquet"] if event_grid else []
+    return [
+        Stage("fetch", "src/data/fetch.py",
+              outputs=[*raw.values(), os.path.join(METADATA_DIR, "data_manifest.json"),
+                       os.path.join(METADATA_DIR, "data_hashes.json")],
+              code=UTILS, config_sections=["fetch"], always_run=True),
+        Stage("clean", "src/data/clean.py",
+              inputs=[raw[c] for c in ("prc_hicp_midx", "prc_hicp_cind", "prc_hicp_inw") if c in raw],
+              outputs=["data/processed/merged_indices.parquet",
+                       os.path.join(METADATA_DIR, "data_quality.json")],
+              code=UTILS, config_sections=["processing"]),
+        Stage("detect_events", "src/identification/detect_events.py",
+              inputs=["data/processed/merged_indices.parquet"],
+              outputs=[PANEL, EVENTS, "data/processed/detect_state.parquet",
+                       os.path.join(METADATA_DIR, "events_summary.json")]
+                      + grid,
+              code=UTILS, config_sections=["processing", "identification"] + (["robustness"] if event_grid else [])),
+        Stage("models", models, inputs=[PANEL, EVENTS] + grid,
+              outputs=["output/tables/main_regression_results.csv", "results.yaml"],
+              code=UTILS + ["src/utils/result_cache.py", "src/identification/detect_events.py"],
+              config_sections=analysis),
+        Stage("benchmark", "src/analysis/benchmark_benzarti.py", inputs=[PANEL, EVENTS],
+              outputs=["output/tables/benchmark_benzarti.tex"], config_sections=analysis),
+        Stage("mechanism", "src/analysis/mechanism_testing.py", inputs=[PANEL, EVENTS],
+              outputs=["output/tables/heterogeneity_mechanism.tex"], config_sections=analysis),
+        Stage("robustness", "src/analysis/robustness.py", inputs=[PANEL, EVENTS],
+              outputs=["output/tables/placebo_summary.csv"],
+              code=UTILS + ["src/utils/result_cache.py", "src/identification/detect_events.py", models],
+              config_sections=analysis),
+        Stage("audit", "src/audit/metadata_match.py",
+              inputs=[EVENTS] + ([raw["prc_hicp_manr"]] if "prc_hicp_manr" in raw else []),
+              outputs=["output/tables/audit_summary.csv"],
+              code=UTILS),
+    ]
+
+
+def stage_dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Names of the stages writing each stage's inputs."""
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: sorted({producers[p] for p in s.inputs if p in producers} - {s.name})
+            for s in stages}
+
+
+def run_stage(stage: Stage) -> Dict:
+    """Run ``stage`` in a child process; returns exit code, wall time and peak RSS."""
+    print(f"[{stage.name}] running {stage.script}")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, stage.script])
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        peak_rss_mb = usage.ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+    else:
+        proc.wait()
+    return {
+        "returncode": proc.returncode,
+        "wall_time_s": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": None if peak_rss_mb is None else round(peak_rss_mb, 1),
+    }
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_pipeline(stages: Optional[List[Stage]] = None, config: Optional[Dict] = None, jobs: int = 4,
+                 force: Optional[List[str]] = None, dry_run: bool = False,
+                 runner=run_stage) -> Dict[str, Dict]:
+    """
+    Run the stages in dependency order, skipping the up-to-date ones.
+
+    Parameters
+    ----------
+    stages : Optional[List[Stage]]
+        Stages to run (default: ``build_stages(config)``)
+    config : Optional[Dict]
+        Parsed configuration (default: ``analysis_config.yaml``)
+    jobs : int
+        Maximum number of stages running at once
+    force : Optional[List[str]]
+        Stage names to rerun even when up to date
+    dry_run : bool
+        Only report which stages would run
+    runner : callable
+        Runs one stage and returns a dict with ``returncode``,
+        ``wall_time_s`` and ``peak_rss_mb``
+
+    Returns
+    -------
+    Dict[str, Dict]
+        Per-stage record with ``status`` ('ran', 'skipped', 'failed',
+        'blocked' or 'pending' in a dry run) and timings
+    """
+    config = config if config is not None else load_config(CONFIG_PATH)
+    stages = stages if stages is not None else build_stages(config)
+    force = set(force or [])
+    unknown = force - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)}")
+    by_name = {s.name: s for s in stages}
+    deps = stage_dependencies(stages)
+    state = _load_json(STATE_PATH)
+    records: Dict[str, Dict] = {}
+    started_at = datetime.now(timezone.utc).isoformat()
+
+    def ready():
+        return [s for s in stages if s.name not in records and s.name not in running.values()
+                and all(d in records for d in deps[s.name])]
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while len(records) < len(stages):
+            batch = ready()
+            if not batch and not running:
+                raise RuntimeError("Stage dependencies form a cycle")
+            for stage in batch:
+                if any(records[d]["status"] in ("failed", "blocked") for d in deps[stage.name]):
+                    records[stage.name] = {"status": "blocked"}
+                    print(f"[{stage.name}] blocked by a failed dependency")
+                    continue
+                # A dry run cannot know whether a rerun upstream stage changes its outputs
+                upstream_pending = any(records[d]["status"] == "pending" for d in deps[stage.name])
+                fingerprint = None if upstream_pending else stage.fingerprint(config)
+                up_to_date = (stage.name not in force and not stage.always_run and fingerprint is not None
+                              and state.get(stage.name) == fingerprint and stage.outputs_exist())
+                if up_to_date:
+                    records[stage.name] = {"status": "skipped"}
+                    print(f"[{stage.name}] up to date, skipped")
+                elif dry_run:
+                    records[stage.name] = {"status": "pending"}
+                    print(f"[{stage.name}] would run")
+                else:
+                    running[pool.submit(runner, stage)] = stage.name
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                ok = result["returncode"] == 0
+                records[name] = {"status": "ran" if ok else "failed", **result}
+                print(f"[{name}] {'done' if ok else 'FAILED'} in {result['wall_time_s']:.1f}s"
+                      + (f", peak RSS {result['peak_rss_mb']:.0f} MB" if result.get("peak_rss_mb") else ""))
+                if ok:
+                    # Fingerprint the inputs as they are now, after the run
+                    state[name] = by_name[name].fingerprint(config)
+                    _write_json(STATE_PATH, state)
+
+    if not dry_run:
+        _write_json(RUNS_PATH, {
+            "started_at_utc": started_at,
+            "finished_at_utc": datetime.now(timezone.utc).isoformat(),
+            "stages": [{"stage": s.name, **records[s.name]} for s in stages],
+        })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the replication pipeline.")
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="maximum number of stages running at once")
+    parser.add_argument("--force", nargs="*", default=[], metavar="STAGE",
+                        help="rerun these stages even if up to date (e.g. clean)")
+    parser.add_argument("--dry-run", action="store_true", help="only list the stages that would run")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    records = run_pipeline(jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    sys.exit(1 if any(r["status"] in ("failed", "blocked") for r in records.values()) else 0)
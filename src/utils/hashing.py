@@ -0,0 +1,30 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_path(path):
+    """``hash_file`` of a file; for a directory (e.g. a partitioned dataset), a hash of its files' names and hashes."""
+    if not os.path.isdir(path):
+        return hash_file(path)
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for name in sorted(filenames):
+            full = os.path.join(dirpath, name)
+            entries.append((os.path.relpath(full, path).replace(os.sep, "/"), hash_file(full)))
+    return hash_json(entries)
+
+
+def hash_json(obj):
+    """SHA-256 of the canonical JSON form of ``obj`` (sorted keys)."""
+    payload = json.dumps(obj, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,37 @@
+"""Ordered map over data partitions with bounded memory."""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def resolve_jobs(n_jobs):
+    """Worker count for ``n_jobs`` (-1: all cores)."""
+    if n_jobs == 0 or n_jobs < -1:
+        raise ValueError("n_jobs must be a positive integer or -1")
+    return (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+
+
+def map_partitions(fn, items, n_jobs=1):
+    """
+    Yield ``fn(item)`` for every item, in order.
+
+    With more than one job the items run in worker processes, but at most
+    ``2 * n_jobs`` of them are submitted ahead of the one being consumed,
+    so only a few partitions' results are ever held at once. ``fn`` must
+    be picklable (a module-level function or a ``functools.partial`` of
+    one).
+    """
+    n_jobs = resolve_jobs(n_jobs)
+    if n_jobs == 1:
+        for item in items:
+            yield fn(item)
+        return
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from src import __version__
+from src.utils.hashing import hash_json, hash_path
+
+
+class ResultCache:
+    """
+    Content-addressed store of fitted regression results.
+
+    An entry is keyed by the SHA-256 of the input file hashes, the
+    config sections the fit depends on, the regression spec, the hashes
+    of the estimator source files in ``code_paths`` and the package
+    version, so any change to the data, the configuration or the code
+    invalidates it. Only the coefficients, their covariance,
+    the number of observations and the column names are kept, in one
+    small ``.npz`` file per entry.
+    """
+
+    def __init__(self, cache_dir, input_paths, config=None, version=__version__, code_paths=()):
+        self.cache_dir = cache_dir
+        self.input_paths = [str(p) for p in input_paths]
+        self.config = config or {}
+        self.version = version
+        self.code_hashes = {os.path.basename(str(p)): hash_path(p) for p in code_paths}
+        self._input_hashes = None
+
+    def input_hashes(self):
+        if self._input_hashes is None:
+            self._input_hashes = {os.path.basename(p): hash_path(p) for p in self.input_paths}
+        return self._input_hashes
+
+    def key(self, spec):
+        return hash_json({
+            "inputs": self.input_hashes(),
+            "config": self.config,
+            "spec": spec,
+            "code": self.code_hashes,
+            "version": self.version,
+        })
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    def load(self, spec):
+        """Stored ``{'params', 'cov', 'nobs', 'col_names'}`` for ``spec``, or None."""
+        path = self._path(self.key(spec))
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return {
+                    "params": data["params"],
+                    "cov": data["cov"],
+                    "nobs": int(data["nobs"]),
+                    "col_names": data["col_names"].tolist(),
+                }
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def store(self, spec, params, cov, nobs, col_names):
+        path = self._path(self.key(spec))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            params=np.asarray(params, dtype=np.float64),
+            cov=np.asarray(cov, dtype=np.float64),
+            nobs=np.int64(nobs),
+            col_names=np.asarray(col_names, dtype=str),
+        )
+        os.replace(tmp_path, path)
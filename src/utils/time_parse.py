@@ -1,4 +1,11 @@
 import re
+import numpy as np
+import pandas as pd
+
+# YYYY, YYYY-MM or YYYYMmm, optionally followed by a day/time part
+PERIOD_PATTERN = r"^\s*(\d{4})(?:[-M](\d{2}))?(?:-\d{2}(?:[ T].*)?)?\s*$"
+# Absolute month of 1970-01, the datetime64 epoch
+EPOCH_ABS_MONTH = 1970 * 12 + 1
 
 def normalize_time(t):
     if t is None:
@@ -8,3 +15,53 @@ def normalize_time(t):
     if match:
         return f"{match.group(1)}-{match.group(2)}"
     return s
+
+def to_abs_month(values, errors="raise"):
+    """
+    Absolute months (year * 12 + month) of a whole array of period labels.
+
+    Accepts YYYYMmm, YYYY-MM and YYYY labels (January for YYYY), as well as
+    datetime and period arrays. Labels are deduplicated first, so each
+    distinct label is parsed once however many rows share it.
+
+    Returns an int32 array. Missing or unparseable labels raise a
+    ValueError, or with ``errors='coerce'`` become NaN in a float64 array.
+    """
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.PeriodDtype):
+        values = values.dt.to_timestamp()
+    if pd.api.types.is_datetime64_any_dtype(values):
+        missing = values.isna().to_numpy()
+        months = (values.dt.year * 12 + values.dt.month).to_numpy(dtype=np.float64, na_value=np.nan)
+    elif pd.api.types.is_integer_dtype(values):
+        # Already absolute months (e.g. the raw datasets)
+        missing = values.isna().to_numpy()
+        months = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        codes, uniques = pd.factorize(values)
+        parts = pd.Series(uniques, dtype=object).astype(str).str.extract(PERIOD_PATTERN)
+        year = pd.to_numeric(parts[0]).to_numpy(dtype=np.float64)
+        month = pd.to_numeric(parts[1]).fillna(1).to_numpy(dtype=np.float64)
+        parsed = np.append(year * 12 + month, np.nan)
+        months = parsed[codes]  # code -1 (missing) picks the trailing NaN
+        missing = codes < 0
+    bad = np.isnan(months)
+    if errors == "coerce":
+        return months
+    if bad.any():
+        first = values[bad].iloc[0]
+        raise ValueError(f"{int(bad.sum())} unparseable time labels (first: {first!r}; "
+                         f"{int(missing.sum())} missing)")
+    return months.astype(np.int32)
+
+def abs_month_to_period(abs_months, annual=False):
+    """YYYY-MM labels (YYYY if ``annual``) of absolute months, formatting each unique value once."""
+    inverse, values = pd.factorize(np.asarray(abs_months, dtype=np.int64))
+    years, months = (values - 1) // 12, (values - 1) % 12 + 1
+    labels = np.array([f"{y}" if annual else f"{y}-{m:02d}" for y, m in zip(years, months)], dtype=object)
+    return labels[inverse]
+
+def abs_month_to_timestamp(abs_months):
+    """Month-start datetime64[ns] values of absolute months."""
+    offsets = np.asarray(abs_months, dtype=np.int64) - EPOCH_ABS_MONTH
+    return offsets.astype("datetime64[M]").astype("datetime64[ns]")
@@ -0,0 +1,112 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+def eurostat_tsv(rows, periods, start_period=None):
+    """
+    Gzipped Eurostat-style TSV for ``rows`` of (freq, unit, coicop, geo, values).
+
+    ``start_period`` keeps only the periods from that one on, like the
+    API's ``startPeriod`` parameter.
+    """
+    keep = [i for i, p in enumerate(periods) if start_period is None or p >= start_period]
+    lines = ["freq,unit,coicop,geo\\TIME_PERIOD\t" + "\t".join(f"{periods[i]} " for i in keep)]
+    for *ids, values in rows:
+        lines.append(",".join(ids) + "\t" + "\t".join(values[i] for i in keep))
+    return gzip.compress(("\r\n".join(lines) + "\r\n").encode("utf-8"), mtime=0)
+
+
+class EurostatStub(ThreadingHTTPServer):
+    """
+    Stand-in for the Eurostat bulk download endpoint.
+
+    Serves ``datasets[code] = (rows, periods)`` at ``/data/<code>`` as
+    gzipped TSV, honouring ``startPeriod``, with ETag validators
+    (conditional HEAD/GET answer 304) and Range/If-Range support.
+    ``fail[code]`` answers that many requests with 503 first,
+    ``truncate[code]`` cuts the next full response after that many bytes,
+    and ``delay`` slows every response down. ``log`` records
+    ``(method, code, status, bytes sent)`` for each request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _EurostatHandler)
+        self.datasets, self.fail, self.truncate = {}, {}, {}
+        self.delay = 0.0
+        self.log = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def statuses(self, code, method="GET"):
+        return [status for m, c, status, _ in self.log if c == code and m == method]
+
+
+class _EurostatHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, method):
+        stub = self.server
+        url = urlparse(self.path)
+        code = url.path.rsplit("/", 1)[-1]
+        start_period = parse_qs(url.query).get("startPeriod", [None])[0]
+        time.sleep(stub.delay)
+        with stub.lock:
+            status, payload, headers, cut = self._select(stub, method, code, start_period)
+            sent = len(payload) if cut is None else cut
+            stub.log.append((method, code, status, sent if method == "GET" else 0))
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if method == "GET":
+            self.wfile.write(payload[:sent])
+        if cut is not None:
+            self.close_connection = True
+
+    def _select(self, stub, method, code, start_period):
+        if code not in stub.datasets:
+            return 404, b"", [], None
+        if stub.fail.get(code, 0) > 0:
+            stub.fail[code] -= 1
+            return 503, b"", [], None
+        rows, periods = stub.datasets[code]
+        body = eurostat_tsv(rows, periods, start_period)
+        # One version of the dataset: the ETag covers the full table
+        etag = f'"{code}-{hash(eurostat_tsv(rows, periods)) & 0xffffffff:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            return 304, b"", [("ETag", etag)], None
+        range_header = self.headers.get("Range")
+        if method == "GET" and range_header and self.headers.get("If-Range") == etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+            return 206, body[start:], [
+                ("ETag", etag), ("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")], None
+        cut = stub.truncate.pop(code, None) if method == "GET" else None
+        return 200, body, [("ETag", etag)], cut
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_HEAD(self):
+        self._respond("HEAD")
+
+
+@pytest.fixture
+def eurostat_server():
+    server = EurostatStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
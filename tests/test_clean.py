@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from src.data import clean, fetch
+
+
+def _raw(root, code, units, months, seed, drop=0.1):
+    rng = np.random.default_rng(seed)
+    df = pd.MultiIndex.from_product(
+        [["M"], units, ["CP01", "CP02", "CP10"], ["AT", "BE", "DE", "FR"], months],
+        names=["freq", "unit", "coicop", "geo", "time"]).to_frame(index=False)
+    df = df.sample(frac=1 - drop, random_state=seed).reset_index(drop=True)
+    df["time"] = df["time"].astype(np.int32)
+    df["value"] = rng.uniform(90, 110, len(df)).astype(np.float32)
+    df.loc[rng.random(len(df)) < 0.05, "value"] = np.nan
+    for c in ["freq", "unit", "coicop", "geo"]:
+        df[c] = df[c].astype("category")
+    fetch.write_long_dataset([df], str(root / code), ["freq", "unit", "coicop", "geo"])
+    return df
+
+
+def test_columnar_merge_matches_pandas_merges(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean, "RAW_DIR", str(tmp_path))
+    months = np.arange(2019 * 12 + 1, 2022 * 12 + 1)
+    frames = [_raw(tmp_path, "prc_hicp_midx", ["I15", "I05"], months, 0),
+              _raw(tmp_path, "prc_hicp_cind", ["I15", "RCH_A"], months, 1),
+              _raw(tmp_path, "prc_hicp_inw", ["PER_MIL"], months[::12], 2)]
+    hicp, ct, w = ({"geo": f["geo"].astype(str), "coicop": f["coicop"].astype(str), "time": f["time"],
+                    "value": f["value"], "unit": f["unit"].astype(str)} for f in frames)
+    hicp, ct, w = (pd.DataFrame(d) for d in (hicp, ct, w))
+    ref = (hicp[hicp["unit"] == "I15"].drop(columns="unit")
+           .merge(ct[ct["unit"] == "I15"].drop(columns="unit"), on=["geo", "coicop", "time"],
+                  suffixes=("_hicp", "_ct")))
+    ref["year"] = (ref["time"] - 1) // 12
+    w["year"] = (w["time"] - 1) // 12
+    ref = ref.merge(w[["geo", "coicop", "year", "value"]], on=["geo", "coicop", "year"], how="left")
+    ref = ref.sort_values(["geo", "coicop", "time"], ignore_index=True)
+
+    panel, overlap = clean.merge_indices(clean.load_index("prc_hicp_midx", filter_unit="I15"),
+                                         clean.load_index("prc_hicp_cind", filter_unit="I15"),
+                                         clean.load_index("prc_hicp_inw"))
+    path = tmp_path / "merged.parquet"
+    clean.write_panel(panel, str(path), row_group_rows=50)
+    out = pd.read_parquet(path)
+
+    assert overlap["merged_rows"] == len(ref)
+    assert overlap["overlap_ratio"] == len(ref) / (hicp["unit"] == "I15").sum()
+    assert isinstance(out["geo"].dtype, pd.CategoricalDtype) and out["time"].dtype == np.int32
+    assert out["geo"].astype(str).tolist() == ref["geo"].tolist()
+    assert out["coicop"].astype(str).tolist() == ref["coicop"].tolist()
+    assert out["time"].tolist() == ref["time"].tolist()
+    for col, ref_col in [("hicp", "value_hicp"), ("hicp_ct", "value_ct"), ("weight", "value")]:
+        np.testing.assert_array_equal(out[col].to_numpy(), ref[ref_col].to_numpy(dtype=np.float32))
+
+    # Row groups never span geos, so a geo filter reads only that geo's groups
+    meta = pq.ParquetFile(path).metadata
+    stats = [meta.row_group(i).column(0).statistics for i in range(meta.num_row_groups)]
+    assert all(s.min == s.max for s in stats) and meta.num_row_groups > 4
+    fr = pd.read_parquet(path, filters=[("geo", "==", "FR")])
+    assert len(fr) == (ref["geo"] == "FR").sum()
+
+
+def test_merge_rejects_duplicate_rows():
+    index = {"geo": pd.Categorical(["AT", "AT"]), "coicop": pd.Categorical(["CP01", "CP01"]),
+             "time": np.array([24241, 24241], dtype=np.int32), "value": np.ones(2, dtype=np.float32)}
+    with pytest.raises(ValueError, match="duplicate"):
+        clean.merge_indices(index, index, index)
+
+
+def test_by_geo_build_matches_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean, "RAW_DIR", str(tmp_path))
+    months = np.arange(2019 * 12 + 1, 2021 * 12 + 1)
+    _raw(tmp_path, "prc_hicp_midx", ["I15", "I05"], months, 3)
+    _raw(tmp_path, "prc_hicp_cind", ["I15"], months, 4)
+    _raw(tmp_path, "prc_hicp_inw", ["PER_MIL"], months[::12], 5)
+
+    quality = clean.build_panel(str(tmp_path / "mem.parquet"))
+    assert clean.build_panel(str(tmp_path / "geo.parquet"), by_geo=True, n_jobs=2) == quality
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "geo.parquet"),
+                                  pd.read_parquet(tmp_path / "mem.parquet"), check_categorical=False)
+    assert pq.ParquetFile(tmp_path / "geo.parquet").metadata.num_row_groups == 4
@@ -1,4 +1,10 @@
+import json
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.data import clean
+from src.identification import detect_events
 from src.identification.detect_events import apply_clean_window
 
 def test_clean_window_geo_coicop():
@@ -10,3 +16,178 @@ def test_clean_window_geo_coicop():
     })
     out = apply_clean_window(df, window_months=6)
     assert out.loc[1, "is_clean"] == False
+
+
+def _merged(seed=0, geos=("AT", "BE", "DE"), coicops=("CP01", "CP02"), first_year=2018):
+    rng = np.random.default_rng(seed)
+    df = pd.MultiIndex.from_product(
+        [list(geos), list(coicops), np.arange(first_year * 12 + 1, 2022 * 12 + 1)],
+        names=["geo", "coicop", "time"]).to_frame(index=False)
+    df["time"] = df["time"].astype(np.int32)
+    df["hicp"] = (100 * np.exp(rng.normal(0, 0.01, len(df)).cumsum())).astype(np.float32)
+    df["hicp_ct"] = (df["hicp"] * np.exp(-np.where(rng.random(len(df)) < 0.1, 0.03, 0).cumsum())).astype(np.float32)
+    df.loc[5, "hicp"] = 0.0
+    df["year"] = ((df["time"] - 1) // 12).astype(np.int16)
+    df["weight"] = np.float32(1.0)
+    for c in ["geo", "coicop"]:
+        df[c] = df[c].astype("category")
+    return df
+
+
+def _write_merged(df, out):
+    out.mkdir(exist_ok=True)
+    clean.write_panel(pa.Table.from_pandas(df, preserve_index=False).cast(clean.PANEL_SCHEMA),
+                      str(out / "merged_indices.parquet"))
+
+
+def _run(out, monkeypatch, **processing):
+    monkeypatch.setattr(detect_events, "PROCESSED_DIR", str(out))
+    monkeypatch.setattr(detect_events, "METADATA_DIR", str(out))
+    monkeypatch.setitem(detect_events.CONFIG, "processing", processing)
+    detect_events.main()
+    return [pd.read_parquet(out / f) for f in ("panel_with_wedge.parquet", "events_list.parquet",
+                                               "detect_state.parquet")] + \
+        [json.load(open(out / "events_summary.json"))]
+
+
+def test_sharded_detection_matches_in_memory(tmp_path, monkeypatch):
+
+    df = _merged()
+    monkeypatch.setitem(detect_events.CONFIG, "identification",
+                        {"event_threshold": 0.01, "clean_window_months": 6})
+    outputs = {}
+    for by_geo, n_jobs in [(False, 1), (False, 2), (True, 1), (True, 2)]:
+        out = tmp_path / f"{by_geo}_{n_jobs}"
+        _write_merged(df, out)
+        outputs[by_geo, n_jobs] = _run(out, monkeypatch, by_geo=by_geo, n_jobs=n_jobs)
+
+    panel, events, state, summary = outputs.pop((False, 1))
+    for other_panel, other_events, other_state, other_summary in outputs.values():
+        pd.testing.assert_frame_equal(other_panel, panel)
+        pd.testing.assert_frame_equal(other_events, events)
+        pd.testing.assert_frame_equal(other_state, state)
+        assert other_summary == summary
+    assert summary["total_events"] > 10
+    # The differencing never crosses a series boundary
+    ref = panel.groupby(["geo", "coicop"], observed=True)["tax_wedge"].diff()
+    np.testing.assert_array_equal(panel["delta_tw"].to_numpy(), ref.to_numpy())
+    assert np.isnan(panel.loc[5, "hicp"])
+
+    # Clean-window flags match the groupby-shift definition
+    by_series = events.assign(abs_month=events["time"].str[:4].astype(int) * 12
+                              + events["time"].str[5:].astype(int)).groupby(["geo", "coicop"], observed=True)
+    gap_prev = by_series["abs_month"].diff()
+    gap_next = -by_series["abs_month"].diff(-1)
+    expected = (gap_prev.isna() | (gap_prev > 6)) & (gap_next.isna() | (gap_next > 6))
+    assert events["is_clean"].tolist() == expected.tolist() and not events["is_clean"].all()
+
+
+def _assert_same_outputs(got, want):
+    panel, *rest = got
+    # Incremental runs append the new months as a panel part of their own
+    panel = panel.sort_values(["geo", "coicop", "time"], kind="stable", ignore_index=True)
+    pd.testing.assert_frame_equal(panel, want[0])
+    for got_part, want_part in zip(rest, want[1:]):
+        if isinstance(want_part, dict):
+            assert got_part == want_part
+        else:
+            pd.testing.assert_frame_equal(got_part, want_part)
+
+
+def test_incremental_detection_matches_full_run(tmp_path, monkeypatch, capsys):
+    df = _merged(1)
+    monkeypatch.setitem(detect_events.CONFIG, "identification",
+                        {"event_threshold": 0.01, "clean_window_months": 6})
+    processing = {"incremental": True, "incremental_check_months": 12}
+    ref = tmp_path / "full"
+    _write_merged(df, ref)
+    expected = _run(ref, monkeypatch, incremental_check_months=12)
+
+    # First run on a shorter history, then extend it: only the checked and
+    # new months are read, and the new ones are appended as a panel part
+    inc = tmp_path / "inc"
+    _write_merged(df[df["time"] <= 2021 * 12 + 9], inc)
+    _run(inc, monkeypatch, **processing)
+    first_part = (inc / "panel_with_wedge.parquet" / "part-00000.parquet").read_bytes()
+    _write_merged(df, inc)
+    capsys.readouterr()
+    _assert_same_outputs(_run(inc, monkeypatch, **processing), expected)
+    assert "running in full" not in capsys.readouterr().out
+    assert detect_events.panel_parts(str(inc / "panel_with_wedge.parquet")) == [
+        "part-00000.parquet", "part-00001.parquet"]
+    assert (inc / "panel_with_wedge.parquet" / "part-00000.parquet").read_bytes() == first_part
+
+    # A revision within the checked months, or a new series, cannot be
+    # patched in: the stage falls back to a full run
+    revised = df.copy()
+    revised.loc[revised["time"] == 2021 * 12 + 6, "hicp_ct"] *= np.float32(0.9)
+    added = pd.concat([df, _merged(5, geos=["FI"])], ignore_index=True)
+    added = added.astype({"geo": "category", "coicop": "category"}).sort_values(
+        ["geo", "coicop", "time"], ignore_index=True)
+    for changed in [revised, added]:
+        _write_merged(changed, inc)
+        _write_merged(changed, ref)
+        capsys.readouterr()
+        want = _run(ref, monkeypatch, incremental_check_months=12)
+        _assert_same_outputs(_run(inc, monkeypatch, **processing), want)
+        assert "Processed history changed" in capsys.readouterr().out
+
+
+def test_event_grid_matches_single_threshold_runs(tmp_path, monkeypatch):
+    monkeypatch.setitem(detect_events.CONFIG, "identification",
+                        {"event_threshold": 0.01, "clean_window_months": 6})
+    monkeypatch.setitem(detect_events.CONFIG, "robustness",
+                        {"thresholds": [0.005, 0.01, 0.02], "clean_windows": [3, 6, 12]})
+    df = _merged(2)
+    # Wedge changes of every size, so the thresholds select different events
+    df["hicp_ct"] *= np.exp(np.random.default_rng(3).normal(0, 0.01, len(df))).astype(np.float32)
+    _write_merged(df, tmp_path)
+    panel, events, _, summary = _run(tmp_path, monkeypatch, event_grid=True)
+    path = str(tmp_path / "events_grid.parquet")
+    assert pq.ParquetFile(path).metadata.num_row_groups == 9
+
+    columns = ["geo", "coicop", "time", "event_type", "delta_tw", "is_clean"]
+    for threshold in [0.005, 0.01, 0.02]:
+        for window in [3, 6, 12]:
+            got = detect_events.load_event_grid(threshold, window, path=path)
+            assert (got["threshold"] == threshold).all() and (got["window"] == window).all()
+            want = apply_clean_window(detect_events.classify_events(panel, threshold), window)
+            pd.testing.assert_frame_equal(got[columns], want[columns].reset_index(drop=True),
+                                          check_categorical=False)
+    pd.testing.assert_frame_equal(detect_events.load_event_grid(0.01, 6, path=path)[columns], events,
+                                  check_categorical=False)
+    counts = {(c["threshold"], c["window"]): c["total_events"] for c in summary["event_grid"]}
+    assert counts[0.005, 3] > counts[0.01, 3] > counts[0.02, 3] > 0
+
+
+def test_wedge_panel_feeds_models_robustness(tmp_path, monkeypatch):
+    from src.analysis import models
+
+    monkeypatch.setitem(detect_events.CONFIG, "identification",
+                        {"event_threshold": 0.01, "clean_window_months": 6})
+    _write_merged(_merged(4, geos=["AT", "BE", "DE", "ES", "FR", "IT"], coicops=["CP01", "CP02", "CP03"],
+                          first_year=2012), tmp_path)
+    monkeypatch.setitem(detect_events.CONFIG, "robustness", {"thresholds": [0.01, 0.02]})
+    panel, events, _, _ = _run(tmp_path, monkeypatch, event_grid=True)
+    # The merged panel's dictionary columns come out as plain strings and
+    # float64, as downstream string keys and regressions expect
+    assert panel["geo"].dtype == object or pd.api.types.is_string_dtype(panel["geo"])
+    assert not isinstance(events["coicop"].dtype, pd.CategoricalDtype)
+    assert panel["tax_wedge"].dtype == np.float64
+
+    monkeypatch.setattr(models, "PROCESSED_DIR", str(tmp_path))
+    monkeypatch.setattr(models, "TABLES_DIR", str(tmp_path))
+    monkeypatch.setitem(models.CONFIG, "identification",
+                        {"event_threshold": 0.01, "base_period": -1, "clean_window_months": 6})
+    monkeypatch.setitem(models.CONFIG, "analysis", {"event_window": 12})
+    monkeypatch.setitem(models.CONFIG, "robustness", {"thresholds": [0.01, 0.02]})
+    df, clean_events = models.load_and_prep_data()
+    stacked = models.build_stacked_with_controls(df, clean_events, half_window=12)
+    rob = models.analysis_robustness(df, clean_events, stacked)
+    assert rob["Check"].str.startswith("Cluster: geo_year").any()
+    # The grid's events at the main threshold reproduce the main fit
+    main = rob[rob["Check"] == "Cluster: geo"].reset_index(drop=True)
+    from_grid = rob[rob["Check"] == "Threshold: 0.01"].reset_index(drop=True)
+    assert len(from_grid) == len(main) > 0
+    assert np.allclose(from_grid[["Coef", "SE"]], main[["Coef", "SE"]])
+    assert (rob["Check"] == "Threshold: 0.02").any()
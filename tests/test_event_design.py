@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from src.analysis.models import (build_event_design_matrix_np,
+                                 build_event_design_matrix_sparse,
+                                 run_absorbing_regression)
+
+
+def _stack(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'geo': rng.choice(list("ABCDEFGHIJKL"), n),
+        'coicop': rng.choice(['CP01', 'CP02', 'CP03', 'CP04'], n),
+        'rel_time': rng.integers(-5, 6, n),
+        'cal_time': rng.choice([f"2020-{m:02d}" for m in range(1, 13)], n),
+        'treat_shock': rng.normal(size=n),
+        'pos_shock': rng.normal(size=n),
+        'event_weight': rng.uniform(0.5, 2.0, n),
+    })
+    df['geo_coicop'] = df['geo'] + "_" + df['coicop']
+    df['norm_log_hicp'] = (0.4 * df['treat_shock'] * (df['rel_time'] >= 0)
+                           + rng.normal(size=n))
+    return df
+
+
+def test_sparse_design_matches_dense():
+    df = _stack()
+    dense, names = build_event_design_matrix_np(df, ['treat_shock', 'pos_shock'], 4, -1,
+                                                include_time_dummies=True)
+    sparse, sparse_names = build_event_design_matrix_sparse(
+        df, ['treat_shock', 'pos_shock'], 4, -1, include_time_dummies=True)
+
+    assert sparse_names == names
+    assert np.array_equal(sparse.toarray(), dense)
+    assert sparse.nnz <= 3 * len(df)
+
+
+def test_sparse_regression_matches_dense():
+    df = _stack(seed=1)
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                cluster_col="geo", weights_col="event_weight")
+
+    dense, names = run_absorbing_regression(df, sparse=False, **spec)
+    sparse, _ = run_absorbing_regression(df, sparse=True, **spec)
+
+    assert list(sparse.params.index) == names
+    assert np.allclose(sparse.params.to_numpy(), dense.params.to_numpy(), atol=1e-6)
+    assert np.allclose(sparse.cov.to_numpy(), dense.cov.to_numpy(), rtol=1e-4, atol=1e-10)
+    assert np.allclose(sparse.conf_int().to_numpy(), dense.conf_int().to_numpy(), atol=1e-5)
+    assert np.allclose(sparse.pvalues.to_numpy(), dense.pvalues.to_numpy(), atol=1e-5)
+    assert sparse.nobs == dense.nobs
+
+
+def test_sufficient_stats_regression_serves_all_clusterings():
+    from src.analysis.models import SufficientStatsRegression, iter_event_chunks
+
+    df = _stack(seed=2)
+    df['event_id'] = np.sort(np.random.default_rng(2).integers(0, 40, len(df)))
+    df['geo_year'] = df['geo'] + "_" + df['cal_time'].str[:4]
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                weights_col="event_weight")
+    clusters = ["geo", "geo_year", "geo_coicop"]
+
+    est = SufficientStatsRegression(cluster_cols=clusters, **spec).fit(
+        lambda: iter_event_chunks(df, chunk_rows=700))
+    for cluster_col in clusters:
+        ref, names = run_absorbing_regression(df, cluster_col=cluster_col, sparse=True, **spec)
+        res = est.results(cluster_col)
+        assert list(res.params.index) == names
+        assert np.allclose(res.params.to_numpy(), ref.params.to_numpy(), atol=1e-5)
+        assert np.allclose(res.std_errors.to_numpy(), ref.std_errors.to_numpy(), rtol=1e-5)
+    assert est.nobs_ == len(df)
+
+
+def test_multi_cluster_fit_matches_separate_and_two_way_fits():
+    from linearmodels.iv.absorbing import AbsorbingLS
+    from src.analysis.models import SufficientStatsRegression, iter_event_chunks
+
+    df = _stack(seed=3)
+    df['event_id'] = np.sort(np.random.default_rng(3).integers(0, 40, len(df)))
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                weights_col="event_weight")
+    clusters = ["geo", "geo_coicop", ("geo", "cal_time")]
+
+    multi, names = run_absorbing_regression(df, cluster_col=clusters, **spec)
+    for cluster_col in clusters[:2]:
+        ref, _ = run_absorbing_regression(df, cluster_col=cluster_col, sparse=True, **spec)
+        assert np.allclose(multi[cluster_col].cov.to_numpy(), ref.cov.to_numpy(), rtol=1e-10)
+
+    # Two-way clustering against linearmodels on the same within design
+    X = np.column_stack([df['treat_shock'] * (df['rel_time'] == t)
+                         for t in range(-5, 6) if t != -1])
+    codes = pd.DataFrame({c: pd.factorize(df[c])[0] for c in ["geo", "cal_time"]})
+    fe = pd.DataFrame({c: pd.Categorical(df[c]) for c in spec['absorb_cols']})
+    ref = AbsorbingLS(df['norm_log_hicp'], X, absorb=fe, weights=df['event_weight']).fit(
+        cov_type='clustered', clusters=codes, debiased=False)
+    assert np.allclose(multi[("geo", "cal_time")].params.to_numpy(), ref.params.to_numpy(), atol=1e-6)
+    assert np.allclose(multi[("geo", "cal_time")].cov.to_numpy(), ref.cov.to_numpy(), rtol=1e-4)
+
+    est = SufficientStatsRegression(cluster_cols=clusters, **spec).fit(
+        lambda: iter_event_chunks(df, chunk_rows=700))
+    assert np.allclose(est.results(("geo", "cal_time")).std_errors.to_numpy(),
+                       multi[("geo", "cal_time")].std_errors.to_numpy(), rtol=1e-5)
+
+
+def test_sufficient_stats_clusterings_keep_their_own_samples():
+    import pytest
+    from src.analysis.models import SufficientStatsRegression, iter_event_chunks
+
+    df = _stack(seed=4)
+    df['event_id'] = np.sort(np.random.default_rng(4).integers(0, 40, len(df)))
+    df['geo_year'] = (df['geo'] + "_" + df['cal_time'].str[:4]).where(df.index % 7 != 0)
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                weights_col="event_weight")
+    clusters = ["geo", "geo_year", ("geo_year", "geo_coicop")]
+
+    est = SufficientStatsRegression(cluster_cols=clusters, **spec).fit(
+        lambda: iter_event_chunks(df, chunk_rows=700))
+    # geo keeps every row; geo_year drops only the rows it does not cover
+    for cluster_col in clusters[:2]:
+        ref, _ = run_absorbing_regression(df, cluster_col=cluster_col, sparse=True, **spec)
+        res = est.results(cluster_col)
+        assert res.nobs == ref.nobs
+        assert np.allclose(res.params.to_numpy(), ref.params.to_numpy(), atol=1e-5)
+        assert np.allclose(res.std_errors.to_numpy(), ref.std_errors.to_numpy(), rtol=1e-5)
+    assert est.nobs_ == len(df) and est.results(clusters[2]).nobs == df['geo_year'].notna().sum()
+
+    with pytest.raises(ValueError, match="no chunks"):
+        SufficientStatsRegression(cluster_cols=["geo"], **spec).fit(lambda: iter([]))
+    with pytest.raises(ValueError, match="no complete rows"):
+        SufficientStatsRegression(cluster_cols=["geo"], **spec).fit(df.assign(norm_log_hicp=np.nan))
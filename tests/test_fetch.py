@@ -0,0 +1,120 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+from src.data import fetch
+
+PERIODS = ["2020-01", "2020-02", "2020-03"]
+
+
+def _dataset(n_geo, offset=0.0, periods=PERIODS):
+    noise = np.random.default_rng(n_geo).integers(0, 10 ** 6, n_geo)
+    rows = [("M", "I15", f"CP{k:06d}", f"G{g % 30:02d}",
+             [f"{100 + g + offset:.1f}", ": ", "101.5 p", "102 "][:len(periods)])
+            for g, k in enumerate(noise)]
+    return rows, list(periods)
+
+
+def test_fetch_all_retries_and_resumes(eurostat_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    eurostat_server.datasets = {"a": _dataset(40000), "b": _dataset(3), "c": _dataset(5, 1.0)}
+    eurostat_server.fail["b"] = 2
+    eurostat_server.truncate["a"] = 180_000
+
+    manifest, hashes, errors = fetch.fetch_all(
+        ["a", "b", "c", "missing"], max_workers=4, min_request_interval=0.0,
+        base_url=eurostat_server.base_url, max_retries=3, backoff=0.01)
+
+    assert list(errors) == ["missing"]
+    assert [r["dataset"] for r in manifest] == ["a", "b", "c"] and set(hashes) == {"a", "b", "c"}
+    assert eurostat_server.statuses("a") == [200, 206]
+    assert eurostat_server.statuses("b") == [503, 503, 200]
+
+    a = fetch.read_long(tmp_path / "data/raw/a")
+    assert sorted(a.columns) == ["coicop", "freq", "geo", "time", "unit", "value"]
+    assert len(a) == 3 * 40000 and a["geo"].nunique() == 30
+    assert a["time"].dtype == np.int32 and a["value"].dtype == np.float32
+    assert isinstance(a["coicop"].dtype, pd.CategoricalDtype)
+    jan = a[a["time"] == 2020 * 12 + 1]
+    assert np.allclose(np.sort(jan["value"].to_numpy()), 100 + np.arange(40000))
+    assert a.loc[a["time"] == 2020 * 12 + 2, "value"].isna().all()
+    assert (a.loc[a["time"] == 2020 * 12 + 3, "value"] == np.float32(101.5)).all()
+    # Each partition holds one geo, so readers can skip the others
+    g07 = fetch.read_long(tmp_path / "data/raw/a", filters=[("geo", "==", "G07")])
+    assert set(g07["geo"]) == {"G07"} and len(g07) == len(a[a["geo"] == "G07"])
+
+
+def test_fetch_all_runs_datasets_concurrently(eurostat_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    eurostat_server.datasets = {code: _dataset(3) for code in "abcd"}
+    eurostat_server.delay = 0.5
+
+    start = time.perf_counter()
+    _, hashes, errors = fetch.fetch_all(list("abcd"), max_workers=4, min_request_interval=0.05,
+                                        base_url=eurostat_server.base_url)
+    assert not errors and len(hashes) == 4
+    assert time.perf_counter() - start < 1.5
+
+
+def test_refresh_skips_unchanged_and_merges_new_periods(eurostat_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    eurostat_server.datasets = {"a": _dataset(2000), "b": _dataset(50)}
+    opts = dict(max_workers=2, min_request_interval=0.0, base_url=eurostat_server.base_url,
+                overlap_periods=2)
+    first, _, _ = fetch.fetch_all(["a", "b"], **opts)
+    json.loads(json.dumps(first))  # manifest records stay JSON-serializable
+    previous = {r["dataset"]: r for r in first}
+
+    # "a" publishes a new month and revises the last one; "b" is unchanged
+    rows, periods = _dataset(2000, periods=PERIODS + ["2020-04"])
+    rows[0][4][2] = "99.0"
+    eurostat_server.datasets["a"] = (rows, periods)
+    manifest, hashes, errors = fetch.fetch_all(["a", "b"], previous=previous, **opts)
+    refresh = {r["dataset"]: r for r in manifest}
+
+    assert not errors
+    assert refresh["b"]["refresh"] == "unchanged" and eurostat_server.statuses("b", "HEAD") == [304]
+    assert eurostat_server.statuses("b") == [200]
+    assert refresh["a"]["refresh"] == "delta" and refresh["a"]["time_max"] == "2020-04"
+    assert refresh["a"]["bytes_downloaded"] < previous["a"]["bytes_downloaded"]
+
+    # The merged table equals a full download of the new version
+    merged = fetch.read_long(tmp_path / "data/raw/a")
+    fetch.fetch_all(["a"], full=True, **opts)
+    full = fetch.read_long(tmp_path / "data/raw/a")
+    key = ["coicop", "geo", "time"]
+    pd.testing.assert_frame_equal(merged.sort_values(key, ignore_index=True),
+                                  full.sort_values(key, ignore_index=True), check_categorical=False)
+
+
+def test_empty_download_keeps_stored_dataset(eurostat_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    eurostat_server.datasets = {"a": _dataset(20)}
+    opts = dict(max_workers=1, min_request_interval=0.0, base_url=eurostat_server.base_url)
+    fetch.fetch_all(["a"], **opts)
+    stored = fetch.read_long(tmp_path / "data/raw/a")
+
+    eurostat_server.datasets["a"] = ([], PERIODS)
+    manifest, hashes, errors = fetch.fetch_all(["a"], full=True, **opts)
+
+    assert list(errors) == ["a"] and "No rows" in str(errors["a"])
+    assert not manifest and not hashes
+    pd.testing.assert_frame_equal(fetch.read_long(tmp_path / "data/raw/a"), stored)
+    assert not any(p.name.startswith("a.") for p in (tmp_path / "data/raw").iterdir())
+
+
+def test_refresh_drops_rows_withdrawn_in_the_overlap(eurostat_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    eurostat_server.datasets = {"a": _dataset(200)}
+    opts = dict(max_workers=1, min_request_interval=0.0, base_url=eurostat_server.base_url,
+                overlap_periods=2)
+    first, _, _ = fetch.fetch_all(["a"], **opts)
+
+    # The last period is withdrawn; every remaining row is unchanged
+    rows, _ = _dataset(200)
+    eurostat_server.datasets["a"] = (rows, PERIODS[:-1])
+    manifest, _, errors = fetch.fetch_all(["a"], previous={"a": first[0]}, **opts)
+
+    assert not errors and manifest[0]["refresh"] == "delta" and manifest[0]["time_max"] == "2020-02"
+    merged = fetch.read_long(tmp_path / "data/raw/a")
+    assert merged["time"].max() == 2020 * 12 + 2 and len(merged) == 2 * 200
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from src.analysis.models import FixedEffectConvergenceWarning, FixedEffectDemeaner
+
+
+def test_map_demeaning_matches_dummy_regression():
+    rng = np.random.default_rng(0)
+    n = 500
+    absorb = np.column_stack([rng.integers(0, 12, n), rng.integers(0, 7, n)])
+    weights = rng.uniform(0.5, 2.0, n)
+    y = rng.normal(size=n) + absorb[:, 0] * 0.3 - absorb[:, 1] * 0.2
+
+    dummies = np.column_stack([absorb[:, 0] == g for g in range(12)] +
+                              [absorb[:, 1] == g for g in range(7)]).astype(float)
+    sqrt_w = np.sqrt(weights)
+    coef = np.linalg.lstsq(dummies * sqrt_w[:, None], y * sqrt_w, rcond=None)[0]
+
+    demeaned = FixedEffectDemeaner(absorb, weights, tol=1e-12).demean(y)
+    assert np.allclose(demeaned, y - dummies @ coef, atol=1e-8)
+
+
+def test_map_demeaning_flags_unconverged_sweeps():
+    rng = np.random.default_rng(1)
+    n = 500
+    absorb = np.column_stack([rng.integers(0, 12, n), rng.integers(0, 7, n)])
+    y = rng.normal(size=n) + absorb[:, 0] * 0.3 - absorb[:, 1] * 0.2
+
+    demeaner = FixedEffectDemeaner(absorb, max_iter=1)
+    with pytest.warns(FixedEffectConvergenceWarning):
+        demeaner.demean(y)
+    assert not demeaner.converged_ and demeaner.n_iter_ == 1
+
+    demeaner = FixedEffectDemeaner(absorb)
+    demeaner.demean(y)
+    assert demeaner.converged_
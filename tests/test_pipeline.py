@@ -0,0 +1,61 @@
+from src.pipeline import Stage, run_pipeline, stage_dependencies
+
+
+def _script(path, src, dst):
+    path.write_text(
+        "import shutil, sys\n"
+        f"shutil.copy({src!r}, {dst!r})\n"
+        f"open({str(path) + '.log'!r}, 'a').write('run\\n')\n"
+    )
+    return str(path)
+
+
+def _runs(path):
+    return len(open(str(path) + ".log").read().split())
+
+
+def test_pipeline_skips_unchanged_stages_and_records_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "raw.txt").write_text("a")
+    (tmp_path / "notes.txt").write_text("x")
+    a, b, c = (tmp_path / f"{n}.py" for n in "abc")
+    stages = [
+        Stage("a", _script(a, "raw.txt", "mid.txt"), inputs=["raw.txt"], outputs=["mid.txt"]),
+        Stage("b", _script(b, "mid.txt", "b.txt"), inputs=["mid.txt"], outputs=["b.txt"],
+              config_sections=["analysis"]),
+        Stage("c", _script(c, "mid.txt", "c.txt"), inputs=["mid.txt", "notes.txt"], outputs=["c.txt"]),
+    ]
+    config = {"analysis": {"event_window": 12}}
+    assert stage_dependencies(stages) == {"a": [], "b": ["a"], "c": ["a"]}
+
+    first = run_pipeline(stages, config)
+    assert [r["status"] for r in first.values()] == ["ran"] * 3
+    assert all(r["wall_time_s"] > 0 and r["peak_rss_mb"] > 0 for r in first.values())
+    assert (tmp_path / "output/metadata/pipeline_runs.json").exists()
+
+    assert {r["status"] for r in run_pipeline(stages, config).values()} == {"skipped"}
+
+    # Same upstream bytes: only the stages whose own inputs changed rerun
+    (tmp_path / "raw.txt").write_text("a")
+    (tmp_path / "notes.txt").write_text("y")
+    again = run_pipeline(stages, {"analysis": {"event_window": 24}})
+    assert {k: r["status"] for k, r in again.items()} == {"a": "skipped", "b": "ran", "c": "ran"}
+    assert run_pipeline(stages, config, force=["a"])["a"]["status"] == "ran"
+    assert (_runs(a), _runs(b), _runs(c)) == (2, 3, 2)
+
+
+def test_always_run_stage_reruns_and_downstream_follows_its_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "remote.txt").write_text("a")
+    a, b = (tmp_path / f"{n}.py" for n in "ab")
+    stages = [
+        Stage("fetch", _script(a, "remote.txt", "raw.txt"), outputs=["raw.txt"], always_run=True),
+        Stage("clean", _script(b, "raw.txt", "clean.txt"), inputs=["raw.txt"], outputs=["clean.txt"]),
+    ]
+    run_pipeline(stages, {})
+
+    again = run_pipeline(stages, {})
+    assert {k: r["status"] for k, r in again.items()} == {"fetch": "ran", "clean": "skipped"}
+    (tmp_path / "remote.txt").write_text("b")
+    assert run_pipeline(stages, {})["clean"]["status"] == "ran"
+    assert (_runs(a), _runs(b)) == (3, 2)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from src.analysis import models
+from src.utils.result_cache import ResultCache
+
+
+def _stack(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'geo': rng.choice(list("ABCDEFGHIJ"), n),
+        'geo_coicop': rng.choice(["A_CP01", "B_CP01", "C_CP02", "D_CP03"], n),
+        'rel_time': rng.integers(-5, 6, n),
+        'cal_time': rng.choice([f"2020-{m:02d}" for m in range(1, 13)], n),
+        'treat_shock': rng.normal(size=n),
+        'event_weight': rng.uniform(0.5, 2.0, n),
+    })
+    df['norm_log_hicp'] = 0.4 * df['treat_shock'] * (df['rel_time'] >= 0) + rng.normal(size=n)
+    return df
+
+
+def test_result_cache_roundtrip_and_invalidation(tmp_path):
+    data = tmp_path / "panel.parquet"
+    data.write_bytes(b"v1")
+    cache = ResultCache(tmp_path / "cache", [data], {"event_window": 12})
+    spec = {"y": "norm_log_hicp", "cluster": "geo"}
+    cache.store(spec, [1.0, 2.0], np.eye(2), 10, ["a", "b"])
+
+    hit = cache.load(spec)
+    assert hit["nobs"] == 10 and hit["col_names"] == ["a", "b"]
+    assert np.array_equal(hit["cov"], np.eye(2))
+    assert cache.load({**spec, "cluster": "geo_year"}) is None
+    assert ResultCache(tmp_path / "cache", [data], {"event_window": 24}).load(spec) is None
+    data.write_bytes(b"v2")
+    assert ResultCache(tmp_path / "cache", [data], {"event_window": 12}).load(spec) is None
+
+
+def test_cached_absorbing_regression_reuses_fit(tmp_path, monkeypatch):
+    data = tmp_path / "panel.parquet"
+    data.write_bytes(b"v1")
+    monkeypatch.setattr(models, "RESULT_CACHE", ResultCache(tmp_path / "cache", [data]))
+    df = _stack(seed=4)
+    spec = dict(sample="main", y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                cluster_col="geo", weights_col="event_weight")
+
+    fitted, names = models.cached_absorbing_regression(df, **spec)
+    calls = []
+    monkeypatch.setattr(models, "run_absorbing_regression", lambda *a, **k: calls.append(1))
+    cached, cached_names = models.cached_absorbing_regression(df, **spec)
+
+    assert not calls and cached_names == names
+    assert np.array_equal(cached.params.to_numpy(), np.asarray(fitted.params))
+    assert np.allclose(cached.conf_int().to_numpy(), fitted.conf_int().to_numpy())
+    assert cached.nobs == fitted.nobs
+
+
+def test_result_cache_hashes_dataset_directories(tmp_path):
+    data = tmp_path / "panel.parquet"
+    data.mkdir()
+    (data / "part-00000.parquet").write_bytes(b"v1")
+    cache = ResultCache(tmp_path / "cache", [data])
+    spec = {"y": "norm_log_hicp", "cluster": "geo"}
+    cache.store(spec, [1.0], np.eye(1), 5, ["a"])
+
+    assert ResultCache(tmp_path / "cache", [data]).load(spec)["nobs"] == 5
+    (data / "part-00001.parquet").write_bytes(b"v2")
+    assert ResultCache(tmp_path / "cache", [data]).load(spec) is None
+
+
+def test_result_cache_key_tracks_estimator_source(tmp_path):
+    data = tmp_path / "panel.parquet"
+    data.write_bytes(b"v1")
+    code = tmp_path / "models.py"
+    code.write_text("def fit(): return 1\n")
+    spec = {"y": "norm_log_hicp", "cluster": "geo"}
+    ResultCache(tmp_path / "cache", [data], code_paths=[code]).store(spec, [1.0], np.eye(1), 5, ["a"])
+
+    assert ResultCache(tmp_path / "cache", [data], code_paths=[code]).load(spec)["nobs"] == 5
+    code.write_text("def fit(): return 2\n")
+    assert ResultCache(tmp_path / "cache", [data], code_paths=[code]).load(spec) is None
+
+
+def test_cached_fits_are_keyed_on_the_fitted_rows(tmp_path, monkeypatch):
+    data = tmp_path / "panel.parquet"
+    data.write_bytes(b"v1")
+    monkeypatch.setattr(models, "RESULT_CACHE", ResultCache(tmp_path / "cache", [data]))
+    df = _stack(seed=5)
+    spec = dict(sample="main", y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=5,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                weights_col="event_weight")
+
+    full, _ = models.cached_absorbing_regression(df, cluster_col="geo", **spec)
+    subset = df[df['treat_shock'] > 0]
+    # Same label, different rows: fitted afresh, not the cached full sample
+    sub, _ = models.cached_absorbing_regression(subset, cluster_col="geo", **spec)
+    assert sub.nobs == len(subset) and sub.nobs != full.nobs
+    streamed, _ = models.cached_stacked_regression(subset, cluster_cols=["geo"], **spec)
+    assert streamed["geo"].nobs == len(subset)
+
+    calls = []
+    monkeypatch.setattr(models, "run_absorbing_regression", lambda *a, **k: calls.append(1))
+    again, _ = models.cached_absorbing_regression(subset.copy(), cluster_col="geo", **spec)
+    assert not calls and again.nobs == sub.nobs
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
-from src.analysis.models import build_stacked_with_controls
+from src.analysis.models import (
+    SufficientStatsRegression, VirtualStack, build_stacked_with_controls, run_absorbing_regression,
+)
 
 def test_build_stacked_with_controls_has_controls():
     df = pd.DataFrame({
@@ -14,3 +17,91 @@ def test_build_stacked_with_controls_has_controls():
     })
     stacked = build_stacked_with_controls(df, events, half_window=1)
     assert (stacked["treated"] == 0).any()
+
+
+def test_build_stacked_with_controls_windows_and_base_join():
+    df = pd.DataFrame({
+        "geo": ["B", "A", "A", "B", "A", "C", "C", "A"],
+        "coicop": ["CP01", "CP01", "CP01", "CP01", "CP02", "CP01", "CP01", "CP01"],
+        "time": ["2020-01", "2020-02", "2019-12", "2019-12", "2019-12", "2020-01", "2020-02", "2020-01"],
+        "log_hicp": [4.5, 4.7, 4.5, 4.4, 3.0, 2.0, 2.1, 4.6],
+        "weight": [2.0, 1.0, None, 3.0, 1.0, 5.0, 5.0, 1.0]
+    })
+    events = pd.DataFrame({
+        "geo": ["A", "B"], "coicop": ["CP01", "CP01"],
+        "time": ["2020-01", "2020-02"], "delta_tw": [0.02, -0.01]
+    })
+    stacked = build_stacked_with_controls(df, events, half_window=1)
+
+    # C has no 2019-12 base row and drops out; rows keep panel order per event
+    first = stacked[stacked["event_id"] == 0]
+    assert list(zip(first["geo"], first["cal_time"])) == [
+        ("B", "2020-01"), ("A", "2020-02"), ("A", "2019-12"), ("B", "2019-12"), ("A", "2020-01")]
+    assert first["rel_time"].tolist() == [0, 1, -1, -1, 0]
+    assert first["treated"].tolist() == [0, 1, 1, 0, 1]
+    # A's missing base weight is filled with the event's mean panel weight
+    assert (first.loc[first["geo"] == "A", "event_weight"] == 1.75).all()
+
+    second = stacked[stacked["event_id"] == 1]
+    assert set(second["geo"]) == {"A", "B", "C"}
+    assert (second["norm_log_hicp"][second["rel_time"] == -1] == 0).all()
+    assert (second["treat_shock"] == -1.0 * second["treated"]).all()
+
+
+def _panel(seed=0):
+    rng = np.random.default_rng(seed)
+    months = pd.period_range("2018-01", "2021-12", freq="M").strftime("%Y-%m")
+    df = pd.MultiIndex.from_product(
+        [list("ABCDEF"), ["CP01", "CP02", "CP03"], months], names=["geo", "coicop", "time"]
+    ).to_frame(index=False).sample(frac=0.95, random_state=seed).reset_index(drop=True)
+    df["log_hicp"] = rng.normal(size=len(df))
+    df["weight"] = rng.uniform(size=len(df))
+    df.loc[rng.random(len(df)) < 0.05, "weight"] = np.nan
+    events = pd.DataFrame({
+        "geo": rng.choice(list("ABCDEF"), 40),
+        "coicop": rng.choice(["CP01", "CP02", "CP03"], 40),
+        "time": rng.choice(list(months), 40),
+        "delta_tw": rng.normal(0, 0.02, 40),
+    })
+    return df, events
+
+
+def test_virtual_stack_matches_materialized_stack():
+    df, events = _panel()
+    stacked = build_stacked_with_controls(df, events, half_window=6)
+    stack = VirtualStack(df, events, half_window=6)
+
+    assert len(stack) == len(stacked)
+    pd.testing.assert_frame_equal(stack.frame(), stacked)
+    pd.testing.assert_frame_equal(
+        pd.concat(stack.iter_frames(chunk_rows=500), ignore_index=True), stacked)
+    pd.testing.assert_frame_equal(
+        stack.rel_time_frame(3, ["norm_log_hicp", "event_weight"]),
+        stacked.loc[stacked["rel_time"] == 3, ["norm_log_hicp", "event_weight"]].reset_index(drop=True))
+
+
+def test_virtual_stack_feeds_absorbing_regression():
+    df, events = _panel(seed=1)
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=6,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                cluster_col="geo", weights_col="event_weight")
+    stacked = build_stacked_with_controls(df, events, half_window=6)
+
+    res_frame, _ = run_absorbing_regression(stacked, **spec)
+    res_lazy, _ = run_absorbing_regression(VirtualStack(df, events, half_window=6), **spec)
+    assert np.allclose(res_lazy.params.to_numpy(), res_frame.params.to_numpy())
+    assert np.allclose(res_lazy.std_errors.to_numpy(), res_frame.std_errors.to_numpy())
+
+
+def test_virtual_stack_feeds_sufficient_stats_regression():
+    df, events = _panel(seed=2)
+    spec = dict(y_col="norm_log_hicp", treat_vars=["treat_shock"], half_window=6,
+                base_period=-1, absorb_cols=["geo_coicop", "cal_time", "rel_time"],
+                cluster_cols=["geo"], weights_col="event_weight")
+    stacked = build_stacked_with_controls(df, events, half_window=6)
+
+    res_frame = SufficientStatsRegression(**spec).fit(stacked).results("geo")
+    res_lazy = SufficientStatsRegression(**spec).fit(VirtualStack(df, events, half_window=6)).results("geo")
+    assert res_lazy.nobs == res_frame.nobs
+    assert np.allclose(res_lazy.params.to_numpy(), res_frame.params.to_numpy())
+    assert np.allclose(res_lazy.std_errors.to_numpy(), res_frame.std_errors.to_numpy())
@@ -3,3 +3,23 @@ from src.utils.time_parse import normalize_time
 def test_normalize_time():
     assert normalize_time("2020M01") == "2020-01"
     assert normalize_time("1999M12") == "1999-12"
+
+
+def test_to_abs_month_parses_all_label_formats():
+    import numpy as np
+    import pandas as pd
+    import pytest
+    from src.utils.time_parse import abs_month_to_period, abs_month_to_timestamp, to_abs_month
+
+    labels = pd.Series(["2020M01", "2020-02", "2020", "1999M12", "2020-02"], dtype="category")
+    months = to_abs_month(labels)
+    assert months.dtype == np.int32
+    assert months.tolist() == [2020 * 12 + 1, 2020 * 12 + 2, 2020 * 12 + 1, 1999 * 12 + 12, 2020 * 12 + 2]
+    assert list(abs_month_to_period(months)) == ["2020-01", "2020-02", "2020-01", "1999-12", "2020-02"]
+    assert to_abs_month(pd.to_datetime(["2020-03-01", "1970-01-01"])).tolist() == [24243, 23641]
+    assert list(abs_month_to_timestamp([24243])) == [np.datetime64("2020-03-01")]
+
+    coerced = to_abs_month(["2020-01", "bad", None], errors="coerce")
+    assert coerced[0] == 24241 and np.isnan(coerced[1:]).all()
+    with pytest.raises(ValueError):
+        to_abs_month(["2020-01", "bad"])
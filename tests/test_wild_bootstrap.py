@@ -0,0 +1,232 @@
+import tracemalloc
+import numpy as np
+from src.analysis.models import BootstrapConfig, WildClusterBootstrap
+
+
+def _sample(n=300, n_clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    clusters = rng.integers(0, n_clusters, n)
+    x = rng.normal(size=n) + 0.3 * clusters
+    y = 0.5 * x + rng.normal(size=n) + 0.2 * clusters
+    X = np.column_stack([np.ones(n), x])
+    weights = rng.uniform(0.5, 2.0, n)
+    return y, X, clusters, weights
+
+
+def test_batched_bootstrap_matches_refit_per_draw():
+    y, X, clusters, weights = _sample()
+    config = BootstrapConfig(n_bootstrap=199, distribution="webb_6pt", seed=3)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, weights=weights, param_idx=1)
+
+    ref = WildClusterBootstrap(config)
+    t_ref = []
+    for w in np.vstack(list(ref._weight_blocks(8))):
+        y_star = X @ boot.beta_orig_ + w[clusters] * boot.resid_orig_
+        beta, resid = ref._estimate_ols(y_star, X, weights)
+        t_ref.append((beta[1] - boot.beta_orig_[1]) / ref._clustered_se(resid, X, clusters, weights)[1])
+
+    assert np.allclose(boot.t_stats_boot_, t_ref)
+
+
+# Default fit on _sample(seed=8) before bootstrap t-statistics were centred
+UNCENTRED_DEFAULT = {'estimate': 0.6552028754913494, 'std_error': 0.0691024549009876,
+                     'p_value': 0.8777555110220441, 'ci_lower': -0.6912944042721051,
+                     'ci_upper': 0.074617031424007}
+
+
+def test_centred_statistic_changes_default_results():
+    y, X, clusters, weights = _sample(seed=8)
+    config = BootstrapConfig(n_bootstrap=499, distribution="webb_6pt", seed=13)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, weights=weights, param_idx=1)
+    res = boot.results_
+
+    assert np.isclose(res['estimate'], UNCENTRED_DEFAULT['estimate'])
+    assert np.isclose(res['std_error'], UNCENTRED_DEFAULT['std_error'])
+    # Before: t* = beta*/se* put the estimate outside its own interval
+    assert not UNCENTRED_DEFAULT['ci_lower'] < res['estimate'] < UNCENTRED_DEFAULT['ci_upper']
+    # After: t* = (beta* - beta_hat)/se*, the interval covers the estimate
+    # and a clearly nonzero effect is rejected
+    assert res['ci_lower'] < res['estimate'] < res['ci_upper']
+    assert res['p_value'] < 0.05 < UNCENTRED_DEFAULT['p_value']
+
+
+def test_joint_pointwise_results_match_single_fit():
+    y, X, clusters, weights = _sample(seed=6)
+    config = BootstrapConfig(n_bootstrap=499, distribution="webb_6pt", seed=11)
+    single = WildClusterBootstrap(config).fit(y, X, clusters, weights=weights, param_idx=1)
+    joint = WildClusterBootstrap(config).fit_joint(y, X, clusters, weights=weights, param_idx=[0, 1])
+
+    assert np.allclose(joint.t_stats_boot_[:, 1], single.t_stats_boot_)
+    for key in ("estimate", "std_error", "p_value", "ci_lower", "ci_upper"):
+        assert np.isclose(joint.results_[key][1], single.results_[key])
+
+
+def test_restricted_bootstrap_matches_refit_per_draw():
+    y, X, clusters, weights = _sample(seed=1)
+    config = BootstrapConfig(n_bootstrap=199, seed=5, impose_null=True)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, weights=weights, param_idx=1)
+
+    ref = WildClusterBootstrap(config)
+    beta_r, resid_r = ref._estimate_ols(y, X[:, :1], weights)
+    t_ref = []
+    for w in np.vstack(list(ref._weight_blocks(8))):
+        y_star = X[:, :1] @ beta_r + w[clusters] * resid_r
+        beta, resid = ref._estimate_ols(y_star, X, weights)
+        t_ref.append(beta[1] / ref._clustered_se(resid, X, clusters, weights)[1])
+
+    assert np.allclose(boot.t_stats_boot_, t_ref)
+    assert boot.ci_lower_ < boot.results_['estimate'] < boot.ci_upper_
+
+
+def test_legacy_rng_reproduces_randomstate_draws():
+    y, X, clusters, _ = _sample(seed=3)
+    config = BootstrapConfig(n_bootstrap=1500, distribution="mammen", seed=9, legacy_rng=True)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, param_idx=1)
+
+    rs = np.random.RandomState(9)
+    sqrt5 = np.sqrt(5)
+    p1 = (sqrt5 + 1) / (2 * sqrt5)
+    draws = [rs.choice([(1 - sqrt5) / 2, (1 + sqrt5) / 2], size=8, p=[p1, 1 - p1])
+             for _ in range(config.n_bootstrap)]
+    ref = WildClusterBootstrap(config)
+    assert np.array_equal(np.vstack(list(ref._weight_blocks(8))), draws)
+    assert len(boot.t_stats_boot_) == config.n_bootstrap
+
+
+def test_legacy_rng_disables_enumeration_and_tie_tolerance():
+    y, X, clusters, _ = _sample(n_clusters=6)
+    config = BootstrapConfig(n_bootstrap=999, seed=9, legacy_rng=True)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, param_idx=1)
+
+    assert len(boot.t_stats_boot_) == config.n_bootstrap
+    t_orig = boot.results_['estimate'] / boot.results_['std_error']
+    assert boot.p_value_ == np.mean(np.abs(boot.t_stats_boot_) >= np.abs(t_orig))
+
+
+# WildClusterBootstrap(BootstrapConfig(n_bootstrap=199, distribution="mammen",
+# seed=9)) of the RandomState-based release on _sample(seed=7)
+BASELINE_UNABSORBED = {'estimate': 0.657820629487713, 'std_error': 0.07951972387383746,
+                       'p_value': 0.8090452261306532, 'ci_lower': -0.6200566092923593,
+                       'ci_upper': 0.16251809072876794}
+BASELINE_ABSORBED = {'estimate': 0.8178103313282384, 'std_error': 0.09893528321305638}
+
+
+def test_legacy_rng_matches_baseline_output_without_absorbed_effects():
+    y, X, clusters, weights = _sample(seed=7)
+    rng = np.random.default_rng(7)
+    absorb = np.column_stack([rng.integers(0, 5, len(y)), rng.integers(0, 7, len(y))])
+    config = BootstrapConfig(n_bootstrap=199, distribution="mammen", seed=9, legacy_rng=True)
+
+    plain = WildClusterBootstrap(config).fit(y, X, clusters, weights=weights, param_idx=1)
+    for key, value in BASELINE_UNABSORBED.items():
+        assert np.isclose(plain.results_[key], value, rtol=1e-9)
+
+    # Absorbed fits use the exact within estimator instead of the single
+    # demeaning sweep of that release, so only the weight draws carry over
+    absorbed = WildClusterBootstrap(config).fit(y, X[:, 1:], clusters, absorb, weights, param_idx=0)
+    dummies = np.column_stack([X[:, 1:], np.eye(5)[absorb[:, 0]], np.eye(7)[absorb[:, 1]][:, 1:]])
+    exact, _ = absorbed._estimate_ols(y, dummies, weights)
+    assert np.isclose(absorbed.results_['estimate'], exact[0])
+    assert not np.isclose(absorbed.results_['estimate'], BASELINE_ABSORBED['estimate'], rtol=0.01)
+    assert not np.isclose(absorbed.results_['std_error'], BASELINE_ABSORBED['std_error'], rtol=0.01)
+
+
+def test_generator_weights_match_distribution():
+    boot = WildClusterBootstrap(BootstrapConfig(distribution="webb_6pt", seed=1))
+    w = boot._generate_weights(10, 20000)
+    values, probs = boot._weight_support()
+
+    freq = (w.ravel()[:, None] == values).mean(axis=0)
+    assert np.allclose(freq, probs, atol=0.01)
+
+
+def test_rademacher_enumerates_all_signs_for_small_g():
+    y, X, clusters, _ = _sample(n_clusters=6)
+    boot = WildClusterBootstrap(BootstrapConfig(n_bootstrap=999)).fit(y, X, clusters, param_idx=1)
+
+    assert boot.results_['enumerated']
+    assert len(boot.t_stats_boot_) == 2 ** 6
+    assert np.isclose(boot.p_value_ * 2 ** 6, round(boot.p_value_ * 2 ** 6))
+
+
+def test_weighted_bootstrap_memory_is_linear_in_n():
+    n = 1_000_000
+    y, X, clusters, weights = _sample(n=n, n_clusters=20)
+    tracemalloc.start()
+    WildClusterBootstrap(BootstrapConfig(n_bootstrap=99)).fit(
+        y, X, clusters, weights=weights, param_idx=1)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert peak < 256 * 1024 ** 2
+
+
+def test_absorbed_bootstrap_reuses_within_design():
+    y, X, clusters, weights = _sample(seed=2)
+    rng = np.random.default_rng(2)
+    absorb = np.column_stack([rng.integers(0, 5, len(y)), rng.integers(0, 7, len(y))])
+    config = BootstrapConfig(n_bootstrap=199, distribution="mammen", seed=4)
+    boot = WildClusterBootstrap(config).fit(y, X, clusters, absorb, weights, param_idx=1)
+
+    ref = WildClusterBootstrap(config)
+    X_within = boot.X_design_
+    t_ref = []
+    for w in np.vstack(list(ref._weight_blocks(8))):
+        y_star = boot.fitted_ + w[clusters] * boot.resid_orig_
+        beta, resid = ref._estimate_ols(y_star, X_within, weights)
+        t_ref.append((beta[1] - boot.beta_orig_[1]) / ref._clustered_se(resid, X_within, clusters, weights)[1])
+
+    assert np.allclose(X_within[:, 0], 0)
+    assert np.allclose(boot.t_stats_boot_, t_ref)
+
+
+def test_joint_bootstrap_matches_absorbing_regression():
+    import pandas as pd
+    from src.analysis.models import run_absorbing_regression, run_wild_bootstrap_inference
+
+    rng = np.random.default_rng(7)
+    n = 3000
+    df = pd.DataFrame({
+        'geo': rng.choice(list("ABCDEFGHIJ"), n),
+        'coicop': rng.choice(['CP01', 'CP02', 'CP03'], n),
+        'rel_time': rng.integers(-3, 4, n),
+        'cal_time': rng.choice(['2020-01', '2020-02', '2020-03', '2020-04'], n),
+        'treat_shock': rng.normal(size=n),
+    })
+    df['geo_coicop'] = df['geo'] + "_" + df['coicop']
+    df['norm_log_hicp'] = 0.4 * df['treat_shock'] * (df['rel_time'] >= 0) + rng.normal(size=n)
+    spec = dict(y_col="norm_log_hicp", half_window=3, base_period=-1,
+                absorb_cols=["geo_coicop", "cal_time", "rel_time"], cluster_col="geo")
+
+    res, _ = run_absorbing_regression(df, treat_vars=["treat_shock"], **spec)
+    joint = run_wild_bootstrap_inference(
+        df, treat_var="treat_shock",
+        config=BootstrapConfig(n_bootstrap=499, distribution="webb_6pt", joint=True), **spec)
+
+    joint = joint[joint['rel_time'] != -1]
+    assert np.allclose(joint['coef'], res.params.to_numpy(), atol=1e-6)
+    assert (joint['band_upper'] - joint['band_lower'] >= joint['ci_upper'] - joint['ci_lower'] - 1e-12).all()
+
+
+def test_parallel_horizons_are_identical_for_any_worker_count():
+    import pandas as pd
+    from src.analysis.models import run_wild_bootstrap_inference
+
+    rng = np.random.default_rng(11)
+    n = 2000
+    df = pd.DataFrame({
+        'geo': rng.choice(list("ABCDEFGHIJKL"), n),
+        'rel_time': rng.integers(-1, 2, n),
+        'treat_shock': rng.normal(size=n),
+    })
+    df['y'] = 0.3 * df['treat_shock'] + rng.normal(size=n)
+    spec = dict(y_col="y", treat_var="treat_shock", half_window=1, base_period=-1,
+                absorb_cols=[], cluster_col="geo")
+
+    runs = [run_wild_bootstrap_inference(
+                df, config=BootstrapConfig(n_bootstrap=9000, distribution="webb_6pt",
+                                           n_jobs=n_jobs), **spec)
+            for n_jobs in (1, 4)]
+
+    assert runs[0]['pval_bootstrap'].notna().all()
+    assert runs[0].equals(runs[1])